@@ -93,6 +93,11 @@ class Account(BaseModel):
         verbose_name_plural = "Accounts"
         db_table = "accounts"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "-created_at", "-id"], name="accounts_org_created_id_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -5,6 +5,7 @@ from common.serializer import (
     AttachmentsSerializer,
     OrganizationSerializer,
     ProfileSerializer,
+    ProjectedListSerializer,
     UserSerializer
 )
 from contacts.serializer import ContactSerializer
@@ -178,4 +179,22 @@ class AccountCommentEditSwaggerSerializer(serializers.Serializer):
 class EmailWriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = AccountEmail
-        fields = ("from_email", "recipients", "message_subject","scheduled_later","timezone","scheduled_date_time","message_body")
\ No newline at end of file
+        fields = ("from_email", "recipients", "message_subject","scheduled_later","timezone","scheduled_date_time","message_body")
+
+
+class AccountListSerializer(ProjectedListSerializer):
+    class Meta:
+        model = Account
+        fields = (
+            "id",
+            "name",
+            "email",
+            "phone",
+            "industry",
+            "billing_city",
+            "billing_country",
+            "website",
+            "status",
+            "created_at",
+        )
+        read_only_fields = fields
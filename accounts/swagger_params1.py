@@ -14,6 +14,19 @@ account_get_params = [
     OpenApiParameter("name", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("city", OpenApiTypes.STR, OpenApiParameter.QUERY),
     OpenApiParameter("tags", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "pagination", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["cursor"]
+    ),
+    OpenApiParameter("open_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("close_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=["exact", "cached", "approximate"],
+    ),
+    OpenApiParameter("lookups", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+    OpenApiParameter("fields", OpenApiTypes.STR, OpenApiParameter.QUERY),
 ]
 
 
@@ -5,10 +5,9 @@ from celery import Celery
 from django.conf import settings
 from django.core.mail import EmailMessage
 from django.template import Context, Template
-from django.template.loader import render_to_string
 
 from accounts.models import Account, AccountEmail, AccountEmailLog
-from common.models import Profile
+from common.notifications import NOTIFICATION_TASK_RETRIES, notify_profiles
 from common.utils import convert_to_custom_timezone
 
 app = Celery("redis://")
@@ -58,30 +57,23 @@ def send_email(email_obj_id):
                     print(e)
 
 
-@app.task
-def send_email_to_assigned_user(recipients, from_email):
+@app.task(bind=True, max_retries=NOTIFICATION_TASK_RETRIES)
+def send_email_to_assigned_user(self, recipients, from_email, deferred_to=None):
     """Send Mail To Users When they are assigned to a contact"""
-    account = Account.objects.filter(id=from_email).first()
-    created_by = account.created_by
-
-    for profile_id in recipients:
-        recipients_list = []
-        profile = Profile.objects.filter(id=profile_id, is_active=True).first()
-        if profile:
-            recipients_list.append(profile.user.email)
-            context = {}
-            context["url"] = settings.DOMAIN_NAME
-            context["user"] = profile.user
-            context["account"] = account
-            context["created_by"] = created_by
-            subject = "Assigned a account for you."
-            html_content = render_to_string(
-                "assigned_to/account_assigned.html", context=context
-            )
-
-            msg = EmailMessage(subject, html_content, to=recipients_list)
-            msg.content_subtype = "html"
-            msg.send()
+    account = Account.objects.select_related("created_by").filter(id=from_email).first()
+    context = {
+        "url": settings.DOMAIN_NAME,
+        "account": account,
+        "created_by": account.created_by,
+    }
+    return notify_profiles(
+        recipients,
+        "Assigned a account for you.",
+        "assigned_to/account_assigned.html",
+        context,
+        task=self,
+        deferred_to=deferred_to,
+    )
 
 
 @app.task
@@ -7,7 +7,6 @@ from drf_rw_serializers import generics
 
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -18,9 +17,9 @@ from accounts import swagger_params1
 from accounts.models import Account, Tags
 from accounts.serializer import (
     AccountCreateSerializer,
+    AccountListSerializer,
     AccountSerializer,
     EmailSerializer,
-    TagsSerailizer,
     AccountReadSerializer,
     AccountWriteSerializer,
     AccountDetailEditSwaggerSerializer,
@@ -30,7 +29,20 @@ from accounts.serializer import (
 from teams.serializer import TeamsSerializer
 from accounts.tasks import send_email, send_email_to_assigned_user
 from cases.serializer import CaseSerializer
+from common.lookups import (
+    get_org_contact_choices,
+    get_org_teams,
+    get_org_users,
+    get_tags,
+)
+from common.metadata import include_lookups
 from common.models import Attachments, Comment, Profile
+from common.pagination import (
+    CountedLimitOffsetPagination,
+    KeysetPagination,
+    use_cursor_pagination,
+)
+from common.prefetch import eager_load
 from leads.models import Lead
 from leads.serializer import LeadSerializer
 
@@ -39,6 +51,7 @@ from common.serializer import (
     AttachmentsSerializer,
     CommentSerializer,
     ProfileSerializer,
+    get_list_serialization,
 )
 from common.utils import (
     CASE_TYPE,
@@ -57,7 +70,7 @@ from tasks.serializer import TaskSerializer
 from teams.models import Teams
 
 
-class AccountsListView(APIView, LimitOffsetPagination):
+class AccountsListView(APIView, CountedLimitOffsetPagination):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Account
@@ -86,64 +99,72 @@ class AccountsListView(APIView, LimitOffsetPagination):
                     tags__in=params.get("tags")
                 ).distinct()
 
+        queryset, serializer_class = get_list_serialization(
+            self.request, queryset, AccountSerializer, AccountListSerializer
+        )
         context = {}
         queryset_open = queryset.filter(status="open")
-        results_accounts_open = self.paginate_queryset(
-            queryset_open.distinct(), self.request, view=self
-        )
-        if results_accounts_open:
-            offset = queryset_open.filter(id__gte=results_accounts_open[-1].id).count()
-            if offset == queryset_open.count():
-                offset = None
-        else:
-            offset = 0
-        accounts_open = AccountSerializer(results_accounts_open, many=True).data
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
-        context["active_accounts"] = {
-            "offset": offset,
-            "open_accounts": accounts_open,
-        }
-
         queryset_close = queryset.filter(status="close")
-        results_accounts_close = self.paginate_queryset(
-            queryset_close.distinct(), self.request, view=self
-        )
-        if results_accounts_close:
-            offset = queryset_close.filter(
-                id__gte=results_accounts_close[-1].id
-            ).count()
-            if offset == queryset_close.count():
-                offset = None
+        if use_cursor_pagination(self.request):
+            paginator = KeysetPagination("open_cursor")
+            results_accounts_open = paginator.paginate_queryset(
+                queryset_open.distinct(), self.request
+            )
+            context["active_accounts"] = {
+                "next_cursor": paginator.next_cursor,
+                "open_accounts": AccountSerializer(
+                    results_accounts_open, many=True
+                ).data,
+            }
+            paginator = KeysetPagination("close_cursor")
+            results_accounts_close = paginator.paginate_queryset(
+                queryset_close.distinct(), self.request
+            )
+            context["closed_accounts"] = {
+                "next_cursor": paginator.next_cursor,
+                "close_accounts": AccountSerializer(
+                    results_accounts_close, many=True
+                ).data,
+            }
         else:
-            offset = 0
-        accounts_close = AccountSerializer(results_accounts_close, many=True).data
+            results_accounts_open = self.paginate_queryset(
+                queryset_open.distinct(), self.request, view=self
+            )
+            offset = self.get_next_offset(results_accounts_open)
+            accounts_open = serializer_class(results_accounts_open, many=True).data
+            context["per_page"] = 10
+            page_number = (int(self.offset / 10) + 1,)
+            context["page_number"] = page_number
+            context["active_accounts"] = {
+                "offset": offset,
+                "open_accounts": accounts_open,
+            }
 
-        contacts = Contact.objects.filter(org=self.request.profile.org).values(
-            "id", "first_name"
-        )
-        context["contacts"] = contacts
-        context["closed_accounts"] = {
-            "offset": offset,
-            "close_accounts": accounts_close,
-        }
-        context["teams"] = TeamsSerializer(
-            Teams.objects.filter(org=self.request.profile.org), many=True
-        ).data
+            results_accounts_close = self.paginate_queryset(
+                queryset_close.distinct(), self.request, view=self
+            )
+            offset = self.get_next_offset(results_accounts_close)
+            accounts_close = serializer_class(results_accounts_close, many=True).data
+            context["closed_accounts"] = {
+                "offset": offset,
+                "close_accounts": accounts_close,
+            }
+
+        if not include_lookups(self.request):
+            return context
+        org_id = self.request.profile.org_id
+        context["contacts"] = get_org_contact_choices(org_id)
+        context["teams"] = get_org_teams(org_id)
         context["countries"] = COUNTRIES
         context["industries"] = INDCHOICES
-
-        tags = Tags.objects.all()
-        tags = TagsSerailizer(tags, many=True).data
-
-        context["tags"] = tags
-        users = Profile.objects.filter(is_active=True, org=self.request.profile.org).values(
-            "id", "user__email"
-        )
+        context["tags"] = get_tags()
+        users = get_org_users(org_id)
         context["users"] = users
-        leads = Lead.objects.filter(org=self.request.profile.org).exclude(
-            Q(status="converted") | Q(status="closed")
+        leads = eager_load(
+            Lead.objects.filter(org=self.request.profile.org).exclude(
+                Q(status="converted") | Q(status="closed")
+            ),
+            LeadSerializer,
         )
         context["users"] = users
         context["leads"] = LeadSerializer(leads, many=True).data
@@ -46,6 +46,11 @@ class Case(BaseModel):
         verbose_name_plural = "Cases"
         db_table = "case"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "-created_at", "-id"], name="case_org_created_id_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -2,7 +2,12 @@ from rest_framework import serializers
 
 from accounts.serializer import AccountSerializer
 from cases.models import Case
-from common.serializer import OrganizationSerializer, ProfileSerializer,UserSerializer
+from common.serializer import (
+    OrganizationSerializer,
+    ProfileSerializer,
+    ProjectedListSerializer,
+    UserSerializer,
+)
 from contacts.serializer import ContactSerializer
 from teams.serializer import TeamsSerializer
 
@@ -37,6 +42,27 @@ class CaseSerializer(serializers.ModelSerializer):
         )
 
 
+class CaseListSerializer(ProjectedListSerializer):
+    account_name = serializers.CharField(
+        source="account.name", read_only=True, default=None
+    )
+
+    class Meta:
+        model = Case
+        fields = (
+            "id",
+            "name",
+            "status",
+            "priority",
+            "case_type",
+            "account",
+            "account_name",
+            "closed_on",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
 class CaseCreateSerializer(serializers.ModelSerializer):
     closed_on = serializers.DateField
 
@@ -15,4 +15,16 @@ cases_list_get_params = [
     OpenApiParameter("status", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("priority", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("account", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "pagination", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["cursor"]
+    ),
+    OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=["exact", "cached", "approximate"],
+    ),
+    OpenApiParameter("lookups", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+    OpenApiParameter("fields", OpenApiTypes.STR, OpenApiParameter.QUERY),
 ]
@@ -3,7 +3,6 @@ import json
 from django.db.models import Q
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -13,19 +12,29 @@ from accounts.models import Account
 from accounts.serializer import AccountSerializer
 from cases import swagger_params1
 from cases.models import Case
-from cases.serializer import CaseCreateSerializer, CaseSerializer,CaseCreateSwaggerSerializer,CaseDetailEditSwaggerSerializer,CaseCommentEditSwaggerSerializer
+from cases.serializer import CaseCreateSerializer, CaseListSerializer, CaseSerializer,CaseCreateSwaggerSerializer,CaseDetailEditSwaggerSerializer,CaseCommentEditSwaggerSerializer
 from cases.tasks import send_email_to_assigned_user
+from common.metadata import include_lookups
 from common.models import Attachments, Comment, Profile
+from common.pagination import (
+    CountedLimitOffsetPagination,
+    KeysetPagination,
+    use_cursor_pagination,
+)
 
 #from common.external_auth import CustomDualAuthentication
-from common.serializer import AttachmentsSerializer, CommentSerializer
+from common.serializer import (
+    AttachmentsSerializer,
+    CommentSerializer,
+    get_list_serialization,
+)
 from common.utils import CASE_TYPE, PRIORITY_CHOICE, STATUS_CHOICE
 from contacts.models import Contact
 from contacts.serializer import ContactSerializer
 from teams.models import Teams
 
 
-class CaseListView(APIView, LimitOffsetPagination):
+class CaseListView(APIView, CountedLimitOffsetPagination):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Case
@@ -61,24 +70,29 @@ class CaseListView(APIView, LimitOffsetPagination):
             if params.get("account"):
                 queryset = queryset.filter(account=params.get("account"))
 
+        queryset, serializer_class = get_list_serialization(
+            self.request, queryset, CaseSerializer, CaseListSerializer
+        )
         context = {}
 
-        results_cases = self.paginate_queryset(queryset, self.request, view=self)
-        cases = CaseSerializer(results_cases, many=True).data
-
-        if results_cases:
-            offset = queryset.filter(id__gte=results_cases[-1].id).count()
-            if offset == queryset.count():
-                offset = None
+        if use_cursor_pagination(self.request):
+            paginator = KeysetPagination()
+            results_cases = paginator.paginate_queryset(queryset, self.request)
+            context["next_cursor"] = paginator.next_cursor
         else:
-            offset = 0
-        context.update(
-            {
-                "cases_count": self.count,
-                "offset": offset,
-            }
-        )
+            results_cases = self.paginate_queryset(queryset, self.request, view=self)
+            offset = self.get_next_offset(results_cases)
+            context.update(
+                {
+                    "cases_count": self.count,
+                    "count_mode": self.count_mode,
+                    "offset": offset,
+                }
+            )
+        cases = serializer_class(results_cases, many=True).data
         context["cases"] = cases
+        if not include_lookups(self.request):
+            return context
         context["status"] = STATUS_CHOICE
         context["priority"] = PRIORITY_CHOICE
         context["type_of_case"] = CASE_TYPE
@@ -0,0 +1,162 @@
+import datetime
+from datetime import timedelta
+
+from django.db.models import Q
+
+from common.dashboard import sees_all_rows
+
+# /api/calendar/ returns everything on the calendar of a profile between two
+# dates (events, tasks, planner items) as one flat list, for a month view to
+# be drawn from a single request. Every query filters on an indexed date
+# range; the occurrences of recurring events not written yet are expanded in
+# memory (see events.recurrence).
+CALENDAR_MAX_DAYS = 100
+
+
+class CalendarRangeError(ValueError):
+    pass
+
+
+def parse_calendar_range(params):
+    """The [from, to) dates of the query params, as dates"""
+    try:
+        start = datetime.date.fromisoformat(params.get("from", ""))
+        end = datetime.date.fromisoformat(params.get("to", ""))
+    except ValueError:
+        raise CalendarRangeError("from and to must be dates (YYYY-MM-DD)")
+    if end <= start:
+        raise CalendarRangeError("to must be after from")
+    if (end - start).days > CALENDAR_MAX_DAYS:
+        raise CalendarRangeError(f"The range cannot exceed {CALENDAR_MAX_DAYS} days")
+    return start, end
+
+
+def _visible(queryset, owned, sees_all):
+    if sees_all:
+        return queryset
+    # a subquery rather than a join, so that a row is listed once
+    return queryset.filter(pk__in=queryset.filter(owned).values("pk"))
+
+
+def _item(kind, row, start, end, title, **extra):
+    return {
+        "type": kind,
+        "id": row["id"],
+        "title": title,
+        "start": start,
+        "end": end,
+        "start_time": row.get("start_time"),
+        "end_time": row.get("end_time"),
+        "status": row.get("status"),
+        **extra,
+    }
+
+
+def get_event_items(profile, start, end, sees_all=True):
+    from events.models import Event, EventSeries
+    from events.recurrence import get_occurrences
+
+    owned = Q(assigned_to=profile) | Q(created_by=profile)
+    events = _visible(
+        Event.objects.filter(
+            org_id=profile.org_id, start_date__lt=end, end_date__gte=start
+        ),
+        owned,
+        sees_all,
+    )
+    fields = ("id", "name", "start_date", "end_date", "start_time", "end_time")
+    items = [
+        _item(
+            "event",
+            row,
+            row["start_date"],
+            row["end_date"],
+            row["name"],
+            series=row["series_id"],
+        )
+        for row in events.order_by().values(*fields, "status", "series_id")
+    ]
+    # the occurrences past the ones written
+    series = _visible(
+        EventSeries.objects.filter(
+            org_id=profile.org_id, start_date__lt=end, end_date__gte=start
+        ).filter(
+            Q(materialized_until__isnull=True)
+            | Q(materialized_until__lt=end - timedelta(days=1))
+        ),
+        owned,
+        sees_all,
+    )
+    for row in series.order_by():
+        first = start
+        if row.materialized_until:
+            first = max(start, row.materialized_until + timedelta(days=1))
+        for occurrence in get_occurrences(row, first, end - timedelta(days=1)):
+            items.append(
+                {
+                    "type": "event",
+                    "id": None,
+                    "title": occurrence.name,
+                    "start": occurrence.start_date,
+                    "end": occurrence.end_date,
+                    "start_time": occurrence.start_time,
+                    "end_time": occurrence.end_time,
+                    "status": None,
+                    "series": row.id,
+                }
+            )
+    return items
+
+
+def get_task_items(profile, user, start, end, sees_all=True):
+    from tasks.models import Task
+
+    tasks = _visible(
+        Task.objects.filter(
+            org_id=profile.org_id, due_date__gte=start, due_date__lt=end
+        ),
+        Q(assigned_to=profile) | Q(created_by=user),
+        sees_all,
+    )
+    return [
+        _item("task", row, row["due_date"], row["due_date"], row["title"])
+        for row in tasks.order_by().values("id", "title", "due_date", "status")
+    ]
+
+
+def get_planner_items(user, start, end):
+    """Planner items are not per org: those of the user"""
+    from planner.models import PlannerEvent
+
+    planner = PlannerEvent.objects.filter(start_date__lt=end).filter(
+        Q(close_date__gte=start) | Q(close_date__isnull=True, start_date__gte=start)
+    )
+    planner = _visible(
+        planner,
+        Q(created_by=user) | Q(assigned_to=user) | Q(attendees_user=user),
+        sees_all=False,
+    )
+    fields = ("id", "name", "start_date", "close_date", "status", "event_type")
+    return [
+        _item(
+            "planner",
+            row,
+            row["start_date"],
+            row["close_date"] or row["start_date"],
+            row["name"],
+            event_type=row["event_type"],
+        )
+        for row in planner.order_by().values(*fields)
+    ]
+
+
+def get_calendar(profile, user, start, end):
+    """Items of a profile overlapping [start, end), by start date and time"""
+    sees_all = sees_all_rows(profile, user)
+    items = (
+        get_event_items(profile, start, end, sees_all)
+        + get_task_items(profile, user, start, end, sees_all)
+        + get_planner_items(user, start, end)
+    )
+    items.sort(key=lambda item: (item["start"], item["start_time"] or datetime.time()))
+    return items
@@ -0,0 +1,89 @@
+import copy
+import hashlib
+
+from common.caching import LRUCache
+
+# Resolved keys are kept per process for a short time; saving or deleting the
+# owning Org/APISettings revokes them locally (see common.signals) and the TTL
+# bounds how long another worker can keep serving a revoked key.
+API_KEY_CACHE_SIZE = 1024
+API_KEY_CACHE_TIMEOUT = 60
+
+
+def hash_api_key(api_key):
+    """Fixed-length (64 hex chars) digest used to index and look up keys"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+org_api_keys = LRUCache(maxsize=API_KEY_CACHE_SIZE, timeout=API_KEY_CACHE_TIMEOUT)
+site_api_keys = LRUCache(maxsize=API_KEY_CACHE_SIZE, timeout=API_KEY_CACHE_TIMEOUT)
+
+
+def resolve_org_api_key(api_key):
+    """
+    Return (org, admin profile, user) for an org API key ("Token" header),
+    or None if the key is unknown or the org has no active admin.
+    """
+    from common.models import Org, Profile
+
+    key_hash = hash_api_key(api_key)
+    resolved = org_api_keys.get(key_hash)
+    if resolved is None:
+        org = Org.objects.filter(api_key_hash=key_hash).first()
+        if org is None:
+            return None
+        profile = (
+            Profile.objects.select_related("user", "role", "org")
+            .filter(org=org, role__name="ADMIN", is_active=True)
+            .order_by("created_at")
+            .first()
+        )
+        if profile is None:
+            return None
+        resolved = (org, profile, profile.user)
+        org_api_keys.set(key_hash, resolved)
+    # every request gets its own instances (and its own permission memo)
+    return copy.deepcopy(resolved)
+
+
+def revoke_org_profile(profile):
+    """
+    Drop the cached resolution of the profile's org key if saving or
+    deleting the profile can change it: when it is the resolved admin
+    profile, or an active admin that would now be picked before it.
+    """
+    from common.models import Org
+
+    key_hash = (
+        Org.objects.filter(pk=profile.org_id)
+        .values_list("api_key_hash", flat=True)
+        .first()
+    )
+    resolved = org_api_keys.get(key_hash) if key_hash else None
+    if resolved is None:
+        return
+    admin = resolved[1]
+    if profile.pk == admin.pk or (
+        profile.is_active
+        and profile.role_id == admin.role_id
+        and profile.created_at <= admin.created_at
+    ):
+        org_api_keys.revoke(key_hash)
+
+
+def resolve_site_api_key(api_key):
+    """Return the APISettings of a public-site key, or None if unknown"""
+    from common.models import APISettings
+
+    key_hash = hash_api_key(api_key)
+    api_setting = site_api_keys.get(key_hash)
+    if api_setting is None:
+        api_setting = (
+            APISettings.objects.select_related("created_by", "org")
+            .filter(apikey_hash=key_hash)
+            .first()
+        )
+        if api_setting is None:
+            return None
+        site_api_keys.set(key_hash, api_setting)
+    return copy.deepcopy(api_setting)
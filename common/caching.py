@@ -0,0 +1,245 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from rest_framework.response import Response
+
+
+class LRUCache:
+    """Thread-safe, bounded in-process LRU with a per-entry TTL"""
+
+    def __init__(self, maxsize=1024, timeout=60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def revoke(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _seed_version():
+    # seeded from the clock so that a cache restart never hands out a
+    # version whose entries may still be lying around
+    return int(time.time() * 1000)
+
+
+def versioned_timeout(timeout, local_timeout, cache=None):
+    """
+    Timeout of an entry whose key carries a version counter (see below).
+
+    An in-process cache (LocMemCache) never hears of the version bumps of
+    the other workers, so its entries are kept ``local_timeout`` seconds at
+    most: that bounds how stale another process can be.
+    """
+    cache = cache or caches["default"]
+    if isinstance(cache, LocMemCache):
+        return min(timeout, local_timeout)
+    return timeout
+
+
+def get_cache_version(key, cache=None):
+    """Current value of a version counter kept in the cache"""
+    cache = cache or caches["default"]
+    counter = cache.get(key)
+    if counter is None:
+        cache.add(key, _seed_version(), None)
+        counter = cache.get(key)
+    return counter
+
+
+def bump_cache_version(key, cache=None):
+    """Move a version counter on, orphaning the keys built from it"""
+    cache = cache or caches["default"]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _seed_version(), None)
+
+
+class TieredCache:
+    """
+    Per-org cache with two tiers: a bounded in-process LRU in front of a
+    Django cache shared by the workers.
+
+    Keys are namespaced by org and carry the org's version (and a global
+    generation), read from the shared cache in one round trip on every
+    access; invalidating an org bumps its version. With a cache shared by
+    the workers (Redis, see CACHE_URL) that orphans the org's entries in
+    both tiers of every process at once. With an in-process cache
+    (LocMemCache) both tiers keep entries for ``local_timeout`` seconds only
+    (see versioned_timeout). Cached values are shared between requests and
+    must be treated as read-only.
+    """
+
+    GENERATION_KEY = "{namespace}:generation"
+    VERSION_KEY = "{namespace}:version:{org_id}"
+    ENTRY_KEY = "{namespace}:{generation}:{org_id}:{version}:{key}"
+
+    def __init__(
+        self, namespace, maxsize=1024, local_timeout=30, timeout=300, alias="default"
+    ):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.alias = alias
+        self.local = LRUCache(maxsize=maxsize, timeout=local_timeout)
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    @property
+    def shared_timeout(self):
+        return versioned_timeout(self.timeout, self.local.timeout, self.shared)
+
+    def _versions(self, org_id):
+        generation_key = self.GENERATION_KEY.format(namespace=self.namespace)
+        version_key = self.VERSION_KEY.format(namespace=self.namespace, org_id=org_id)
+        versions = self.shared.get_many([generation_key, version_key])
+        for key in (generation_key, version_key):
+            if key not in versions:
+                versions[key] = get_cache_version(key, self.shared)
+        return versions[generation_key], versions[version_key]
+
+    def make_key(self, key, org_id=None):
+        generation, version = self._versions(org_id)
+        return self.ENTRY_KEY.format(
+            namespace=self.namespace,
+            generation=generation,
+            org_id=org_id,
+            version=version,
+            key=key,
+        )
+
+    def get(self, key, org_id=None):
+        full_key = self.make_key(key, org_id)
+        value = self.local.get(full_key)
+        if value is None:
+            value = self.shared.get(full_key)
+            if value is not None:
+                self.local.set(full_key, value)
+        return value
+
+    def set(self, key, value, org_id=None):
+        full_key = self.make_key(key, org_id)
+        self.shared.set(full_key, value, self.shared_timeout)
+        self.local.set(full_key, value)
+
+    def get_or_set(self, key, loader, org_id=None):
+        """Return the cached value, calling ``loader()`` on a miss"""
+        full_key = self.make_key(key, org_id)
+        value = self.local.get(full_key)
+        if value is not None:
+            return value
+        value = self.shared.get(full_key)
+        if value is None:
+            value = loader()
+            self.shared.set(full_key, value, self.shared_timeout)
+        self.local.set(full_key, value)
+        return value
+
+    def invalidate(self, org_id=None):
+        """Drop the entries of an org, or of every org when org_id is None"""
+        if org_id is None:
+            key = self.GENERATION_KEY.format(namespace=self.namespace)
+        else:
+            key = self.VERSION_KEY.format(namespace=self.namespace, org_id=org_id)
+        bump_cache_version(key, self.shared)
+
+    def memoize(self, name=None):
+        """
+        Cache the result of ``func(org_id, *args)`` per org and arguments
+        (org None holds the entries shared by every org).
+
+        The arguments must have a stable ``str()``. The undecorated function
+        stays available as ``func.uncached``.
+        """
+
+        def decorator(func):
+            prefix = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(org_id=None, *args):
+                key = ":".join([prefix, *map(str, args)])
+                return self.get_or_set(key, lambda: func(org_id, *args), org_id)
+
+            wrapper.uncached = func
+            return wrapper
+
+        return decorator
+
+    def cache_response(self, per_profile=True):
+        """
+        Cache the data of successful responses of an APIView method per org
+        and full path (and per profile, unless the data is the same for the
+        whole org).
+        """
+
+        def decorator(method):
+            @functools.wraps(method)
+            def wrapper(view, request, *args, **kwargs):
+                profile = request.profile
+                key = "view:%s:%s:%s" % (
+                    type(view).__qualname__,
+                    profile.id if per_profile else "org",
+                    request.get_full_path(),
+                )
+                data = self.get(key, profile.org_id)
+                if data is not None:
+                    return Response(data)
+                response = method(view, request, *args, **kwargs)
+                if response.status_code == 200:
+                    self.set(key, response.data, profile.org_id)
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def invalidate_on(self, *senders, per_org=True):
+        """
+        Invalidate when rows of the sender models (or m2m through models)
+        change: the org of the instance when ``per_org``, every org
+        otherwise.
+        """
+
+        def receiver(sender, instance, **kwargs):
+            if kwargs.get("action", "post_").startswith("pre_"):
+                return
+            if not per_org:
+                self.invalidate()
+            elif getattr(instance, "org_id", None) is not None:
+                self.invalidate(instance.org_id)
+
+        for sender in senders:
+            for signal in (post_save, post_delete, m2m_changed):
+                signal.connect(receiver, sender=sender, weak=False)
+        return receiver
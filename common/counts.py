@@ -0,0 +1,88 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+# ?count=exact|cached|approximate picks how list views count their rows;
+# COUNT_MODE (exact unless a deployment opts in to another mode) is the
+# default when the parameter is missing or unknown.
+COUNT_QUERY_PARAM = "count"
+EXACT = "exact"
+CACHED = "cached"
+APPROXIMATE = "approximate"
+COUNT_MODES = (EXACT, CACHED, APPROXIMATE)
+
+COUNT_CACHE_KEY = "count:{org_id}:{model}:{filter_hash}"
+
+
+def get_count_mode(request):
+    mode = request.query_params.get(COUNT_QUERY_PARAM)
+    if mode not in COUNT_MODES:
+        mode = getattr(settings, "COUNT_MODE", EXACT)
+    return mode
+
+
+def get_filter_hash(queryset):
+    """Stable digest of the SQL (and its parameters) selecting the rows"""
+    sql, params = queryset.query.sql_with_params()
+    position = json.dumps([sql, [str(param) for param in params]])
+    return hashlib.sha1(position.encode("utf-8")).hexdigest()
+
+
+def estimate_count(queryset):
+    """
+    Row count estimated by the PostgreSQL planner, without scanning the rows.
+    Returns None on other databases.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def get_cached_count(queryset, org_id):
+    """Return (count, hit) with count cached per (org, model, filters)"""
+    key = COUNT_CACHE_KEY.format(
+        org_id=org_id,
+        model=queryset.model._meta.label_lower,
+        filter_hash=get_filter_hash(queryset),
+    )
+    count = cache.get(key)
+    if count is not None:
+        return count, True
+    count = queryset.count()
+    cache.set(key, count, getattr(settings, "COUNT_CACHE_TIMEOUT", 60))
+    return count, False
+
+
+def count_queryset(queryset, org_id=None, mode=EXACT):
+    """
+    Count the rows of a queryset and return (count, mode used).
+
+    - exact: a COUNT(*) on every call.
+    - cached: the count is kept for COUNT_CACHE_TIMEOUT seconds per
+      (org, model, filters), so it may lag behind recent writes.
+    - approximate: the planner estimate is used once it reaches
+      APPROXIMATE_COUNT_THRESHOLD rows; smaller (or non-PostgreSQL) results
+      are served like "cached".
+
+    The returned mode is "exact" whenever the rows were counted by this call.
+    """
+    if mode == APPROXIMATE:
+        estimate = estimate_count(queryset)
+        threshold = getattr(settings, "APPROXIMATE_COUNT_THRESHOLD", 100000)
+        if estimate is not None and estimate >= threshold:
+            return estimate, APPROXIMATE
+        mode = CACHED
+    if mode == CACHED:
+        count, hit = get_cached_count(queryset, org_id)
+        return count, CACHED if hit else EXACT
+    return queryset.count(), EXACT
@@ -0,0 +1,132 @@
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from common.caching import bump_cache_version, get_cache_version
+
+# /api/dashboard/ returns the counts, the N most recent rows and a few
+# aggregates per entity instead of every row of the org.
+RECENT_QUERY_PARAM = "recent"
+DEFAULT_RECENT = 5
+MAX_RECENT = 50
+# the cached dashboard is served unless the client asks for ?refresh=true
+REFRESH_QUERY_PARAM = "refresh"
+
+DASHBOARD_VERSION_KEY = "dashboard:version:{org_id}"
+DASHBOARD_CACHE_KEY = "dashboard:{org_id}:{version}:{scope}:{recent}"
+DASHBOARD_CACHE_TIMEOUT = 60 * 5
+
+
+def get_recent_limit(request):
+    try:
+        recent = int(request.query_params.get(RECENT_QUERY_PARAM, DEFAULT_RECENT))
+    except (TypeError, ValueError):
+        return DEFAULT_RECENT
+    return max(0, min(recent, MAX_RECENT))
+
+
+def wants_refresh(request):
+    value = request.query_params.get(REFRESH_QUERY_PARAM, "false")
+    return value.lower() in ("true", "1", "yes")
+
+
+def invalidate_org_dashboard(org_id):
+    """Drop the cached dashboards of an org (all profiles)"""
+    if org_id is not None:
+        bump_cache_version(DASHBOARD_VERSION_KEY.format(org_id=org_id))
+
+
+def sees_all_rows(profile, user):
+    return profile.role.name == "ADMIN" or user.is_superuser
+
+
+def get_dashboard_querysets(profile, sees_all=True):
+    """Open accounts, contacts, open leads and opportunities a profile sees"""
+    from accounts.models import Account
+    from contacts.models import Contact
+    from leads.models import Lead
+    from opportunity.models import Opportunity
+
+    querysets = {
+        "accounts": Account.objects.filter(status="open", org=profile.org),
+        "contacts": Contact.objects.filter(org=profile.org),
+        "leads": Lead.objects.filter(org=profile.org).exclude(
+            Q(status="converted") | Q(status="closed")
+        ),
+        "opportunities": Opportunity.objects.filter(org=profile.org),
+    }
+    if not sees_all:
+        owned = Q(assigned_to=profile) | Q(created_by=profile.user)
+        # a subquery rather than a join, so that the aggregates do not
+        # count a row once per matching assignee
+        querysets = {
+            name: queryset.filter(pk__in=queryset.filter(owned).values("pk"))
+            for name, queryset in querysets.items()
+        }
+    return querysets
+
+
+def _grouped(queryset, field, **aggregates):
+    return [
+        dict(row)
+        for row in queryset.order_by()
+        .values(field)
+        .annotate(count=Count("id"), **aggregates)
+        .order_by(field)
+    ]
+
+
+def build_dashboard(profile, sees_all=True, recent=DEFAULT_RECENT):
+    from accounts.serializer import AccountListSerializer
+    from contacts.serializer import ContactListSerializer
+    from leads.serializer import LeadListSerializer
+    from opportunity.serializer import OpportunityListSerializer
+
+    querysets = get_dashboard_querysets(profile, sees_all)
+    list_serializers = {
+        "accounts": AccountListSerializer,
+        "contacts": ContactListSerializer,
+        "leads": LeadListSerializer,
+        "opportunities": OpportunityListSerializer,
+    }
+
+    pipeline = _grouped(querysets["opportunities"], "stage", amount=Sum("amount"))
+    leads_by_status = _grouped(querysets["leads"], "status")
+    leads_by_source = _grouped(querysets["leads"], "source")
+    dashboard = {
+        "accounts_count": querysets["accounts"].count(),
+        "contacts_count": querysets["contacts"].count(),
+        "leads_count": sum(row["count"] for row in leads_by_status),
+        "opportunities_count": sum(row["count"] for row in pipeline),
+        "pipeline_by_stage": pipeline,
+        "pipeline_amount": sum(row["amount"] or 0 for row in pipeline),
+        "leads_by_status": leads_by_status,
+        "leads_by_source": leads_by_source,
+    }
+    for name, serializer_class in list_serializers.items():
+        queryset = serializer_class.project(querysets[name])
+        queryset = queryset.order_by("-created_at", "-id")[:recent]
+        dashboard[name] = serializer_class(queryset, many=True).data
+    return dashboard
+
+
+def get_dashboard(profile, user, recent=DEFAULT_RECENT, refresh=False):
+    """
+    Return (dashboard, cached) for a profile.
+
+    The dashboard is cached per org and visibility scope until a row it
+    counts changes (see common.signals); ``refresh`` rebuilds it.
+    """
+    sees_all = sees_all_rows(profile, user)
+    key = DASHBOARD_CACHE_KEY.format(
+        org_id=profile.org_id,
+        version=get_cache_version(DASHBOARD_VERSION_KEY.format(org_id=profile.org_id)),
+        scope="org" if sees_all else profile.id,
+        recent=recent,
+    )
+    if not refresh:
+        dashboard = cache.get(key)
+        if dashboard is not None:
+            return dashboard, True
+    dashboard = build_dashboard(profile, sees_all, recent)
+    cache.set(key, dashboard, DASHBOARD_CACHE_TIMEOUT)
+    return dashboard, False
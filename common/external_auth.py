@@ -1,10 +1,20 @@
 import jwt
+from django.core.cache import cache
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.request import Request
-from common.models import Org,Profile,User
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from common.api_keys import resolve_org_api_key
+from common.models import Profile,User
 from django.conf import settings
 
+# Resolved (user, profile, role, org) rows are cached for a short time and
+# dropped by common.signals whenever the Profile or User is saved/deleted.
+AUTH_CACHE_TIMEOUT = 60
+PROFILE_CACHE_KEY = "auth:profile:{user_id}:{org_id}"
+USER_CACHE_KEY = "auth:user:{user_id}"
+
+
 def verify_jwt_token(token):
     secret_key = (settings.SECRET_KEY) # Replace with your secret key used for token encoding/decoding
     try:
@@ -15,39 +25,107 @@ def verify_jwt_token(token):
     except jwt.InvalidTokenError:
         return False, "Invalid token"
 
+
+def get_jwt_payload(request):
+    """
+    Decode the JWT of the "Authorization" header once per request.
+
+    The payload is kept on the Django request so that the middleware and the
+    DRF authentication class share a single decode. Returns None when the
+    header is missing; invalid tokens raise jwt.InvalidTokenError.
+    """
+    if hasattr(request, "jwt_payload"):
+        return request.jwt_payload
+    request.jwt_payload = None
+    header = request.headers.get("Authorization")
+    if header:
+        if header.lower().startswith("bearer "):
+            token = header.split(" ")[1]
+        else:
+            token = header
+        request.jwt_payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGO]
+        )
+    return request.jwt_payload
+
+
+def get_cached_profile(user_id, org_id):
+    """
+    Return the active profile of a user in an org with its user, role and org
+    resolved by one joined query, or None if there is no such profile.
+    """
+    key = PROFILE_CACHE_KEY.format(user_id=user_id, org_id=org_id)
+    profile = cache.get(key)
+    if profile is None:
+        profile = (
+            Profile.objects.select_related("user", "role", "org")
+            .filter(user_id=user_id, org=org_id, is_active=True)
+            .first()
+        )
+        if profile is not None:
+            cache.set(key, profile, AUTH_CACHE_TIMEOUT)
+    return profile
+
+
+def get_cached_user(user_id):
+    key = USER_CACHE_KEY.format(user_id=user_id)
+    user = cache.get(key)
+    if user is None:
+        user = User.objects.filter(id=user_id).first()
+        if user is not None:
+            cache.set(key, user, AUTH_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_auth_cache(user_id, org_ids=()):
+    keys = [USER_CACHE_KEY.format(user_id=user_id)]
+    keys += [
+        PROFILE_CACHE_KEY.format(user_id=user_id, org_id=org_id) for org_id in org_ids
+    ]
+    cache.delete_many(keys)
+
+
 class CustomDualAuthentication(BaseAuthentication):
 
+    def authenticate_header(self, request):
+        # keep answering 401 (not 403) to unauthenticated requests
+        return 'Bearer realm="api"'
+
     def authenticate(self, request):
-        jwt_user = None
-        profile = None
-
-        # Check JWT authentication
-        jwt_token = request.headers.get('Authorization', '').split(' ')[1] if 'Authorization' in request.headers else None
-        if jwt_token:
-            is_valid, jwt_payload = verify_jwt_token(jwt_token)
-            if is_valid:
-                jwt_user = (User.objects.get(id=jwt_payload['user_id']), True)
-                if jwt_payload['user_id'] is not None:
-                    if request.headers.get("org"):
-                        profile = Profile.objects.get(
-                            user_id=jwt_payload['user_id'], org=request.headers.get("org"), is_active=True
-                        )
-                        if profile:
-                            request.profile = profile
+        # Reuse the token decoded and the profile resolved by GetProfileAndOrg
+        http_request = request._request
+        try:
+            jwt_payload = get_jwt_payload(http_request)
+        except jwt.InvalidTokenError:
+            # leave the error reporting to JWTAuthentication
+            jwt_payload = None
+
+        if (
+            jwt_payload
+            and jwt_payload.get(jwt_settings.TOKEN_TYPE_CLAIM) == "access"
+            and jwt_payload.get("user_id") is not None
+        ):
+            profile = getattr(http_request, "profile", None)
+            if profile is not None and str(profile.user_id) == str(
+                jwt_payload["user_id"]
+            ):
+                user = profile.user
+            else:
+                user = get_cached_user(jwt_payload["user_id"])
+            if user is not None and user.is_active:
+                return (user, True)
 
         # Check API key authentication
         api_key = request.headers.get('Token')  # Get API key from request query params
         if api_key:
-            try:
-                organization = Org.objects.get(api_key=api_key)
-                api_key_user = organization
-                request.META['org'] = api_key_user.id
-                profile = Profile.objects.filter(org=api_key_user, role="ADMIN").first()
-                request.profile = profile
-                profile = (profile.user, True)
-            except Org.DoesNotExist:
+            resolved = resolve_org_api_key(api_key)
+            if resolved is None:
                 raise AuthenticationFailed('Invalid API Key')
+            organization, profile, user = resolved
+            request.META['org'] = organization.id
+            if getattr(http_request, "profile", None) is None:
+                http_request.profile = profile
+            return (user, True)
 
-        # Select the appropriate user based on authentication method
-        # Return the user if any authentication method succeeded
-        return jwt_user or profile
+        # Fall through to the next authentication class
+        return None
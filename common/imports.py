@@ -0,0 +1,63 @@
+from itertools import islice
+
+from common.staging import get_staging_cache
+
+# Results of the background csv imports (leads, contacts), polled by the
+# clients through the import status endpoints of each app. They are written
+# by the workers, so they are kept in the shared staging cache.
+IMPORT_RESULT_KEY = "import:{job_id}"
+IMPORT_RESULT_TIMEOUT = 60 * 60 * 24
+# skipped/failed rows listed in a result; the counts cover every row
+MAX_REPORTED_ROWS = 1000
+
+PENDING = "pending"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def new_import_result(job_id, org_id=None, status=PENDING):
+    return {
+        "job_id": job_id,
+        "org_id": str(org_id) if org_id else None,
+        "status": status,
+        "total": 0,
+        "created": 0,
+        "skipped": 0,
+        "failed": 0,
+        "skipped_rows": [],
+        "failed_rows": [],
+    }
+
+
+def get_import_result(job_id, org_id=None):
+    """The result of a job, or None if unknown (or run for another org)"""
+    result = get_staging_cache().get(IMPORT_RESULT_KEY.format(job_id=job_id))
+    if result is None or (org_id is not None and result["org_id"] != str(org_id)):
+        return None
+    return result
+
+
+def save_import_result(result):
+    if result["job_id"] is None:
+        return
+    get_staging_cache().set(
+        IMPORT_RESULT_KEY.format(job_id=result["job_id"]), result, IMPORT_RESULT_TIMEOUT
+    )
+
+
+def report_row(result, outcome, reason, **row):
+    """Count a skipped/failed row and list it (with ``row``) up to a limit"""
+    result[outcome] += 1
+    rows = result[f"{outcome}_rows"]
+    if len(rows) < MAX_REPORTED_ROWS:
+        rows.append({**row, "reason": reason})
@@ -0,0 +1,51 @@
+from common.caching import TieredCache
+from common.prefetch import eager_load
+
+# The choices every list view sends along with its rows (users, teams, tags,
+# companies, contacts of the org). They are read far more often than they
+# change, so they are kept in memory and dropped per org by common.signals.
+lookups = TieredCache("lookups")
+
+
+@lookups.memoize("users")
+def get_org_users(org_id):
+    from common.models import Profile
+
+    return list(
+        Profile.objects.filter(is_active=True, org_id=org_id).values(
+            "id", "user__email"
+        )
+    )
+
+
+@lookups.memoize("teams")
+def get_org_teams(org_id):
+    from teams.models import Teams
+    from teams.serializer import TeamsSerializer
+
+    teams = eager_load(Teams.objects.filter(org_id=org_id), TeamsSerializer)
+    return TeamsSerializer(teams, many=True).data
+
+
+@lookups.memoize("tags")
+def get_tags(org_id=None):
+    """Tags are shared by every org, so they are cached under org None"""
+    from accounts.models import Tags
+    from leads.serializer import TagsSerializer
+
+    return TagsSerializer(Tags.objects.all(), many=True).data
+
+
+@lookups.memoize("companies")
+def get_org_companies(org_id):
+    from leads.models import Company
+    from leads.serializer import CompanySerializer
+
+    return CompanySerializer(Company.objects.filter(org_id=org_id), many=True).data
+
+
+@lookups.memoize("contacts")
+def get_org_contact_choices(org_id):
+    from contacts.models import Contact
+
+    return list(Contact.objects.filter(org_id=org_id).values("id", "first_name"))
@@ -0,0 +1,45 @@
+import re
+
+from common.models import Profile
+
+# "@handle" at the start of a word; handles are usernames, whose characters
+# are letters, digits and @/./+/-/_ (a trailing comma ends the handle).
+MENTION_RE = re.compile(r"(?<!\S)@+([\w.@+-]+)")
+
+
+def extract_handles(text):
+    """The distinct handles mentioned in a text, in order"""
+    return list(dict.fromkeys(MENTION_RE.findall(text or "")))
+
+
+def resolve_mentions(handles, org_id):
+    """Active profiles of the org whose username is one of the handles"""
+    if not handles or org_id is None:
+        return []
+    return list(
+        Profile.objects.filter(
+            org_id=org_id,
+            is_active=True,
+            user__is_active=True,
+            user__username__in=handles,
+        )
+        .select_related("user")
+        .order_by()
+    )
+
+
+def get_comment_org_id(comment):
+    # comments are scoped to the org of their author
+    return comment.commented_by.org_id if comment.commented_by_id else None
+
+
+def index_mentions(comment, created=False):
+    """Resolve the mentions of a comment and store them on it"""
+    handles = extract_handles(comment.comment)
+    if not handles:
+        if not created:
+            comment.mentions.clear()
+        return []
+    profiles = resolve_mentions(handles, get_comment_org_id(comment))
+    comment.mentions.set(profiles)
+    return profiles
@@ -0,0 +1,129 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from common.caching import bump_cache_version, get_cache_version
+
+# Lookup tables (choices, tags, companies, users, ...) used to be rendered
+# by every list view. They are served once by /api/meta/ with an ETag and
+# list views leave them out when called with ?lookups=false.
+LOOKUPS_QUERY_PARAM = "lookups"
+
+METADATA_GENERATION_KEY = "meta:generation"
+METADATA_VERSION_KEY = "meta:version:{org_id}"
+METADATA_CACHE_KEY = "meta:{generation}:{org_id}:{version}:{scope}"
+METADATA_CACHE_TIMEOUT = 60 * 5
+
+
+def include_lookups(request):
+    value = request.query_params.get(LOOKUPS_QUERY_PARAM, "true")
+    return value.lower() not in ("false", "0", "no")
+
+
+def invalidate_org_metadata(org_id):
+    """Drop the cached metadata of an org (all visibility scopes)"""
+    if org_id is not None:
+        bump_cache_version(METADATA_VERSION_KEY.format(org_id=org_id))
+
+
+def invalidate_all_metadata():
+    """Drop the cached metadata of every org (for org-less rows such as Tags)"""
+    bump_cache_version(METADATA_GENERATION_KEY)
+
+
+def _visibility(profile):
+    """Which accounts/contacts the profile may see: every row, or its own"""
+    sees_all_accounts = profile.role.has_permission("View all accounts")
+    sees_all_contacts = profile.role.has_permission("View all contacts")
+    return sees_all_accounts, sees_all_contacts
+
+
+def build_metadata(profile, sees_all_accounts=True, sees_all_contacts=True):
+    from accounts.models import Account, Tags
+    from common.models import Profile
+    from common.utils import (
+        CASE_TYPE,
+        COUNTRIES,
+        CURRENCY_CODES,
+        INDCHOICES,
+        LEAD_SOURCE,
+        LEAD_STATUS,
+        PRIORITY_CHOICE,
+        SOURCES,
+        STAGES,
+        STATUS_CHOICE,
+    )
+    from contacts.models import Contact
+    from events.utils import WEEKDAYS
+    from leads.models import Company, Lead
+    from tasks.utils import PRIORITY_CHOICES, STATUS_CHOICES
+    from teams.models import Teams
+
+    org = profile.org
+    owned = Q(created_by=profile.user) | Q(assigned_to=profile)
+    accounts = Account.objects.filter(org=org)
+    if not sees_all_accounts:
+        accounts = accounts.filter(owned).distinct()
+    contacts = Contact.objects.filter(org=org)
+    if not sees_all_contacts:
+        contacts = contacts.filter(owned).distinct()
+    leads = Lead.objects.filter(org=org).exclude(
+        Q(status="converted") | Q(status="closed")
+    )
+    return {
+        "countries": COUNTRIES,
+        "industries": INDCHOICES,
+        "currency": CURRENCY_CODES,
+        "tags": list(Tags.objects.values("id", "name", "slug")),
+        "companies": list(Company.objects.filter(org=org).values("id", "name")),
+        "teams": list(Teams.objects.filter(org=org).values("id", "name")),
+        "users": list(
+            Profile.objects.filter(is_active=True, org=org).values(
+                "id", "user__email"
+            )
+        ),
+        "accounts": list(accounts.values("id", "name")),
+        "contacts": list(contacts.values("id", "first_name", "last_name")),
+        "leads": list(leads.values("id", "title", "first_name", "last_name")),
+        "lead": {"status": LEAD_STATUS, "source": LEAD_SOURCE},
+        "account": {"status": ["open", "close"]},
+        "opportunity": {"stage": STAGES, "lead_source": SOURCES},
+        "case": {
+            "status": STATUS_CHOICE,
+            "priority": PRIORITY_CHOICE,
+            "type_of_case": CASE_TYPE,
+        },
+        "task": {"status": STATUS_CHOICES, "priority": PRIORITY_CHOICES},
+        "event": {"recurring_days": WEEKDAYS},
+    }
+
+
+def get_metadata(profile):
+    """
+    Return (metadata, etag) for the org of a profile.
+
+    The payload is cached per org and visibility scope until one of the rows
+    it lists changes (see common.signals); the ETag is a hash of its content.
+    """
+    sees_all_accounts, sees_all_contacts = _visibility(profile)
+    if sees_all_accounts and sees_all_contacts:
+        scope = "org"
+    else:
+        scope = f"{profile.id}:{int(sees_all_accounts)}{int(sees_all_contacts)}"
+    key = METADATA_CACHE_KEY.format(
+        generation=get_cache_version(METADATA_GENERATION_KEY),
+        org_id=profile.org_id,
+        version=get_cache_version(METADATA_VERSION_KEY.format(org_id=profile.org_id)),
+        scope=scope,
+    )
+    cached = cache.get(key)
+    if cached is None:
+        metadata = build_metadata(profile, sees_all_accounts, sees_all_contacts)
+        content = json.dumps(metadata, cls=DjangoJSONEncoder, sort_keys=True)
+        etag = '"%s"' % hashlib.sha1(content.encode("utf-8")).hexdigest()
+        cached = (metadata, etag)
+        cache.set(key, cached, METADATA_CACHE_TIMEOUT)
+    return cached
@@ -1,5 +1,3 @@
-import jwt
-from django.conf import settings
 from django.contrib.auth import logout
 from django.core.exceptions import PermissionDenied
 from rest_framework.exceptions import AuthenticationFailed
@@ -8,7 +6,8 @@ from rest_framework.response import Response
 from crum import get_current_user
 from django.utils.functional import SimpleLazyObject
 
-from common.models import Org, Profile, User
+from common.api_keys import resolve_org_api_key
+from common.external_auth import get_cached_profile, get_jwt_payload
 
 
 def get_actual_value(request):
@@ -30,14 +29,10 @@ class GetProfileAndOrg(object):
             request.profile = None
             user_id = None
 
-            # Handle JWT token from "Authorization" header
-            if request.headers.get("Authorization"):
-                token1 = request.headers.get("Authorization")
-                if token1.lower().startswith("bearer "):
-                    token = token1.split(" ")[1]
-                else:
-                    token = token1
-                decoded = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGO])
+            # Handle JWT token from "Authorization" header, decoded once and
+            # shared with CustomDualAuthentication
+            decoded = get_jwt_payload(request)
+            if decoded:
                 user_id = decoded['user_id']
 
             # Handle API key authentication (optional)
@@ -54,25 +49,27 @@ class GetProfileAndOrg(object):
             #         raise PermissionDenied("Invalid or missing Authorization header")
             # api_key = request.headers.get('Token')  # Get API key from request query params
 
+            if api_key and user_id is not None:
+                # the token would authenticate one user and the key attach
+                # the profile of another org: accept one credential only
+                raise PermissionDenied("Send either an API key or a token.")
+
             if api_key:
-                try:
-                    organization = Org.objects.get(api_key=api_key)
-                    request.META['org'] = organization.id
-                    profile = Profile.objects.filter(org=organization, role="ADMIN").first()
-                    user_id = profile.user.id
-                except Org.DoesNotExist:
+                # hashed-key index lookup, served from the in-process LRU
+                resolved = resolve_org_api_key(api_key)
+                if resolved is None:
                     raise AuthenticationFailed('Invalid API Key')
+                organization, profile, user = resolved
+                request.META['org'] = organization.id
+                request.profile = profile
 
-            if user_id is not None:
-                try:
-                    if request.headers.get("org"):
-                        profile = Profile.objects.get(
-                            user_id=user_id, org=request.headers.get("org"), is_active=True
-                        )
-                        if profile:
-                            request.profile = profile
-                except Profile.DoesNotExist:
-                    raise PermissionDenied("Profile not found or inactive.")
+            elif user_id is not None:
+                if request.headers.get("org"):
+                    # user, role and org come from one joined, cached query
+                    profile = get_cached_profile(user_id, request.headers.get("org"))
+                    if profile is None:
+                        raise PermissionDenied("Profile not found or inactive.")
+                    request.profile = profile
         except Exception as e:
             print("Middleware error:", str(e))
             raise PermissionDenied("Access Denied due to authentication failure.")
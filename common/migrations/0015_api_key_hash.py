@@ -0,0 +1,42 @@
+# Generated by Django 4.2.1 on 2026-10-18 18:08
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def hash_api_key(api_key):
+    # frozen copy of common.api_keys.hash_api_key as of this migration
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def hash_existing_keys(apps, schema_editor):
+    Org = apps.get_model("common", "Org")
+    APISettings = apps.get_model("common", "APISettings")
+    for org in Org.objects.only("id", "api_key").iterator():
+        Org.objects.filter(id=org.id).update(api_key_hash=hash_api_key(org.api_key))
+    for api_setting in APISettings.objects.only("id", "apikey").iterator():
+        APISettings.objects.filter(id=api_setting.id).update(
+            apikey_hash=hash_api_key(api_setting.apikey)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0014_alter_profile_role'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apisettings',
+            name='apikey_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='org',
+            name='api_key_hash',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(hash_existing_keys, migrations.RunPython.noop),
+    ]
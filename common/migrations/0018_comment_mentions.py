@@ -0,0 +1,18 @@
+# Generated by Django 4.2.1 on 2026-10-18 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0017_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='mentions',
+            field=models.ManyToManyField(blank=True, related_name='comment_mentions', to='common.profile'),
+        ),
+    ]
@@ -0,0 +1,170 @@
+# Generated by Django 4.2.1 on 2026-10-18 19:26
+
+import re
+from itertools import islice
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of the definitions of common.search as of this migration,
+# so that later changes to the searchable fields cannot break migrating
+# from scratch; rebuild_search_index picks up such changes.
+BATCH_SIZE = 1000
+WORD_RE = re.compile(r"\w+")
+POSTGRES_INDEXES = [
+    GinIndex(
+        SearchVector("document", config="simple"),
+        name="search_entry_document_idx",
+    ),
+    GinIndex(
+        fields=["title"],
+        opclasses=["gin_trgm_ops"],
+        name="search_entry_title_trgm_idx",
+    ),
+]
+
+
+def _join(*parts):
+    return " ".join(str(part) for part in parts if part)
+
+
+# kind: (model, searchable fields, title, subtitle)
+ENTITIES = {
+    "lead": (
+        "leads.Lead",
+        (
+            "title",
+            "first_name",
+            "last_name",
+            "email",
+            "phone",
+            "account_name",
+            "organization",
+            "city",
+            "website",
+        ),
+        lambda lead: lead.title or _join(lead.first_name, lead.last_name),
+        lambda lead: _join(lead.first_name, lead.last_name) if lead.title else "",
+    ),
+    "contact": (
+        "contacts.Contact",
+        (
+            "first_name",
+            "last_name",
+            "primary_email",
+            "secondary_email",
+            "mobile_number",
+            "organization",
+            "title",
+            "department",
+        ),
+        lambda contact: _join(contact.first_name, contact.last_name),
+        lambda contact: contact.primary_email,
+    ),
+    "account": (
+        "accounts.Account",
+        ("name", "email", "phone", "contact_name", "billing_city", "industry"),
+        lambda account: account.name,
+        lambda account: account.email,
+    ),
+    "opportunity": (
+        "opportunity.Opportunity",
+        ("name", "lead_source"),
+        lambda opportunity: opportunity.name,
+        lambda opportunity: opportunity.stage,
+    ),
+    "case": (
+        "cases.Case",
+        ("name", "case_type"),
+        lambda case: case.name,
+        lambda case: case.status,
+    ),
+}
+
+
+def add_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    model = apps.get_model("common", "SearchEntry")
+    for index in POSTGRES_INDEXES:
+        schema_editor.add_index(model, index)
+
+
+def remove_postgres_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    model = apps.get_model("common", "SearchEntry")
+    for index in POSTGRES_INDEXES:
+        schema_editor.remove_index(model, index)
+
+
+def build_entry(SearchEntry, kind, row):
+    label, fields, title, subtitle = ENTITIES[kind]
+    words = []
+    for field in fields:
+        value = getattr(row, field)
+        words += WORD_RE.findall(str(value).lower()) if value else []
+    return SearchEntry(
+        org_id=row.org_id,
+        kind=kind,
+        object_id=row.pk,
+        title=(title(row) or "")[:255],
+        subtitle=(subtitle(row) or "")[:255],
+        document=" ".join(dict.fromkeys(words)),
+    )
+
+
+def index_existing_rows(apps, schema_editor):
+    SearchEntry = apps.get_model("common", "SearchEntry")
+    for kind, (label, *_) in ENTITIES.items():
+        rows = apps.get_model(label).objects.order_by().iterator()
+        while True:
+            chunk = list(islice(rows, BATCH_SIZE))
+            if not chunk:
+                break
+            SearchEntry.objects.bulk_create(
+                build_entry(SearchEntry, kind, row) for row in chunk
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0018_comment_mentions'),
+        ('accounts', '0004_keyset_pagination_index'),
+        ('cases', '0004_keyset_pagination_index'),
+        ('contacts', '0007_keyset_pagination_index'),
+        ('leads', '0003_keyset_pagination_index'),
+        ('opportunity', '0003_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('subtitle', models.CharField(blank=True, max_length=255)),
+                ('document', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('org', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='common.org')),
+            ],
+            options={
+                'verbose_name': 'Search Entry',
+                'verbose_name_plural': 'Search Entries',
+                'db_table': 'search_entry',
+                'indexes': [models.Index(fields=['org', 'kind'], name='search_entry_org_kind_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchentry',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='search_entry_object'),
+        ),
+        migrations.RunPython(add_postgres_indexes, remove_postgres_indexes),
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
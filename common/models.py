@@ -23,6 +23,7 @@ from common.templatetags.common_tags import (
     is_document_file_zip,
 )
 from common.utils import COUNTRIES, ROLES
+from common.api_keys import hash_api_key
 from common.base import BaseModel
 from role_permission_control.models import Role, Permission,RolePermission
 
@@ -122,6 +123,10 @@ class Org(BaseModel):
     api_key = models.TextField(
         default=generate_unique_key, unique=True, editable=False
     )
+    # sha256 of api_key; "Token" header lookups go through this index
+    api_key_hash = models.CharField(
+        max_length=64, unique=True, null=True, editable=False
+    )
     is_active = models.BooleanField(default=True)
     # address = models.TextField(blank=True, null=True)
     # user_limit = models.IntegerField(default=5)
@@ -136,6 +141,10 @@ class Org(BaseModel):
     def __str__(self):
         return str(self.name)
 
+    def save(self, *args, **kwargs):
+        self.api_key_hash = hash_api_key(self.api_key)
+        super().save(*args, **kwargs)
+
 
 class Profile(BaseModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -173,9 +182,9 @@ class Profile(BaseModel):
         """
         Custom method to check if the user's assigned role has a specific permission.
         """
-        if self.role:
-            # Check if the role has the specific permission
-            return self.role.role_permissions.filter(permission__name=name).exists()
+        if self.role_id:
+            # Answered from the role's memoized permission set
+            return self.role.has_permission(name)
         return False
     
     @property
@@ -264,6 +273,10 @@ class Comment(BaseModel):
         related_name="events_comments",
         on_delete=models.CASCADE,
     )
+    # profiles @-mentioned in the comment, indexed when it is saved
+    mentions = models.ManyToManyField(
+        Profile, related_name="comment_mentions", blank=True
+    )
 
     class Meta:
         verbose_name = "Comment"
@@ -453,6 +466,11 @@ class Document(BaseModel):
         verbose_name_plural = "Documents"
         db_table = "document"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "-created_at", "-id"], name="document_org_created_id_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title}"
@@ -511,6 +529,7 @@ def generate_key():
 class APISettings(BaseModel):
     title = models.TextField()
     apikey = models.CharField(max_length=16, blank=True)
+    apikey_hash = models.CharField(max_length=64, blank=True, db_index=True)
     website = models.URLField(max_length=255, null=True)
     lead_assigned_to = models.ManyToManyField(
         Profile, related_name="lead_assignee_users"
@@ -545,6 +564,7 @@ class APISettings(BaseModel):
     def save(self, *args, **kwargs):
         if not self.apikey or self.apikey is None or self.apikey == "":
             self.apikey = generate_key()
+        self.apikey_hash = hash_api_key(self.apikey)
         super().save(*args, **kwargs)
 
 
@@ -553,3 +573,73 @@ class GoogleAuthConfig(models.Model):
 
     def __str__(self):
         return f"Google login enabled: {self.google_enabled}"
+
+
+class Notification(BaseModel):
+    """
+    Outbox of the emails to send to a user. Rows are written along with the
+    change they are about and sent (then deleted) by a periodic task, which
+    merges the pending notifications of a user into one email.
+    """
+
+    org = models.ForeignKey(Org, on_delete=models.CASCADE, null=True, blank=True)
+    recipient = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="pending_notifications"
+    )
+    kind = models.CharField(max_length=64)
+    # the row the notification is about; a later notification of the same
+    # kind about the same row replaces a pending one
+    object_id = models.CharField(max_length=64, blank=True)
+    subject = models.CharField(max_length=255)
+    template_name = models.CharField(max_length=255)
+    context = models.JSONField(default=dict, blank=True)
+    summary = models.CharField(max_length=255, blank=True)
+    url = models.CharField(max_length=500, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # set while a worker is sending the row, see common.outbox.drain_outbox
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Notification"
+        verbose_name_plural = "Notifications"
+        db_table = "notification"
+        ordering = ("created_at",)
+        indexes = [
+            models.Index(
+                fields=["recipient", "created_at"], name="notification_recipient_idx"
+            ),
+            models.Index(fields=["created_at"], name="notification_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.recipient_id}"
+
+
+class SearchEntry(models.Model):
+    """A row of the search index of an org (see common.search)"""
+
+    org = models.ForeignKey(Org, on_delete=models.CASCADE, null=True, blank=True)
+    # a key of common.search.SEARCH_ENTITIES
+    kind = models.CharField(max_length=20)
+    object_id = models.UUIDField()
+    title = models.CharField(max_length=255, blank=True)
+    subtitle = models.CharField(max_length=255, blank=True)
+    # the distinct lowercased words of the searchable fields
+    document = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Search Entry"
+        verbose_name_plural = "Search Entries"
+        db_table = "search_entry"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="search_entry_object"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["org", "kind"], name="search_entry_org_kind_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.title}"
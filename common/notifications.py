@@ -0,0 +1,139 @@
+import smtplib
+
+from django.core.mail import EmailMessage, get_connection
+from django.template.loader import get_template
+
+from common.models import Profile, User
+
+# A message that fails for a reason that may pass (a dropped connection, a
+# 4xx reply) is retried at once on a fresh connection, up to
+# NOTIFICATION_MAX_RETRIES times; nothing sleeps in the worker. A refusal
+# (5xx reply, refused sender or recipients) is not retried. A message still
+# failing is sent again by a retry of the task in NOTIFICATION_RETRY_DELAY
+# seconds, up to NOTIFICATION_TASK_RETRIES times.
+NOTIFICATION_MAX_RETRIES = 1
+NOTIFICATION_RETRY_DELAY = 5 * 60
+NOTIFICATION_TASK_RETRIES = 3
+
+
+def get_active_profiles(profile_ids):
+    """Active profiles (with their user) of the ids, in one query"""
+    return list(
+        Profile.objects.filter(id__in=list(profile_ids), is_active=True)
+        .select_related("user")
+        .order_by()
+    )
+
+
+def get_active_users(user_ids):
+    return list(User.objects.filter(id__in=list(user_ids), is_active=True).order_by())
+
+
+def render_messages(subject, template_name, context, recipients):
+    """
+    One html message per ``(email, recipient context)`` pair. The template
+    is loaded once and rendered with ``context`` updated by the recipient
+    context; recipients without an email are left out.
+    """
+    template = get_template(template_name)
+    messages = []
+    for email, recipient_context in recipients:
+        if not email:
+            continue
+        body = template.render({**context, **recipient_context})
+        message = EmailMessage(subject=subject, body=body, to=[email])
+        message.content_subtype = "html"
+        messages.append(message)
+    return messages
+
+
+def is_transient(error):
+    """Whether sending again later may succeed"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    # network errors (OSError) are transient, other SMTP errors are not
+    return not isinstance(error, smtplib.SMTPException)
+
+
+def deliver_messages(messages, max_retries=NOTIFICATION_MAX_RETRIES, connection=None):
+    """
+    Send messages through one connection to the mail server. Returns
+    (deferred, refused): the messages that failed for a transient reason
+    after their retries, and those the server refused for good.
+    """
+    connection = connection or get_connection()
+    deferred, refused = [], []
+    try:
+        for message in messages:
+            for attempt in range(max_retries + 1):
+                try:
+                    # a no-op while the connection is open
+                    connection.open()
+                    connection.send_messages([message])
+                    break
+                except (smtplib.SMTPException, OSError) as error:
+                    # the connection may be what broke: retry on a new one
+                    connection.close()
+                    if not is_transient(error):
+                        refused.append(message)
+                        break
+                    if attempt == max_retries:
+                        deferred.append(message)
+    finally:
+        connection.close()
+    return deferred, refused
+
+
+def send_messages(messages, max_retries=NOTIFICATION_MAX_RETRIES, connection=None):
+    """Send messages (see deliver_messages) and return those that failed"""
+    deferred, refused = deliver_messages(messages, max_retries, connection)
+    return deferred + refused
+
+
+def send_or_retry(messages, task=None, deferred_to=None):
+    """
+    Send the messages of a task (see deliver_messages) and return the number
+    sent. A bound ``task`` is retried for the deferred messages: the retry
+    gets their addresses as ``deferred_to``, which leaves the others out.
+    """
+    if deferred_to is not None:
+        messages = [m for m in messages if set(m.to) & set(deferred_to)]
+    deferred, refused = deliver_messages(messages)
+    if deferred and task is not None and task.request.retries < task.max_retries:
+        addresses = [address for message in deferred for address in message.to]
+        raise task.retry(
+            kwargs={**(task.request.kwargs or {}), "deferred_to": addresses},
+            countdown=NOTIFICATION_RETRY_DELAY,
+        )
+    return len(messages) - len(deferred) - len(refused)
+
+
+def notify_profiles(
+    profile_ids,
+    subject,
+    template_name,
+    context,
+    recipient_context=None,
+    task=None,
+    deferred_to=None,
+):
+    """
+    Email the active profiles of ``profile_ids``; ``recipient_context(profile)``
+    returns the context specific to one of them (the user by default).
+    Returns the number of messages sent (see send_or_retry for ``task``).
+    """
+    recipient_context = recipient_context or (lambda profile: {"user": profile.user})
+    messages = render_messages(
+        subject,
+        template_name,
+        context,
+        (
+            (profile.user.email, recipient_context(profile))
+            for profile in get_active_profiles(profile_ids)
+        ),
+    )
+    return send_or_retry(messages, task, deferred_to)
@@ -0,0 +1,199 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import F, Min, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from common.models import Notification, Profile
+from common.notifications import deliver_messages
+
+# Notifications are not sent one by one from the views: they are written to
+# the outbox (common.models.Notification) with the change they are about and
+# drain_outbox, run periodically, sends the pending notifications of a user
+# in one email once the oldest of them has waited NOTIFICATION_DIGEST_WINDOW
+# seconds, so that a bulk reassignment ends up as one digest per assignee.
+NOTIFICATION_BATCH_SIZE = 100
+NOTIFICATION_MAX_ATTEMPTS = 5
+# rows claimed longer ago than this are left by a worker that died sending
+NOTIFICATION_CLAIM_TIMEOUT = 10 * 60
+DIGEST_SUBJECT = "You have %d new notifications"
+DIGEST_TEMPLATE = "assigned_to/digest.html"
+
+
+def get_digest_window():
+    return getattr(settings, "NOTIFICATION_DIGEST_WINDOW", 60)
+
+
+def profile_user_ids(profile_ids):
+    """Users of the active profiles of the ids, in one query"""
+    return list(
+        Profile.objects.filter(id__in=list(profile_ids), is_active=True)
+        .order_by()
+        .values_list("user_id", flat=True)
+    )
+
+
+def queue_notifications(
+    user_ids,
+    kind,
+    subject,
+    template_name,
+    context=None,
+    org=None,
+    object_id="",
+    summary="",
+    url="",
+    recipient_context=None,
+):
+    """
+    Write a notification per user to the outbox, in one query. Call it in
+    the transaction of the change it is about, so that both are committed
+    or rolled back together.
+
+    ``context`` (updated by ``recipient_context[user_id]``) must be JSON
+    serializable; the template also gets the recipient as ``user``.
+    ``summary`` and ``url`` stand for the notification in a digest.
+    """
+    context = context or {}
+    recipient_context = recipient_context or {}
+    return Notification.objects.bulk_create(
+        Notification(
+            org=org,
+            recipient_id=user_id,
+            kind=kind,
+            object_id=str(object_id),
+            subject=subject,
+            template_name=template_name,
+            context={**context, **recipient_context.get(user_id, {})},
+            summary=summary[:255],
+            url=url,
+        )
+        for user_id in dict.fromkeys(user_ids)
+    )
+
+
+def coalesce(notifications):
+    """The latest notification per (kind, object), in order of creation"""
+    latest = {}
+    for notification in notifications:
+        key = (notification.kind, notification.object_id or notification.id)
+        latest.pop(key, None)
+        latest[key] = notification
+    return list(latest.values())
+
+
+def build_message(user, notifications):
+    """One email for the notifications of a user: as is, or as a digest"""
+    if len(notifications) == 1:
+        notification = notifications[0]
+        subject = notification.subject
+        template_name = notification.template_name
+        context = notification.context
+    else:
+        subject = DIGEST_SUBJECT % len(notifications)
+        template_name = DIGEST_TEMPLATE
+        context = {
+            "url": settings.DOMAIN_NAME,
+            "notifications": [
+                {"summary": n.summary or n.subject, "url": n.url}
+                for n in notifications
+            ],
+        }
+    body = render_to_string(template_name, {**context, "user": user})
+    message = EmailMessage(subject=subject, body=body, to=[user.email])
+    message.content_subtype = "html"
+    return message
+
+
+def _available(now):
+    stale = now - timedelta(seconds=NOTIFICATION_CLAIM_TIMEOUT)
+    return Q(claimed_at__isnull=True) | Q(claimed_at__lt=stale)
+
+
+def _due_recipients(cutoff, exclude, batch_size, now):
+    return list(
+        Notification.objects.filter(_available(now))
+        .exclude(recipient_id__in=exclude)
+        .order_by()
+        .values("recipient_id")
+        .annotate(first=Min("created_at"))
+        .filter(first__lte=cutoff)
+        .order_by("first")
+        .values_list("recipient_id", flat=True)[:batch_size]
+    )
+
+
+def claim_notifications(recipient_ids, now):
+    """
+    Pending notifications of the users, marked as being sent by this worker
+    in a short transaction: the rows are no longer locked while the emails
+    go out, and the other workers leave them alone.
+    """
+    with transaction.atomic():
+        # rows being claimed by another worker are skipped
+        pending = list(
+            Notification.objects.select_for_update(skip_locked=True, of=("self",))
+            .filter(
+                _available(now), recipient_id__in=recipient_ids, created_at__lte=now
+            )
+            .select_related("recipient")
+            .order_by("created_at")
+        )
+        Notification.objects.filter(id__in=[n.id for n in pending]).update(
+            claimed_at=now
+        )
+    return pending
+
+
+def drain_outbox(window=None, batch_size=NOTIFICATION_BATCH_SIZE, now=None):
+    """
+    Send the pending notifications of the users whose oldest one has waited
+    for ``window`` seconds, ``batch_size`` users at a time. Sent rows are
+    deleted, and so are those of an email the server refused; the rows of an
+    email that failed for a transient reason are released for the next runs,
+    and deleted after NOTIFICATION_MAX_ATTEMPTS attempts. Returns the number
+    of emails sent.
+    """
+    now = now or timezone.now()
+    window = get_digest_window() if window is None else window
+    cutoff = now - timedelta(seconds=window)
+    done = set()
+    sent = 0
+    while True:
+        recipient_ids = _due_recipients(cutoff, done, batch_size, now)
+        if not recipient_ids:
+            return sent
+        done.update(recipient_ids)
+        by_recipient = defaultdict(list)
+        for notification in claim_notifications(recipient_ids, now):
+            by_recipient[notification.recipient_id].append(notification)
+        dropped, batches, messages = [], [], []
+        for notifications in by_recipient.values():
+            user = notifications[0].recipient
+            if not (user.email and user.is_active):
+                dropped += notifications
+                continue
+            batches.append(notifications)
+            messages.append(build_message(user, coalesce(notifications)))
+        deferred, refused = deliver_messages(messages)
+        # deferred messages are tried again by a later run; refused ones
+        # would be refused again and are dropped
+        retried = {id(message) for message in deferred}
+        done_ids, failed_ids = [n.id for n in dropped], []
+        for notifications, message in zip(batches, messages):
+            for notification in notifications:
+                last = notification.attempts + 1 >= NOTIFICATION_MAX_ATTEMPTS
+                if id(message) in retried and not last:
+                    failed_ids.append(notification.id)
+                else:
+                    done_ids.append(notification.id)
+        with transaction.atomic():
+            Notification.objects.filter(id__in=done_ids).delete()
+            Notification.objects.filter(id__in=failed_ids).update(
+                attempts=F("attempts") + 1, claimed_at=None
+            )
+        sent += len(messages) - len(deferred) - len(refused)
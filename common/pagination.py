@@ -0,0 +1,132 @@
+import base64
+import json
+import uuid
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+
+from common.counts import EXACT, count_queryset, get_count_mode
+
+# List views keep LimitOffsetPagination by default; passing
+# ?pagination=cursor switches them to keyset pagination.
+PAGINATION_QUERY_PARAM = "pagination"
+CURSOR_MODE = "cursor"
+
+
+def use_cursor_pagination(request):
+    return request.query_params.get(PAGINATION_QUERY_PARAM) == CURSOR_MODE
+
+
+def encode_cursor(created_at, pk):
+    position = json.dumps({"c": created_at.isoformat(), "i": str(pk)})
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        created_at = parse_datetime(position["c"])
+        pk = uuid.UUID(position["i"])
+    except (TypeError, ValueError, KeyError, AttributeError, UnicodeError):
+        raise NotFound("Invalid cursor")
+    if created_at is None:
+        raise NotFound("Invalid cursor")
+    return created_at, pk
+
+
+class KeysetPagination:
+    """
+    Keyset (cursor) pagination over ("-created_at", "-id").
+
+    Every page is one indexed range scan of page_size + 1 rows: there is no
+    OFFSET and no COUNT, and rows inserted while a client pages through the
+    list never shift the following pages. Cursors are opaque base64 strings
+    of the last row's (created_at, id).
+    """
+
+    page_size = settings.REST_FRAMEWORK.get("PAGE_SIZE", 10)
+    max_page_size = 100
+    ordering = ("-created_at", "-id")
+
+    def __init__(self, cursor_query_param="cursor"):
+        self.cursor_query_param = cursor_query_param
+        self.next_cursor = None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get("limit", self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+        results = list(queryset[: page_size + 1])
+        if len(results) > page_size:
+            results = results[:page_size]
+            last = results[-1]
+            self.next_cursor = encode_cursor(last.created_at, last.pk)
+        else:
+            self.next_cursor = None
+        return results
+
+
+class CountedLimitOffsetPagination(LimitOffsetPagination):
+    """
+    LimitOffsetPagination counting through common.counts.
+
+    The count mode is picked per request (?count=exact|cached|approximate)
+    and the mode actually used is kept in self.count_mode so that views can
+    report it next to the count.
+    """
+
+    count_mode = EXACT
+
+    def get_count(self, queryset):
+        request = getattr(self, "request", None)
+        if request is None or not hasattr(queryset, "query"):
+            return super().get_count(queryset)
+        profile = getattr(request, "profile", None)
+        self.count, self.count_mode = count_queryset(
+            queryset,
+            org_id=getattr(profile, "org_id", None),
+            mode=get_count_mode(request),
+        )
+        return self.count
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count_mode = EXACT
+        results = super().paginate_queryset(queryset, request, view=view)
+        if (
+            results == []
+            and self.count_mode != EXACT
+            and self.limit is not None
+        ):
+            # a cached or estimated count can be too low: fetch the page anyway
+            results = list(queryset[self.offset : self.offset + self.limit])
+        return results
+
+    def get_next_offset(self, results):
+        """
+        Offset of the page following `results`, None on the last page, and
+        0 when the page is empty. Does not issue another COUNT.
+        """
+        if not results:
+            return 0
+        offset = self.offset + len(results)
+        if self.count_mode == EXACT:
+            is_last = offset >= self.count
+        else:
+            is_last = len(results) < self.limit
+        return None if is_last else offset
@@ -0,0 +1,129 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def is_prefetched(instance, name):
+    return name in getattr(instance, "_prefetched_objects_cache", {})
+
+
+def _prefixed(lookup, prefix):
+    if isinstance(lookup, Prefetch):
+        return Prefetch(f"{prefix}__{lookup.prefetch_through}", queryset=lookup.queryset)
+    return f"{prefix}__{lookup}"
+
+
+def _get_relation(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.is_relation else None
+
+
+def get_eager_loading(serializer_class):
+    """
+    Return the (select_related, prefetch_related) lookups that serializing
+    instances with ``serializer_class`` needs.
+
+    The tree is built from the fields of the serializer: a nested serializer
+    on a forward foreign key is joined, a nested ``many=True`` serializer is
+    prefetched with its own tree as queryset and a list of related primary
+    keys is prefetched. Serializers add what cannot be derived from their
+    fields (method fields, properties) with ``select_related_fields`` and
+    ``prefetch_related_fields``.
+    """
+    model = serializer_class.Meta.model
+    select_related = list(getattr(serializer_class, "select_related_fields", ()))
+    prefetch_related = list(getattr(serializer_class, "prefetch_related_fields", ()))
+    for field in serializer_class().fields.values():
+        relation = _get_relation(model, field.source)
+        if relation is None:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            child = field.child
+            if (
+                isinstance(child, serializers.ModelSerializer)
+                and relation.related_model is child.Meta.model
+            ):
+                queryset = eager_load(
+                    child.Meta.model._default_manager.all(), type(child)
+                )
+                prefetch_related.append(Prefetch(field.source, queryset=queryset))
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch_related.append(field.source)
+        elif isinstance(field, serializers.ModelSerializer) and (
+            relation.many_to_one or relation.one_to_one
+        ):
+            child_select, child_prefetch = get_eager_loading(type(field))
+            select_related.append(field.source)
+            select_related += [f"{field.source}__{lookup}" for lookup in child_select]
+            prefetch_related += [
+                _prefixed(lookup, field.source) for lookup in child_prefetch
+            ]
+    return select_related, prefetch_related
+
+
+def eager_load(queryset, serializer_class):
+    """Apply the select/prefetch tree of a serializer to a queryset"""
+    select_related, prefetch_related = get_eager_loading(serializer_class)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+def _ordered_profiles(profiles):
+    # same rows and order as Profile.objects.filter(id__in=...)
+    unique = {profile.id: profile for profile in profiles}
+    return sorted(unique.values(), key=lambda profile: profile.created_at, reverse=True)
+
+
+def _prefetched_team_users(instance):
+    """Team members of a teams/assigned_to owner, or None if not prefetched"""
+    if not is_prefetched(instance, "teams"):
+        return None
+    teams = instance.teams.all()
+    if not all(is_prefetched(team, "users") for team in teams):
+        return None
+    return [profile for team in teams for profile in team.users.all()]
+
+
+def get_team_users(instance):
+    from common.models import Profile
+
+    team_users = _prefetched_team_users(instance)
+    if team_users is not None:
+        return _ordered_profiles(team_users)
+    team_user_ids = list(instance.teams.values_list("users__id", flat=True))
+    return Profile.objects.filter(id__in=team_user_ids)
+
+
+def get_team_and_assigned_users(instance):
+    from common.models import Profile
+
+    team_users = _prefetched_team_users(instance)
+    if team_users is not None and is_prefetched(instance, "assigned_to"):
+        return _ordered_profiles(team_users + list(instance.assigned_to.all()))
+    team_user_ids = list(instance.teams.values_list("users__id", flat=True))
+    assigned_user_ids = list(instance.assigned_to.values_list("id", flat=True))
+    user_ids = team_user_ids + assigned_user_ids
+    return Profile.objects.filter(id__in=user_ids)
+
+
+def get_assigned_users_not_in_teams(instance):
+    from common.models import Profile
+
+    team_users = _prefetched_team_users(instance)
+    if team_users is not None and is_prefetched(instance, "assigned_to"):
+        team_user_ids = {profile.id for profile in team_users}
+        return _ordered_profiles(
+            profile
+            for profile in instance.assigned_to.all()
+            if profile.id not in team_user_ids
+        )
+    team_user_ids = list(instance.teams.values_list("users__id", flat=True))
+    assigned_user_ids = list(instance.assigned_to.values_list("id", flat=True))
+    user_ids = set(assigned_user_ids) - set(team_user_ids)
+    return Profile.objects.filter(id__in=list(user_ids))
@@ -0,0 +1,257 @@
+import re
+from collections import namedtuple
+
+from django.apps import apps
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from common.dashboard import sees_all_rows
+from common.imports import chunked
+from common.models import SearchEntry
+
+# /api/search/ looks for a text in every CRM entity of an org at once. It
+# reads a single table, common.models.SearchEntry, with one row per indexed
+# object: its org, a title and the words of its searchable fields. Rows are
+# written by the post_save/post_delete signals of the indexed models (see
+# common.signals) and by the bulk imports.
+#
+# Every word of the query has to prefix a word of the object. On PostgreSQL
+# this is a full text query (prefix tsquery on a GIN index of the words) or
+# a title similar to the query (% operator on a trigram GIN index of the
+# titles), the indexes created by migration 0019, ranked by ts_rank plus the
+# trigram similarity of the title; elsewhere (the tests run on SQLite) it
+# falls back to LIKE filters and a simpler ranking.
+SearchEntity = namedtuple("SearchEntity", "label plural fields title subtitle")
+
+
+def _join(*parts):
+    return " ".join(str(part) for part in parts if part)
+
+
+SEARCH_ENTITIES = {
+    "lead": SearchEntity(
+        "leads.Lead",
+        "leads",
+        (
+            "title",
+            "first_name",
+            "last_name",
+            "email",
+            "phone",
+            "account_name",
+            "organization",
+            "city",
+            "website",
+        ),
+        lambda lead: lead.title or _join(lead.first_name, lead.last_name),
+        lambda lead: _join(lead.first_name, lead.last_name) if lead.title else "",
+    ),
+    "contact": SearchEntity(
+        "contacts.Contact",
+        "contacts",
+        (
+            "first_name",
+            "last_name",
+            "primary_email",
+            "secondary_email",
+            "mobile_number",
+            "organization",
+            "title",
+            "department",
+        ),
+        lambda contact: _join(contact.first_name, contact.last_name),
+        lambda contact: contact.primary_email,
+    ),
+    "account": SearchEntity(
+        "accounts.Account",
+        "accounts",
+        ("name", "email", "phone", "contact_name", "billing_city", "industry"),
+        lambda account: account.name,
+        lambda account: account.email,
+    ),
+    "opportunity": SearchEntity(
+        "opportunity.Opportunity",
+        "opportunities",
+        ("name", "lead_source"),
+        lambda opportunity: opportunity.name,
+        lambda opportunity: opportunity.stage,
+    ),
+    "case": SearchEntity(
+        "cases.Case",
+        "cases",
+        ("name", "case_type"),
+        lambda case: case.name,
+        lambda case: case.status,
+    ),
+}
+SEARCH_KINDS = {entity.label.lower(): kind for kind, entity in SEARCH_ENTITIES.items()}
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+SEARCH_BATCH_SIZE = 1000
+# titles this similar (pg_trgm) to the query match even without a prefix
+# (the threshold of the % operator)
+TRIGRAM_THRESHOLD = 0.3
+WORD_RE = re.compile(r"\w+")
+
+
+def get_words(text):
+    return WORD_RE.findall(str(text).lower()) if text else []
+
+
+def get_search_kind(instance):
+    return SEARCH_KINDS.get(instance._meta.label_lower)
+
+
+def get_entry_fields(instance, kind=None):
+    """The fields of the search entry of an object"""
+    kind = kind or get_search_kind(instance)
+    entity = SEARCH_ENTITIES[kind]
+    words = []
+    for field in entity.fields:
+        words += get_words(getattr(instance, field))
+    return {
+        "org_id": instance.org_id,
+        "kind": kind,
+        "object_id": instance.pk,
+        "title": (entity.title(instance) or "")[:255],
+        "subtitle": (entity.subtitle(instance) or "")[:255],
+        "document": " ".join(dict.fromkeys(words)),
+    }
+
+
+def index_objects(instances):
+    """Write (or rewrite) the search entries of objects, in bulk"""
+    entries = [SearchEntry(**get_entry_fields(instance)) for instance in instances]
+    SearchEntry.objects.bulk_create(
+        entries,
+        batch_size=SEARCH_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["kind", "object_id"],
+        update_fields=["org", "title", "subtitle", "document", "updated_at"],
+    )
+    return len(entries)
+
+
+def unindex_object(instance):
+    SearchEntry.objects.filter(
+        kind=get_search_kind(instance), object_id=instance.pk
+    ).delete()
+
+
+def rebuild_search_index(org_id=None, kinds=None):
+    """Index every object (of an org), e.g. after adding a searchable field"""
+    indexed = 0
+    for kind in kinds or SEARCH_ENTITIES:
+        model = apps.get_model(SEARCH_ENTITIES[kind].label)
+        queryset = model.objects.order_by()
+        if org_id is not None:
+            queryset = queryset.filter(org_id=org_id)
+        for chunk in chunked(queryset.iterator(), SEARCH_BATCH_SIZE):
+            indexed += index_objects(chunk)
+    return indexed
+
+
+def _visible(profile, user, kinds):
+    """Entries of the kinds a profile may see: all or its own per entity"""
+    visible = Q()
+    for kind in kinds:
+        entity = SEARCH_ENTITIES[kind]
+        if sees_all_rows(profile, user) or profile.role.has_permission(
+            f"View all {entity.plural}"
+        ):
+            visible |= Q(kind=kind)
+            continue
+        owned = (
+            apps.get_model(entity.label)
+            .objects.filter(org_id=profile.org_id)
+            .filter(Q(assigned_to=profile) | Q(created_by=user))
+        )
+        visible |= Q(kind=kind, object_id__in=owned.values("id"))
+    return visible
+
+
+def _rank(entry, words, text):
+    """Ranking of the fallback: title matches first, then the best prefixes"""
+    title_words = get_words(entry.title)
+    score = 4 if entry.title.lower() == text else 0
+    for word in words:
+        if word in title_words:
+            score += 2
+        elif any(title_word.startswith(word) for title_word in title_words):
+            score += 1
+    return score
+
+
+def match_entries(entries, words):
+    """
+    PostgreSQL only: the entries matching the words, annotated with their
+    rank. Both conditions are answered by the GIN indexes (a BitmapOr),
+    unlike a similarity() > threshold filter; the % operator compares to
+    pg_trgm.similarity_threshold, which search sets to TRIGRAM_THRESHOLD.
+    """
+    text = " ".join(words)
+    query = SearchQuery(
+        " & ".join(f"{word}:*" for word in words),
+        search_type="raw",
+        config="simple",
+    )
+    vector = SearchVector("document", config="simple")
+    return (
+        entries.alias(vector=vector)
+        .filter(Q(vector=query) | TrigramSimilar(F("title"), text))
+        .annotate(rank=SearchRank(vector, query) + TrigramSimilarity("title", text))
+    )
+
+
+def search(profile, user, text, kinds=None, limit=SEARCH_LIMIT):
+    """
+    Entries of the org of a profile matching ``text`` (each word as a
+    prefix), best first, as dicts. Restricted profiles only get the objects
+    they created or are assigned to, as in the list views.
+    """
+    words = get_words(text)
+    if not words:
+        return []
+    kinds = [kind for kind in kinds or SEARCH_ENTITIES if kind in SEARCH_ENTITIES]
+    if not kinds:
+        return []
+    entries = SearchEntry.objects.filter(org_id=profile.org_id).filter(
+        _visible(profile, user, kinds)
+    )
+    text = " ".join(words)
+    if connection.vendor == "postgresql":
+        entries = match_entries(entries, words).order_by("-rank", "title")[:limit]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+                [str(TRIGRAM_THRESHOLD)],
+            )
+            results = [(entry, entry.rank) for entry in entries]
+    else:
+        for word in words:
+            entries = entries.filter(
+                Q(document__startswith=word) | Q(document__contains=f" {word}")
+            )
+        # the candidates are ranked here, the newest first when tied
+        candidates = entries.order_by("-updated_at")[: limit * 5]
+        results = sorted(
+            ((entry, _rank(entry, words, text)) for entry in candidates),
+            key=lambda result: -result[1],
+        )[:limit]
+    return [
+        {
+            "type": entry.kind,
+            "id": entry.object_id,
+            "title": entry.title,
+            "subtitle": entry.subtitle,
+            "rank": rank,
+        }
+        for entry, rank in results
+    ]
@@ -1,5 +1,6 @@
 import re
 from datetime import datetime
+from functools import partial
 
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.hashers import check_password
@@ -12,6 +13,7 @@ from rest_framework import serializers
 from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from rest_framework.response import Response
 from common.utils import COUNTRIES
+from common.prefetch import eager_load
 from common.tasks import send_email_to_reset_password
 from django.utils import timezone
 from common.token_generator import account_activation_token
@@ -29,6 +31,77 @@ from common.models import (
 )
 
 
+# ?fields=name,status,... switches list views to the flat list serializers
+FIELDS_QUERY_PARAM = "fields"
+
+
+class ProjectedListSerializer(serializers.ModelSerializer):
+    """
+    Flat, read-only serializer for table views.
+
+    Every field is a column of the model, or a column of a forward foreign
+    key (``source="account.name"``), so that rows are loaded with a single
+    ``only()`` projection instead of the object graph of the detail
+    serializer. ``fields`` restricts the output to a sparse fieldset; the
+    ``id`` is always included.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_requested_fields(cls, request):
+        """
+        Names listed by ?fields= (all list fields for an empty value), or
+        None when the parameter is missing.
+        """
+        if FIELDS_QUERY_PARAM not in request.query_params:
+            return None
+        value = request.query_params.get(FIELDS_QUERY_PARAM, "")
+        fields = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(fields) - set(cls.Meta.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {FIELDS_QUERY_PARAM: f"Unknown fields: {', '.join(sorted(unknown))}"}
+            )
+        if not fields:
+            return list(cls.Meta.fields)
+        return ["id"] + [name for name in fields if name != "id"]
+
+    @classmethod
+    def project(cls, queryset, fields=None):
+        """Load only the columns needed by ``fields`` (and the pagination keys)"""
+        columns = {"id", "created_at"}
+        related = set()
+        for field in cls(fields=fields).fields.values():
+            path = field.source.split(".")
+            columns.add("__".join(path))
+            if len(path) > 1:
+                related.add("__".join(path[:-1]))
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+
+def get_list_serialization(request, queryset, serializer_class, list_serializer_class):
+    """
+    Return (queryset, serializer class) for a list view: the flat list
+    serializer over a projected queryset when ?fields= is given, the detail
+    serializer over its eager-loaded queryset otherwise.
+    """
+    fields = list_serializer_class.get_requested_fields(request)
+    if fields is None:
+        return eager_load(queryset, serializer_class), serializer_class
+    return (
+        list_serializer_class.project(queryset, fields),
+        partial(list_serializer_class, fields=fields),
+    )
+
+
 class OrganizationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Org
@@ -0,0 +1,141 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from common.api_keys import org_api_keys, revoke_org_profile, site_api_keys
+from common.external_auth import invalidate_auth_cache
+from common.dashboard import invalidate_org_dashboard
+from common.lookups import lookups
+from common.mentions import index_mentions
+from common.metadata import invalidate_all_metadata, invalidate_org_metadata
+from common.models import APISettings, Comment, Org, Profile, User
+from common.search import index_objects, unindex_object
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_auth_cache(sender, instance, **kwargs):
+    """Drop the cached (user, profile, role, org) used by the auth pipeline"""
+    invalidate_auth_cache(instance.user_id, [instance.org_id])
+    revoke_org_profile(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_auth_cache(sender, instance, **kwargs):
+    org_ids = Profile.objects.filter(user_id=instance.pk).values_list(
+        "org_id", flat=True
+    )
+    invalidate_auth_cache(instance.pk, list(org_ids))
+    for org_id in org_ids:
+        invalidate_org_metadata(org_id)
+        lookups.invalidate(org_id)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment_mentions(sender, instance, created, raw=False, **kwargs):
+    """Store who a comment mentions, so that it is parsed once"""
+    if not raw:
+        index_mentions(instance, created)
+
+
+@receiver(post_save, sender=Org)
+@receiver(post_delete, sender=Org)
+def revoke_org_api_key(sender, instance, **kwargs):
+    if instance.api_key_hash:
+        org_api_keys.revoke(instance.api_key_hash)
+
+
+@receiver(post_save, sender=APISettings)
+@receiver(post_delete, sender=APISettings)
+def revoke_site_api_key(sender, instance, **kwargs):
+    if instance.apikey_hash:
+        site_api_keys.revoke(instance.apikey_hash)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+@receiver(post_save, sender="accounts.Account")
+@receiver(post_delete, sender="accounts.Account")
+@receiver(post_save, sender="contacts.Contact")
+@receiver(post_delete, sender="contacts.Contact")
+@receiver(post_save, sender="leads.Company")
+@receiver(post_delete, sender="leads.Company")
+@receiver(post_save, sender="leads.Lead")
+@receiver(post_delete, sender="leads.Lead")
+@receiver(post_save, sender="teams.Teams")
+@receiver(post_delete, sender="teams.Teams")
+def invalidate_metadata(sender, instance, **kwargs):
+    """Rows listed by /api/meta/ changed: the org's ETag has to change too"""
+    invalidate_org_metadata(instance.org_id)
+
+
+@receiver(m2m_changed, sender="accounts.Account_assigned_to")
+@receiver(m2m_changed, sender="contacts.Contact_assigned_to")
+def invalidate_metadata_assignments(sender, instance, **kwargs):
+    # assignments decide which accounts/contacts a restricted profile sees
+    invalidate_org_metadata(getattr(instance, "org_id", None))
+
+
+@receiver(post_save, sender="accounts.Tags")
+@receiver(post_delete, sender="accounts.Tags")
+def invalidate_tags_metadata(sender, instance, **kwargs):
+    invalidate_all_metadata()
+
+
+@receiver(post_save, sender="accounts.Account")
+@receiver(post_delete, sender="accounts.Account")
+@receiver(post_save, sender="contacts.Contact")
+@receiver(post_delete, sender="contacts.Contact")
+@receiver(post_save, sender="leads.Lead")
+@receiver(post_delete, sender="leads.Lead")
+@receiver(post_save, sender="opportunity.Opportunity")
+@receiver(post_delete, sender="opportunity.Opportunity")
+def invalidate_dashboard(sender, instance, **kwargs):
+    """Rows counted by /api/dashboard/ changed"""
+    invalidate_org_dashboard(instance.org_id)
+
+
+@receiver(m2m_changed, sender="accounts.Account_assigned_to")
+@receiver(m2m_changed, sender="contacts.Contact_assigned_to")
+@receiver(m2m_changed, sender="leads.Lead_assigned_to")
+@receiver(m2m_changed, sender="opportunity.Opportunity_assigned_to")
+def invalidate_dashboard_assignments(sender, instance, **kwargs):
+    # assignments decide what the dashboard of a restricted profile counts
+    invalidate_org_dashboard(getattr(instance, "org_id", None))
+
+
+@receiver(post_save, sender="accounts.Account")
+@receiver(post_save, sender="cases.Case")
+@receiver(post_save, sender="contacts.Contact")
+@receiver(post_save, sender="leads.Lead")
+@receiver(post_save, sender="opportunity.Opportunity")
+def index_search_entry(sender, instance, raw=False, **kwargs):
+    """Keep the search index (common.search) up to date, row by row"""
+    if not raw:
+        index_objects([instance])
+
+
+@receiver(post_delete, sender="accounts.Account")
+@receiver(post_delete, sender="cases.Case")
+@receiver(post_delete, sender="contacts.Contact")
+@receiver(post_delete, sender="leads.Lead")
+@receiver(post_delete, sender="opportunity.Opportunity")
+def unindex_search_entry(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+# users, teams (with their members), companies and contact choices of an org
+lookups.invalidate_on(
+    Profile,
+    "contacts.Contact",
+    "leads.Company",
+    "teams.Teams",
+    "teams.Teams_users",
+)
+# tags are global, and so are the roles nested in the team members
+lookups.invalidate_on(
+    "accounts.Tags",
+    "role_permission_control.Role",
+    "role_permission_control.RolePermission",
+    per_org=False,
+)
@@ -0,0 +1,105 @@
+import json
+import uuid
+import zlib
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Import previews and job results are written by one process (a web worker,
+# a celery worker) and read by another, so they live in the "imports" cache,
+# a store shared by every process (Redis when IMPORT_STAGING_URL is set).
+# A stage keeps its rows in compressed chunks of positional values, with the
+# column names stored once, and every key expires after its timeout.
+STAGING_CHUNK_SIZE = 500
+STAGE_KEY = "staging:{stage_id}"
+STAGE_CHUNK_KEY = "staging:{stage_id}:{index}"
+
+
+def get_staging_cache():
+    return caches[getattr(settings, "IMPORT_STAGING_CACHE", "imports")]
+
+
+def get_staging_timeout():
+    return getattr(settings, "IMPORT_STAGING_TIMEOUT", 600)
+
+
+def pack_rows(rows, columns):
+    values = [[row.get(column) for column in columns] for row in rows]
+    return zlib.compress(json.dumps(values, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack_rows(data, columns):
+    return [dict(zip(columns, values)) for values in json.loads(zlib.decompress(data))]
+
+
+def create_stage(rows, columns, org_id=None, timeout=None, chunk_size=None):
+    """
+    Stage an iterable of dict rows (JSON values) and return the stage id.
+
+    ``rows`` is consumed chunk by chunk; the stage becomes visible once its
+    last chunk is written.
+    """
+    staging_cache = get_staging_cache()
+    timeout = get_staging_timeout() if timeout is None else timeout
+    chunk_size = chunk_size or STAGING_CHUNK_SIZE
+    stage_id = uuid.uuid4().hex
+    columns = list(columns)
+    chunks = count = 0
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        staging_cache.set(
+            STAGE_CHUNK_KEY.format(stage_id=stage_id, index=chunks),
+            pack_rows(chunk, columns),
+            timeout,
+        )
+        chunks += 1
+        count += len(chunk)
+    stage = {
+        "columns": columns,
+        "chunks": chunks,
+        "count": count,
+        "org_id": str(org_id) if org_id else None,
+    }
+    staging_cache.set(STAGE_KEY.format(stage_id=stage_id), stage, timeout)
+    return stage_id
+
+
+def get_stage(stage_id, org_id=None):
+    """Metadata of a stage, or None once expired (or staged for another org)"""
+    stage = get_staging_cache().get(STAGE_KEY.format(stage_id=stage_id))
+    if stage is None or (org_id is not None and stage["org_id"] != str(org_id)):
+        return None
+    return stage
+
+
+def iter_stage_rows(stage_id, limit=None):
+    """Yield the rows of a stage, reading one chunk at a time"""
+    stage = get_stage(stage_id)
+    if stage is None:
+        return
+    staging_cache = get_staging_cache()
+    yielded = 0
+    for index in range(stage["chunks"]):
+        data = staging_cache.get(STAGE_CHUNK_KEY.format(stage_id=stage_id, index=index))
+        if data is None:
+            raise LookupError("Stage %s expired while being read" % stage_id)
+        for row in unpack_rows(data, stage["columns"]):
+            if limit is not None and yielded >= limit:
+                return
+            yielded += 1
+            yield row
+
+
+def delete_stage(stage_id):
+    stage = get_stage(stage_id)
+    keys = [STAGE_KEY.format(stage_id=stage_id)]
+    if stage is not None:
+        keys += [
+            STAGE_CHUNK_KEY.format(stage_id=stage_id, index=index)
+            for index in range(stage["chunks"])
+        ]
+    get_staging_cache().delete_many(keys)
@@ -10,6 +10,30 @@ organization_params = [
     organization_params_in_header,
 ]
 
+dashboard_params = [
+    organization_params_in_header,
+    OpenApiParameter("recent", OpenApiTypes.INT, OpenApiParameter.QUERY),
+    OpenApiParameter("refresh", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+]
+
+calendar_params = [
+    organization_params_in_header,
+    OpenApiParameter("from", OpenApiTypes.DATE, OpenApiParameter.QUERY, required=True),
+    OpenApiParameter("to", OpenApiTypes.DATE, OpenApiParameter.QUERY, required=True),
+]
+
+search_params = [
+    organization_params_in_header,
+    OpenApiParameter("q", OpenApiTypes.STR, OpenApiParameter.QUERY, required=True),
+    OpenApiParameter(
+        "type",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        description="Comma separated: lead, contact, account, opportunity, case",
+    ),
+    OpenApiParameter("limit", OpenApiTypes.INT, OpenApiParameter.QUERY),
+]
+
 roles = Role.objects.values_list("name", flat=True)
 user_list_params = [
     organization_params_in_header,
@@ -24,6 +48,12 @@ user_list_params = [
         OpenApiParameter.QUERY,
         enum=["Active", "In Active"],
     ),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=["exact", "cached", "approximate"],
+    ),
 ]
 
 document_get_params = [
@@ -36,5 +66,16 @@ document_get_params = [
         enum=["Active", "In Active"],
     ),
     OpenApiParameter("shared_to", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "pagination", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["cursor"]
+    ),
+    OpenApiParameter("active_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("inactive_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=["exact", "cached", "approximate"],
+    ),
 ]
 
@@ -10,10 +10,27 @@ from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
 
 from common.models import Comment, Profile, User
+from common.notifications import (
+    NOTIFICATION_TASK_RETRIES,
+    render_messages,
+    send_or_retry,
+)
+from common.outbox import drain_outbox
 from common.token_generator import account_activation_token
 
 app = Celery("redis://")
 
+MENTION_SUBJECTS = {
+    "accounts": "New comment on Account. ",
+    "contacts": "New comment on Contact. ",
+    "leads": "New comment on Lead. ",
+    "opportunity": "New comment on Opportunity. ",
+    "cases": "New comment on Case. ",
+    "tasks": "New comment on Task. ",
+    "invoices": "New comment on Invoice. ",
+    "events": "New comment on Event. ",
+}
+
 
 @app.task
 def send_email_to_new_user(user_id):
@@ -57,72 +74,39 @@ def send_email_to_new_user(user_id):
         msg.send()
 
 
-@app.task
+@app.task(bind=True, max_retries=NOTIFICATION_TASK_RETRIES)
 def send_email_user_mentions(
+    self,
     comment_id,
     called_from,
+    deferred_to=None,
 ):
     """Send Mail To Mentioned Users In The Comment"""
-    comment = Comment.objects.filter(id=comment_id).first()
-    if comment:
-        comment_text = comment.comment
-        comment_text_list = comment_text.split()
-        recipients = []
-        for comment_text in comment_text_list:
-            if comment_text.startswith("@"):
-                if comment_text.strip("@").strip(",") not in recipients:
-                    if User.objects.filter(
-                        username=comment_text.strip("@").strip(","), is_active=True
-                    ).exists():
-                        email = (
-                            User.objects.filter(
-                                username=comment_text.strip("@").strip(",")
-                            )
-                            .first()
-                            .email
-                        )
-                        recipients.append(email)
-
-        context = {}
-        context["commented_by"] = comment.commented_by
-        context["comment_description"] = comment.comment
-        subject = None
-        if called_from == "accounts":
-            subject = "New comment on Account. "
-        elif called_from == "contacts":
-            subject = "New comment on Contact. "
-        elif called_from == "leads":
-            subject = "New comment on Lead. "
-        elif called_from == "opportunity":
-            subject = "New comment on Opportunity. "
-        elif called_from == "cases":
-            subject = "New comment on Case. "
-        elif called_from == "tasks":
-            subject = "New comment on Task. "
-        elif called_from == "invoices":
-            subject = "New comment on Invoice. "
-        elif called_from == "events":
-            subject = "New comment on Event. "
-        if subject:
-            context["url"] = settings.DOMAIN_NAME
-        else:
-            context["url"] = ""
-        # subject = 'Django CRM : comment '
-        if recipients:
-            for recipient in recipients:
-                recipients_list = [
-                    recipient,
-                ]
-                context["mentioned_user"] = recipient
-                html_content = render_to_string("comment_email.html", context=context)
-                msg = EmailMessage(
-                    subject,
-                    html_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=recipients_list,
-                )
-                msg.content_subtype = "html"
-                msg.send()
+    comment = (
+        Comment.objects.select_related("commented_by__user", "commented_by__org")
+        .filter(id=comment_id)
+        .first()
+    )
+    if not comment:
+        return 0
+    # indexed when the comment was saved (see common.signals)
+    mentioned = comment.mentions.filter(is_active=True).select_related("user")
+    subject = MENTION_SUBJECTS.get(called_from, "")
+    context = {
+        "commented_by": comment.commented_by,
+        "comment_description": comment.comment,
+        "url": settings.DOMAIN_NAME if subject else "",
+    }
+    messages = render_messages(
+        subject,
+        "comment_email.html",
+        context,
+        (
+            (profile.user.email, {"mentioned_user": profile.user.email})
+            for profile in mentioned
+        ),
+    )
+    return send_or_retry(messages, self, deferred_to)
 
 
 @app.task
@@ -304,3 +288,9 @@ def send_email_to_reset_password(user_email):
         )
         msg.content_subtype = "html"
         msg.send()
+
+
+@app.task
+def drain_notification_outbox():
+    """Send the pending notifications of the outbox (run periodically)"""
+    return drain_outbox()
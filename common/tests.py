@@ -0,0 +1,824 @@
+import smtplib
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core import mail
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.api_keys import (
+    hash_api_key,
+    org_api_keys,
+    resolve_org_api_key,
+    resolve_site_api_key,
+)
+from common.caching import LRUCache, TieredCache
+from common.counts import APPROXIMATE, CACHED, EXACT, count_queryset
+from common.dashboard import get_dashboard
+from common.lookups import get_org_companies, get_org_users, lookups
+from common.mentions import extract_handles
+from common.models import APISettings, Comment, Notification, Org, Profile, User
+from common.notifications import (
+    deliver_messages,
+    is_transient,
+    notify_profiles,
+    send_messages,
+)
+from common.outbox import (
+    NOTIFICATION_CLAIM_TIMEOUT,
+    NOTIFICATION_MAX_ATTEMPTS,
+    drain_outbox,
+)
+from common.pagination import decode_cursor, encode_cursor
+from common.prefetch import eager_load
+from common.tasks import send_email_user_mentions
+from common.staging import (
+    create_stage,
+    delete_stage,
+    get_stage,
+    get_staging_cache,
+    iter_stage_rows,
+)
+from contacts.models import Contact
+from invoices.models import Invoice
+from invoices.tasks import queue_invoice_assigned_notifications
+from leads.models import Company, Lead
+from leads.serializer import LeadSerializer
+from leads.tasks import queue_lead_assigned_notifications, send_email_to_assigned_user
+from opportunity.models import Opportunity
+from teams.models import Teams
+from role_permission_control.models import Role
+
+
+class AuthPipelineTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="authuser", email="auth@example.com")
+        self.org = Org.objects.create(name="authorg")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+        self.refresh_token = str(token)
+
+    def test_profile_resolved_from_cache(self):
+        response = self.client.get("/api/profile/")
+        self.assertEqual(response.status_code, 200)
+        # only the role permissions listed by ProfileSerializer hit the db
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/profile/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["user_obj"]["id"], str(self.profile.id))
+
+    def test_profile_save_invalidates_cache(self):
+        self.client.get("/api/profile/")
+        self.profile.is_active = False
+        self.profile.save()
+        response = self.client.get("/api/profile/")
+        self.assertEqual(response.status_code, 403)
+
+    def test_token_and_api_key_together_are_rejected(self):
+        other = Org.objects.create(name="keyowner")
+        Profile.objects.create(
+            user=User.objects.create(username="keyadmin", email="ka@example.com"),
+            org=other,
+            role=Role.objects.get(name="ADMIN"),
+        )
+        response = self.client.get("/api/profile/", HTTP_TOKEN=other.api_key)
+        self.assertEqual(response.status_code, 403)
+
+    def test_refresh_token_is_rejected(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.refresh_token}")
+        response = client.get("/api/org/")
+        self.assertEqual(response.status_code, 401)
+
+
+class APIKeyTest(TestCase):
+    def setUp(self):
+        org_api_keys.clear()
+        self.user = User.objects.create(username="keyuser", email="key@example.com")
+        self.org = Org.objects.create(name="keyorg")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+
+    def test_key_is_stored_hashed(self):
+        self.assertEqual(self.org.api_key_hash, hash_api_key(self.org.api_key))
+        self.assertEqual(len(self.org.api_key_hash), 64)
+
+    def test_org_key_resolution_is_cached(self):
+        org, profile, user = resolve_org_api_key(self.org.api_key)
+        self.assertEqual((org, profile, user), (self.org, self.profile, self.user))
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_org_api_key(self.org.api_key)[1], self.profile)
+        self.assertIsNone(resolve_org_api_key("not-a-key"))
+
+    def test_token_header_authenticates(self):
+        client = APIClient()
+        client.credentials(HTTP_TOKEN=self.org.api_key)
+        response = client.get("/api/profile/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["user_obj"]["id"], str(self.profile.id))
+
+    def test_org_delete_revokes_key(self):
+        resolve_org_api_key(self.org.api_key)
+        api_key = self.org.api_key
+        self.org.delete()
+        self.assertIsNone(resolve_org_api_key(api_key))
+
+    def test_profile_save_evicts_own_org_key_only(self):
+        other = Org.objects.create(name="otherkeyorg")
+        Profile.objects.create(
+            user=User.objects.create(username="otherkey", email="ok@example.com"),
+            org=other,
+            role=Role.objects.get(name="ADMIN"),
+        )
+        resolve_org_api_key(self.org.api_key)
+        resolve_org_api_key(other.api_key)
+        self.profile.is_active = False
+        self.profile.save()
+        self.assertIsNone(resolve_org_api_key(self.org.api_key))
+        with self.assertNumQueries(0):
+            resolve_org_api_key(other.api_key)
+
+    def test_unrelated_profile_save_keeps_key(self):
+        resolve_org_api_key(self.org.api_key)
+        Profile.objects.create(
+            user=User.objects.create(username="keyagent", email="kg@example.com"),
+            org=self.org,
+            role=Role.objects.get(name="ADMIN"),
+            is_active=False,
+        )
+        with self.assertNumQueries(0):
+            resolve_org_api_key(self.org.api_key)
+
+    def test_site_key_resolution(self):
+        api_setting = APISettings.objects.create(
+            title="site", website="https://example.com", org=self.org
+        )
+        self.assertEqual(resolve_site_api_key(api_setting.apikey), api_setting)
+        with self.assertNumQueries(0):
+            resolve_site_api_key(api_setting.apikey)
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="pageuser", email="page@example.com")
+        self.org = Org.objects.create(name="pageorg")
+        Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        for i in range(5):
+            Contact.objects.create(
+                first_name=f"contact{i}",
+                last_name="page",
+                primary_email=f"contact{i}@example.com",
+                org=self.org,
+            )
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+
+    def test_cursor_round_trip(self):
+        contact = Contact.objects.first()
+        self.assertEqual(
+            decode_cursor(encode_cursor(contact.created_at, contact.pk)),
+            (contact.created_at, contact.pk),
+        )
+
+    def test_pages_through_contacts(self):
+        seen = []
+        params = {"pagination": "cursor", "limit": 2}
+        while True:
+            response = self.client.get("/api/contacts/", params)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("contacts_count", response.data)
+            seen += [contact["id"] for contact in response.data["contact_obj_list"]]
+            if response.data["next_cursor"] is None:
+                break
+            params["cursor"] = response.data["next_cursor"]
+        expected = Contact.objects.order_by("-created_at", "-id").values_list(
+            "id", flat=True
+        )
+        self.assertEqual(seen, [str(pk) for pk in expected])
+
+    def test_offset_pages_report_count_mode(self):
+        response = self.client.get("/api/contacts/", {"count": "exact", "limit": 2})
+        self.assertEqual(response.data["contacts_count"], 5)
+        self.assertEqual(response.data["count_mode"], "exact")
+        self.assertEqual(response.data["offset"], 2)
+        response = self.client.get("/api/contacts/", {"limit": 2, "offset": 4})
+        self.assertEqual(response.data["count_mode"], "exact")
+        self.assertIsNone(response.data["offset"])
+        response = self.client.get("/api/contacts/", {"count": "cached"})
+        self.assertEqual(response.data["contacts_count"], 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(
+            "/api/contacts/", {"pagination": "cursor", "cursor": "bogus"}
+        )
+        self.assertEqual(response.status_code, 404)
+        # a well-formed date with a tampered id
+        cursor = encode_cursor(timezone.now(), "not-a-uuid")
+        response = self.client.get(
+            "/api/contacts/", {"pagination": "cursor", "cursor": cursor}
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class CountServiceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Org.objects.create(name="countorg")
+        for i in range(3):
+            Contact.objects.create(
+                first_name=f"count{i}",
+                last_name="count",
+                primary_email=f"count{i}@example.com",
+                org=self.org,
+            )
+        self.queryset = Contact.objects.filter(org=self.org)
+
+    def test_exact(self):
+        self.assertEqual(count_queryset(self.queryset, self.org.id), (3, EXACT))
+
+    def test_cached_per_filter(self):
+        self.assertEqual(
+            count_queryset(self.queryset, self.org.id, mode=CACHED), (3, EXACT)
+        )
+        Contact.objects.filter(first_name="count0").delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                count_queryset(self.queryset, self.org.id, mode=CACHED), (3, CACHED)
+            )
+        filtered = self.queryset.filter(first_name="count1")
+        self.assertEqual(count_queryset(filtered, self.org.id, mode=CACHED), (1, EXACT))
+
+    def test_approximate_falls_back_below_threshold(self):
+        count, mode = count_queryset(self.queryset, self.org.id, mode=APPROXIMATE)
+        self.assertEqual(count, 3)
+        self.assertNotEqual(mode, APPROXIMATE)
+
+
+class MetadataTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="metauser", email="meta@example.com")
+        self.org = Org.objects.create(name="metaorg")
+        Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get("/api/meta/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("countries", response.data)
+        etag = response["ETag"]
+        response = self.client.get("/api/meta/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Contact.objects.create(
+            first_name="meta",
+            last_name="contact",
+            primary_email="meta.contact@example.com",
+            org=self.org,
+        )
+        response = self.client.get("/api/meta/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["contacts"][0]["first_name"], "meta")
+
+    def test_list_without_lookups(self):
+        response = self.client.get("/api/leads/", {"lookups": "false"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("open_leads", response.data)
+        self.assertNotIn("countries", response.data)
+        response = self.client.get("/api/leads/")
+        self.assertIn("countries", response.data)
+
+
+class EagerLoadingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.org = Org.objects.create(name="eagerorg")
+        self.profiles = [
+            Profile.objects.create(
+                user=User.objects.create(
+                    username=f"eager{i}", email=f"eager{i}@ex.com"
+                ),
+                org=self.org,
+                role=Role.objects.get(name="ADMIN"),
+            )
+            for i in range(3)
+        ]
+        self.team = Teams.objects.create(name="eager", description="", org=self.org)
+        self.team.users.set(self.profiles[:2])
+        self.contact = Contact.objects.create(
+            first_name="eager",
+            last_name="contact",
+            primary_email="e@ex.com",
+            org=self.org,
+        )
+        self.contact.teams.set([self.team])
+        self.contact.assigned_to.set(self.profiles[1:])
+
+    def create_leads(self, count):
+        for i in range(count):
+            lead = Lead.objects.create(title=f"eager lead {i}", org=self.org)
+            lead.contacts.set([self.contact])
+            lead.assigned_to.set(self.profiles)
+            lead.teams.set([self.team])
+
+    def serialize_leads(self):
+        queryset = eager_load(Lead.objects.filter(org=self.org), LeadSerializer)
+        return LeadSerializer(queryset, many=True).data
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.create_leads(1)
+        with CaptureQueriesContext(connection) as one_lead:
+            self.serialize_leads()
+        self.create_leads(4)
+        with self.assertNumQueries(len(one_lead.captured_queries)):
+            data = self.serialize_leads()
+        self.assertEqual(len(data), 5)
+        self.assertEqual(len(data[0]["assigned_to"]), 3)
+
+    def test_team_users_served_from_prefetch(self):
+        expected = Contact.objects.get(pk=self.contact.pk)
+        contact = Contact.objects.prefetch_related("teams__users", "assigned_to").get(
+            pk=self.contact.pk
+        )
+        with self.assertNumQueries(0):
+            team_users = contact.get_team_users
+            team_and_assigned = contact.get_team_and_assigned_users
+            not_in_teams = contact.get_assigned_users_not_in_teams
+        self.assertEqual(team_users, list(expected.get_team_users))
+        self.assertEqual(team_and_assigned, list(expected.get_team_and_assigned_users))
+        self.assertEqual(not_in_teams, [self.profiles[2]])
+
+
+class SparseFieldsetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="sparseuser", email="sparse@ex.com")
+        self.org = Org.objects.create(name="sparseorg")
+        Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        for i in range(3):
+            Lead.objects.create(
+                title=f"sparse lead {i}", status="assigned", org=self.org
+            )
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+
+    def test_only_requested_fields(self):
+        response = self.client.get(
+            "/api/leads/", {"fields": "title,status", "lookups": "false"}
+        )
+        self.assertEqual(response.status_code, 200)
+        leads = response.data["open_leads"]["open_leads"]
+        self.assertEqual(len(leads), 3)
+        self.assertEqual(set(leads[0]), {"id", "title", "status"})
+
+    def test_empty_fields_uses_flat_serializer(self):
+        response = self.client.get("/api/leads/", {"fields": "", "lookups": "false"})
+        lead = response.data["open_leads"]["open_leads"][0]
+        self.assertIn("company_name", lead)
+        self.assertNotIn("assigned_to", lead)
+
+    def test_unknown_field(self):
+        response = self.client.get("/api/leads/", {"fields": "title,bogus"})
+        self.assertEqual(response.status_code, 400)
+
+
+class DashboardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="dashuser", email="dash@ex.com")
+        self.org = Org.objects.create(name="dashorg")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        for i, (status, source) in enumerate(
+            [("assigned", "call"), ("assigned", "email"), ("in process", "call")]
+        ):
+            Lead.objects.create(
+                title=f"dash lead {i}", status=status, source=source, org=self.org
+            )
+        Lead.objects.create(title="closed lead", status="closed", org=self.org)
+        for i, (stage, amount) in enumerate(
+            [("PROSPECTING", 100), ("PROSPECTING", 50), ("CLOSED WON", 25)]
+        ):
+            Opportunity.objects.create(
+                name=f"dash opp {i}", stage=stage, amount=amount, org=self.org
+            )
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+
+    def test_counts_aggregates_and_recent(self):
+        response = self.client.get("/api/dashboard/", {"recent": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["leads_count"], 3)
+        self.assertEqual(response.data["opportunities_count"], 3)
+        self.assertEqual(len(response.data["leads"]), 2)
+        self.assertEqual(response.data["leads"][0]["title"], "dash lead 2")
+        pipeline = {row["stage"]: row for row in response.data["pipeline_by_stage"]}
+        self.assertEqual(pipeline["PROSPECTING"]["count"], 2)
+        self.assertEqual(pipeline["PROSPECTING"]["amount"], 150)
+        self.assertEqual(response.data["pipeline_amount"], 175)
+        by_source = {
+            row["source"]: row["count"] for row in response.data["leads_by_source"]
+        }
+        self.assertEqual(by_source, {"call": 2, "email": 1})
+
+    def test_cached_until_write(self):
+        get_dashboard(self.profile, self.user)
+        with self.assertNumQueries(0):
+            dashboard, cached = get_dashboard(self.profile, self.user)
+        self.assertTrue(cached)
+        Lead.objects.create(title="new lead", status="assigned", org=self.org)
+        dashboard, cached = get_dashboard(self.profile, self.user)
+        self.assertFalse(cached)
+        self.assertEqual(dashboard["leads_count"], 4)
+
+    def test_endpoint_serves_cache_unless_refresh(self):
+        self.client.get("/api/dashboard/")
+        response = self.client.get("/api/dashboard/")
+        self.assertEqual(response.data["count_modes"]["leads"], "cached")
+        self.assertEqual(response.data["leads_count"], 3)
+        Lead.objects.bulk_create([Lead(title="bulk lead", org=self.org)])
+        response = self.client.get("/api/dashboard/")
+        self.assertEqual(response.data["leads_count"], 3)
+        response = self.client.get("/api/dashboard/", {"refresh": "true"})
+        self.assertEqual(response.data["count_modes"]["leads"], "exact")
+        self.assertEqual(response.data["leads_count"], 4)
+
+    def test_restricted_profile_sees_own_rows(self):
+        user = User.objects.create(username="dashsales", email="sales@ex.com")
+        profile = Profile.objects.create(
+            user=user, org=self.org, role=Role.objects.create(name="Sales")
+        )
+        lead = Lead.objects.get(title="dash lead 0")
+        lead.assigned_to.set([profile, self.profile])
+        dashboard, cached = get_dashboard(profile, user)
+        self.assertEqual(dashboard["leads_count"], 1)
+        self.assertEqual(
+            dashboard["leads_by_status"], [{"status": "assigned", "count": 1}]
+        )
+        self.assertEqual(dashboard["opportunities_count"], 0)
+
+
+class StagingTest(TestCase):
+    def setUp(self):
+        get_staging_cache().clear()
+
+    def test_rows_are_chunked_and_compact(self):
+        rows = ({"a": i, "b": [str(i)], "c": None} for i in range(7))
+        stage_id = create_stage(rows, ["a", "b", "c"], org_id="org", chunk_size=3)
+        stage = get_stage(stage_id, org_id="org")
+        self.assertEqual((stage["count"], stage["chunks"]), (7, 3))
+        self.assertIsNone(get_stage(stage_id, org_id="other"))
+        chunk = get_staging_cache().get(f"staging:{stage_id}:0")
+        self.assertIsInstance(chunk, bytes)
+        self.assertEqual(
+            list(iter_stage_rows(stage_id, limit=4)),
+            [{"a": i, "b": [str(i)], "c": None} for i in range(4)],
+        )
+        self.assertEqual(len(list(iter_stage_rows(stage_id))), 7)
+        delete_stage(stage_id)
+        self.assertIsNone(get_stage(stage_id))
+        self.assertIsNone(get_staging_cache().get(f"staging:{stage_id}:2"))
+
+    def test_keys_expire(self):
+        stage_id = create_stage([{"a": 1}], ["a"], timeout=0)
+        self.assertIsNone(get_stage(stage_id))
+
+
+class CachingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        lookups.local.clear()
+        self.user = User.objects.create(username="cacheuser", email="cache@ex.com")
+        self.org = Org.objects.create(name="cacheorg")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+
+    def test_lru_evicts_and_expires(self):
+        lru = LRUCache(maxsize=2, timeout=60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertEqual((lru.get("a"), lru.get("b"), lru.get("c")), (1, None, 3))
+        expired = LRUCache(timeout=0)
+        expired.set("a", 1)
+        self.assertIsNone(expired.get("a"))
+
+    def test_tiers_and_org_namespaces(self):
+        tiered = TieredCache("test", local_timeout=60)
+        loads = []
+        tiered.get_or_set("key", lambda: loads.append(1) or "one", org_id=1)
+        tiered.local.clear()
+        # served by the shared tier, then by the local one
+        self.assertEqual(tiered.get_or_set("key", lambda: "two", org_id=1), "one")
+        self.assertEqual(tiered.get("key", org_id=1), "one")
+        self.assertIsNone(tiered.get("key", org_id=2))
+        tiered.invalidate(org_id=2)
+        self.assertEqual(tiered.get("key", org_id=1), "one")
+        tiered.invalidate(org_id=1)
+        self.assertIsNone(tiered.get("key", org_id=1))
+        tiered.set("key", "three", org_id=2)
+        tiered.invalidate()
+        self.assertIsNone(tiered.get("key", org_id=2))
+        self.assertEqual(loads, [1])
+
+    def test_in_process_shared_tier_expires_with_the_local_one(self):
+        # other processes never see the version bumps of a LocMemCache
+        tiered = TieredCache("test", local_timeout=30, timeout=300)
+        self.assertEqual(tiered.shared_timeout, 30)
+
+    def test_lookups_are_memoized_and_invalidated_on_save(self):
+        company = Company.objects.create(name="Acme", org=self.org)
+        self.assertEqual(get_org_companies(self.org.id)[0]["name"], "Acme")
+        self.assertEqual(len(get_org_users(self.org.id)), 1)
+        with self.assertNumQueries(0):
+            get_org_users(self.org.id)
+            get_org_companies(self.org.id)
+        company.name = "Acme Inc"
+        company.save()
+        self.assertEqual(get_org_companies(self.org.id)[0]["name"], "Acme Inc")
+        uncached = get_org_companies.uncached(self.org.id)
+        self.assertEqual(uncached[0]["name"], "Acme Inc")
+        self.profile.is_active = False
+        self.profile.save()
+        self.assertEqual(get_org_users(self.org.id), [])
+
+    def test_view_responses_are_cached_per_profile(self):
+        client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+        Company.objects.create(name="Acme", org=self.org)
+        self.assertEqual(len(client.get("/api/leads/companies").data["data"]), 1)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/leads/companies")
+        self.assertEqual(len(response.data["data"]), 1)
+        self.assertFalse(any("company" in q["sql"] for q in queries.captured_queries))
+        Company.objects.create(name="Globex", org=self.org)
+        self.assertEqual(len(client.get("/api/leads/companies").data["data"]), 2)
+
+
+class FlakyConnection:
+    """Mail backend failing the first ``failures`` sends with ``error``"""
+
+    def __init__(self, failures, error=smtplib.SMTPServerDisconnected):
+        self.failures = failures
+        self.error = error
+        self.sent = []
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        if self.failures:
+            self.failures -= 1
+            raise self.error()
+        self.sent.extend(messages)
+        return len(messages)
+
+
+class NotificationTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="mailorg")
+        role = Role.objects.get(name="ADMIN")
+        self.profiles = [
+            Profile.objects.create(
+                user=User.objects.create(username=f"mail{i}", email=f"m{i}@ex.com"),
+                org=self.org,
+                role=role,
+                is_active=i < 2,
+            )
+            for i in range(3)
+        ]
+
+    def test_active_recipients_are_fetched_once(self):
+        with self.assertNumQueries(1):
+            sent = notify_profiles(
+                [profile.id for profile in self.profiles],
+                "Subject",
+                "assigned_to/leads_assigned.html",
+                {"url": "http://crm"},
+            )
+        self.assertEqual(sent, 2)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox), ["m0@ex.com", "m1@ex.com"]
+        )
+        self.assertEqual(mail.outbox[0].content_subtype, "html")
+
+    def test_transient_failures_are_retried(self):
+        messages = [mail.EmailMessage("s", "b", to=["a@ex.com"]) for _ in range(2)]
+        # a dropped connection is reopened and the message sent again
+        connection = FlakyConnection(failures=1)
+        failed = send_messages(messages, connection=connection)
+        self.assertEqual((failed, connection.sent), ([], messages))
+        connection = FlakyConnection(failures=10)
+        failed = send_messages(messages[:1], max_retries=2, connection=connection)
+        self.assertEqual(failed, messages[:1])
+        self.assertEqual(connection.opened, 3)
+
+    def test_refused_messages_are_not_retried(self):
+        messages = [mail.EmailMessage("s", "b", to=["a@ex.com"]) for _ in range(2)]
+
+        def refused():
+            return smtplib.SMTPRecipientsRefused({"a@ex.com": (550, b"unknown")})
+
+        connection = FlakyConnection(failures=1, error=refused)
+        deferred, refused_messages = deliver_messages(messages, connection=connection)
+        self.assertEqual((deferred, refused_messages), ([], messages[:1]))
+        self.assertEqual((connection.opened, connection.sent), (2, messages[1:]))
+        # a 4xx reply may pass
+        greylisted = smtplib.SMTPResponseException(451, b"try again later")
+        self.assertTrue(is_transient(greylisted))
+        self.assertFalse(is_transient(smtplib.SMTPSenderRefused(553, b"", "x")))
+
+    def test_lead_assignment_task(self):
+        lead = Lead.objects.create(title="mail lead", org=self.org)
+        send_email_to_assigned_user([self.profiles[0].id], lead.id)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["m0@ex.com"])
+
+    def test_task_is_retried_for_deferred_messages(self):
+        lead = Lead.objects.create(title="retried lead", org=self.org)
+        # the first message fails on its retry too, the second one is sent
+        connection = FlakyConnection(failures=2)
+        with mock.patch(
+            "common.notifications.get_connection", return_value=connection
+        ):
+            send_email_to_assigned_user.apply(
+                ([profile.id for profile in self.profiles], lead.id)
+            )
+        # the retry of the task only sends the deferred message
+        self.assertEqual(
+            sorted(message.to[0] for message in connection.sent),
+            ["m0@ex.com", "m1@ex.com"],
+        )
+
+
+class OutboxTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="outboxorg")
+        role = Role.objects.get(name="ADMIN")
+        self.profiles = [
+            Profile.objects.create(
+                user=User.objects.create(username=f"box{i}", email=f"b{i}@ex.com"),
+                org=self.org,
+                role=role,
+            )
+            for i in range(2)
+        ]
+        self.leads = [
+            Lead.objects.create(title=f"outbox lead {i}", org=self.org)
+            for i in range(3)
+        ]
+
+    def test_notifications_are_merged_per_recipient(self):
+        first, second = self.profiles
+        for lead in self.leads:
+            queue_lead_assigned_notifications(lead, [first.id])
+        # a second notification about the same lead replaces the first one
+        queue_lead_assigned_notifications(self.leads[0], [first.id])
+        queue_lead_assigned_notifications(self.leads[1], [second.id])
+        self.assertEqual(Notification.objects.count(), 5)
+        self.assertEqual(drain_outbox(window=60), 0)
+        self.assertEqual(drain_outbox(window=0), 2)
+        self.assertFalse(Notification.objects.exists())
+        messages = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(messages["b0@ex.com"].subject, "You have 3 new notifications")
+        self.assertEqual(messages["b0@ex.com"].body.count("outbox lead 0"), 1)
+        self.assertEqual(messages["b1@ex.com"].subject, "Assigned a lead for you. ")
+        self.assertIn("outbox lead 1", messages["b1@ex.com"].body)
+
+    def test_inactive_recipients_are_dropped(self):
+        queue_lead_assigned_notifications(self.leads[0], [self.profiles[0].id])
+        User.objects.filter(id=self.profiles[0].user_id).update(is_active=False)
+        self.assertEqual(drain_outbox(window=0), 0)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(mail.outbox, [])
+
+    def test_invoice_assignment_goes_through_outbox(self):
+        invoice = Invoice.objects.create(
+            invoice_title="outbox invoice", name="client", org=self.org
+        )
+        user = self.profiles[0].user
+        queue_invoice_assigned_notifications(invoice, [user.id])
+        self.assertEqual(drain_outbox(window=0), 1)
+        self.assertEqual(mail.outbox[0].to, [user.email])
+        self.assertIn("outbox invoice", mail.outbox[0].body)
+
+    def test_deferred_rows_are_released_then_purged(self):
+        queue_lead_assigned_notifications(self.leads[0], [self.profiles[0].id])
+        connection = FlakyConnection(failures=100)
+        with mock.patch(
+            "common.notifications.get_connection", return_value=connection
+        ):
+            for attempt in range(1, NOTIFICATION_MAX_ATTEMPTS):
+                self.assertEqual(drain_outbox(window=0), 0)
+                notification = Notification.objects.get()
+                self.assertEqual(notification.attempts, attempt)
+                self.assertIsNone(notification.claimed_at)
+            self.assertEqual(drain_outbox(window=0), 0)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_claimed_rows_are_left_to_their_worker(self):
+        queue_lead_assigned_notifications(self.leads[0], [self.profiles[0].id])
+        now = timezone.now()
+        Notification.objects.update(claimed_at=now)
+        self.assertEqual(drain_outbox(window=0, now=now), 0)
+        self.assertTrue(Notification.objects.exists())
+        # the claim of a worker that died is taken over
+        later = now + timedelta(seconds=NOTIFICATION_CLAIM_TIMEOUT + 1)
+        self.assertEqual(drain_outbox(window=0, now=later), 1)
+        self.assertFalse(Notification.objects.exists())
+
+
+class MentionTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="mentionorg")
+        other_org = Org.objects.create(name="otherorg")
+        role = Role.objects.get(name="ADMIN")
+        self.profiles = {}
+        for name, org in [("ann", self.org), ("bob.b", self.org), ("eve", other_org)]:
+            self.profiles[name] = Profile.objects.create(
+                user=User.objects.create(username=name, email=f"{name}@ex.com"),
+                org=org,
+                role=role,
+            )
+
+    def test_handles_are_extracted_in_one_pass(self):
+        self.assertEqual(
+            extract_handles("@ann, see @bob.b and mail x@ex.com or @ann"),
+            ["ann", "bob.b"],
+        )
+
+    def test_mentions_are_indexed_within_the_org(self):
+        comment = Comment.objects.create(
+            comment="@ann @bob.b @eve @nobody",
+            commented_by=self.profiles["ann"],
+        )
+        self.assertEqual(
+            set(comment.mentions.all()),
+            {self.profiles["ann"], self.profiles["bob.b"]},
+        )
+        comment.comment = "only @bob.b"
+        comment.save()
+        self.assertEqual(list(comment.mentions.all()), [self.profiles["bob.b"]])
+
+    def test_mentioned_profiles_are_emailed(self):
+        comment = Comment.objects.create(
+            comment="@ann @bob.b", commented_by=self.profiles["ann"]
+        )
+        with self.assertNumQueries(2):
+            sent = send_email_user_mentions(comment.id, "leads")
+        self.assertEqual(sent, 2)
+        self.assertEqual(mail.outbox[0].subject, "New comment on Lead. ")
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["ann@ex.com", "bob.b@ex.com"],
+        )
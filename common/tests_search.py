@@ -0,0 +1,96 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import Account
+from common.models import Org, Profile, SearchEntry, User
+from common.search import match_entries, search
+from contacts.models import Contact
+from leads.models import Lead
+from role_permission_control.models import Role
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="searchorg")
+        self.user = User.objects.create(username="searcher", email="search@ex.com")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        self.lead = Lead.objects.create(
+            title="Website redesign",
+            first_name="John",
+            last_name="Smith",
+            email="john.smith@acme.com",
+            org=self.org,
+        )
+        Contact.objects.create(
+            first_name="Jane",
+            last_name="Doe",
+            primary_email="jane@acme.com",
+            org=self.org,
+        )
+        self.account = Account.objects.create(
+            name="Acme Corp", email="info@corp.com", org=self.org
+        )
+        Account.objects.create(
+            name="Acme elsewhere",
+            email="info@else.com",
+            org=Org.objects.create(name="other"),
+        )
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+
+    def found(self, text, **kwargs):
+        results = search(self.profile, self.user, text, **kwargs)
+        return [(result["type"], result["title"]) for result in results]
+
+    def test_prefix_search_across_entities(self):
+        # title matches first, then the other fields; never another org
+        self.assertEqual(
+            self.found("acm"),
+            [
+                ("account", "Acme Corp"),
+                ("contact", "Jane Doe"),
+                ("lead", "Website redesign"),
+            ],
+        )
+        self.assertEqual(self.found("smi jo"), [("lead", "Website redesign")])
+        self.assertEqual(
+            self.found("acme", kinds=["contact"]), [("contact", "Jane Doe")]
+        )
+        self.assertEqual(self.found("redesign acmx"), [])
+        self.assertEqual(self.found("  "), [])
+
+    def test_index_follows_changes(self):
+        self.lead.title = "Mobile app"
+        self.lead.save()
+        self.assertEqual(self.found("mobile"), [("lead", "Mobile app")])
+        self.assertEqual(self.found("website"), [])
+        self.account.delete()
+        self.assertEqual(self.found("corp"), [])
+        self.assertEqual(SearchEntry.objects.filter(org=self.org).count(), 2)
+
+    def test_endpoint(self):
+        response = self.client.get("/api/search/?q=acme&type=account,lead")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["type"] for result in response.data["results"]],
+            ["account", "lead"],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "GIN indexes are PostgreSQL only")
+    def test_matches_are_found_through_the_gin_indexes(self):
+        with connection.cursor() as cursor:
+            # too few rows for the planner to prefer an index on its own
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = match_entries(SearchEntry.objects.all(), ["acm"]).explain()
+        self.assertIn("search_entry_document_idx", plan)
+        self.assertIn("search_entry_title_trgm_idx", plan)
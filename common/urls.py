@@ -13,6 +13,9 @@ urlpatterns = [
     path("auth/activate-user/", views.UserActivate.as_view()),
     path("auth/login/", views.CustomLoginView.as_view(), name="login"),
     path("dashboard/", views.ApiHomeView.as_view()),
+    path("calendar/", views.CalendarView.as_view()),
+    path("search/", views.SearchView.as_view()),
+    path("meta/", views.MetadataView.as_view()),
     path(
         "auth/refresh-token/",
         jwt_views.TokenRefreshView.as_view(),
@@ -13,22 +13,31 @@ from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.encoding import force_str
-from django.utils.http import urlsafe_base64_decode
+from django.utils.http import parse_etags, urlsafe_base64_decode
 from django.utils.translation import gettext as _
 from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import status, serializers
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from accounts.models import Account, Contact, Tags
-from accounts.serializer import AccountSerializer
+from accounts.models import Contact, Tags
 from cases.models import Case
 from cases.serializer import CaseSerializer
 
 from common import swagger_params1
+from common.agenda import CalendarRangeError, get_calendar, parse_calendar_range
+from common.counts import CACHED, EXACT
+from common.dashboard import get_dashboard, get_recent_limit, wants_refresh
+from common.metadata import get_metadata
 from common.models import APISettings, Document, Org, Profile, User
+from common.pagination import (
+    CountedLimitOffsetPagination,
+    KeysetPagination,
+    use_cursor_pagination,
+)
+from common.prefetch import eager_load
+from common.search import MAX_SEARCH_LIMIT, SEARCH_LIMIT, search
 
 # from common.serializer import *
 from common.serializer import (
@@ -64,8 +73,6 @@ from common.tasks import (
 from common.token_generator import account_activation_token
 
 from contacts.serializer import ContactSerializer
-from leads.models import Lead
-from leads.serializer import LeadSerializer
 from opportunity.models import Opportunity
 from opportunity.serializer import OpportunitySerializer
 from role_permission_control.serializer import RoleWithPermissionsSerializer
@@ -126,7 +133,7 @@ class AdminSignupView(APIView):
                 )
 
 
-class UsersListView(APIView, LimitOffsetPagination):
+class UsersListView(APIView, CountedLimitOffsetPagination):
     permission_classes = (IsAuthenticated,)
 
     @extend_schema(
@@ -205,7 +212,9 @@ class UsersListView(APIView, LimitOffsetPagination):
                 {"error": True, "errors": "Permission Denied"},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        queryset = Profile.objects.filter(org=request.profile.org).order_by("-id")
+        queryset = eager_load(
+            Profile.objects.filter(org=request.profile.org), ProfileSerializer
+        ).order_by("-id")
         params = request.query_params
         if params:
             if params.get("email"):
@@ -221,16 +230,10 @@ class UsersListView(APIView, LimitOffsetPagination):
             queryset_active_users.distinct(), self.request, view=self
         )
         active_users = ProfileSerializer(results_active_users, many=True).data
-        if results_active_users:
-            offset = queryset_active_users.filter(
-                id__gte=results_active_users[-1].id
-            ).count()
-            if offset == queryset_active_users.count():
-                offset = None
-        else:
-            offset = 0
+        offset = self.get_next_offset(results_active_users)
         context["active_users"] = {
             "active_users_count": self.count,
+            "count_mode": self.count_mode,
             "active_users": active_users,
             "offset": offset,
         }
@@ -240,16 +243,10 @@ class UsersListView(APIView, LimitOffsetPagination):
             queryset_inactive_users.distinct(), self.request, view=self
         )
         inactive_users = ProfileSerializer(results_inactive_users, many=True).data
-        if results_inactive_users:
-            offset = queryset_inactive_users.filter(
-                id__gte=results_inactive_users[-1].id
-            ).count()
-            if offset == queryset_inactive_users.count():
-                offset = None
-        else:
-            offset = 0
+        offset = self.get_next_offset(results_inactive_users)
         context["inactive_users"] = {
             "inactive_users_count": self.count,
+            "count_mode": self.count_mode,
             "inactive_users": inactive_users,
             "offset": offset,
         }
@@ -442,49 +439,79 @@ class UserDetailView(APIView):
         return Response({"status": "success"}, status=status.HTTP_200_OK)
 
 
+class MetadataView(APIView):
+    """Lookup tables of the org, left out of list responses by ?lookups=false"""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(parameters=swagger_params1.organization_params)
+    def get(self, request, format=None):
+        metadata, etag = get_metadata(request.profile)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        etags = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in etags or "*" in etags:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(metadata, status=status.HTTP_200_OK, headers=headers)
+
+
 # check_header not working
 class ApiHomeView(APIView):
     permission_classes = (IsAuthenticated,)
 
-    @extend_schema(parameters=swagger_params1.organization_params)
+    @extend_schema(parameters=swagger_params1.dashboard_params)
     def get(self, request, format=None):
-        accounts = Account.objects.filter(status="open", org=request.profile.org)
-        contacts = Contact.objects.filter(org=request.profile.org)
-        leads = Lead.objects.filter(org=request.profile.org).exclude(
-            Q(status="converted") | Q(status="closed")
+        dashboard, cached = get_dashboard(
+            request.profile,
+            request.user,
+            recent=get_recent_limit(request),
+            refresh=wants_refresh(request),
         )
-        opportunities = Opportunity.objects.filter(org=request.profile.org)
+        context = dict(dashboard)
+        count_mode = CACHED if cached else EXACT
+        context["count_modes"] = {
+            name: count_mode
+            for name in ("accounts", "contacts", "leads", "opportunities")
+        }
+        return Response(context, status=status.HTTP_200_OK)
 
-        if (
-            self.request.profile.role.name != "ADMIN"
-            and not self.request.user.is_superuser
-        ):
-            accounts = accounts.filter(
-                Q(assigned_to=self.request.profile)
-                | Q(created_by=self.request.profile.user)
-            )
-            contacts = contacts.filter(
-                Q(assigned_to__id__in=self.request.profile)
-                | Q(created_by=self.request.profile.user)
-            )
-            leads = leads.filter(
-                Q(assigned_to__id__in=self.request.profile)
-                | Q(created_by=self.request.profile.user)
-            ).exclude(status="closed")
-            opportunities = opportunities.filter(
-                Q(assigned_to__id__in=self.request.profile)
-                | Q(created_by=self.request.profile.user)
+
+class CalendarView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(parameters=swagger_params1.calendar_params)
+    def get(self, request, format=None):
+        try:
+            start, end = parse_calendar_range(request.query_params)
+        except CalendarRangeError as error:
+            return Response(
+                {"error": True, "errors": str(error)},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        context = {}
-        context["accounts_count"] = accounts.count()
-        context["contacts_count"] = contacts.count()
-        context["leads_count"] = leads.count()
-        context["opportunities_count"] = opportunities.count()
-        context["accounts"] = AccountSerializer(accounts, many=True).data
-        context["contacts"] = ContactSerializer(contacts, many=True).data
-        context["leads"] = LeadSerializer(leads, many=True).data
-        context["opportunities"] = OpportunitySerializer(opportunities, many=True).data
-        return Response(context, status=status.HTTP_200_OK)
+        items = get_calendar(request.profile, request.user, start, end)
+        return Response(
+            {"from": start, "to": end, "items": items}, status=status.HTTP_200_OK
+        )
+
+
+class SearchView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(parameters=swagger_params1.search_params)
+    def get(self, request, format=None):
+        params = request.query_params
+        kinds = [kind for kind in params.get("type", "").split(",") if kind]
+        try:
+            limit = int(params.get("limit", SEARCH_LIMIT))
+        except ValueError:
+            limit = SEARCH_LIMIT
+        results = search(
+            request.profile,
+            request.user,
+            params.get("q", ""),
+            kinds=kinds,
+            limit=max(1, min(limit, MAX_SEARCH_LIMIT)),
+        )
+        return Response({"results": results}, status=status.HTTP_200_OK)
 
 
 class OrgProfileCreateView(APIView):
@@ -563,16 +590,16 @@ class ProfileView(APIView):
         return Response(context, status=status.HTTP_200_OK)
 
 
-class DocumentListView(APIView, LimitOffsetPagination):
+class DocumentListView(APIView, CountedLimitOffsetPagination):
     # authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Document
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by(
-            "-id"
-        )
+        queryset = eager_load(
+            self.model.objects.filter(org=self.request.profile.org), DocumentSerializer
+        ).order_by("-id")
         if self.request.user.is_superuser or self.request.profile.role.name == "ADMIN":
             queryset = queryset
         else:
@@ -617,44 +644,54 @@ class DocumentListView(APIView, LimitOffsetPagination):
         context["search"] = search
 
         queryset_documents_active = queryset.filter(status="active")
-        results_documents_active = self.paginate_queryset(
-            queryset_documents_active.distinct(), self.request, view=self
-        )
-        documents_active = DocumentSerializer(results_documents_active, many=True).data
-        if results_documents_active:
-            offset = queryset_documents_active.filter(
-                id__gte=results_documents_active[-1].id
-            ).count()
-            if offset == queryset_documents_active.count():
-                offset = None
-        else:
-            offset = 0
-        context["documents_active"] = {
-            "documents_active_count": self.count,
-            "documents_active": documents_active,
-            "offset": offset,
-        }
-
         queryset_documents_inactive = queryset.filter(status="inactive")
-        results_documents_inactive = self.paginate_queryset(
-            queryset_documents_inactive.distinct(), self.request, view=self
-        )
-        documents_inactive = DocumentSerializer(
-            results_documents_inactive, many=True
-        ).data
-        if results_documents_inactive:
-            offset = queryset_documents_inactive.filter(
-                id__gte=results_documents_active[-1].id
-            ).count()
-            if offset == queryset_documents_inactive.count():
-                offset = None
+        if use_cursor_pagination(self.request):
+            paginator = KeysetPagination("active_cursor")
+            results_documents_active = paginator.paginate_queryset(
+                queryset_documents_active.distinct(), self.request
+            )
+            context["documents_active"] = {
+                "documents_active": DocumentSerializer(
+                    results_documents_active, many=True
+                ).data,
+                "next_cursor": paginator.next_cursor,
+            }
+            paginator = KeysetPagination("inactive_cursor")
+            results_documents_inactive = paginator.paginate_queryset(
+                queryset_documents_inactive.distinct(), self.request
+            )
+            context["documents_inactive"] = {
+                "documents_inactive": DocumentSerializer(
+                    results_documents_inactive, many=True
+                ).data,
+                "next_cursor": paginator.next_cursor,
+            }
         else:
-            offset = 0
-        context["documents_inactive"] = {
-            "documents_inactive_count": self.count,
-            "documents_inactive": documents_inactive,
-            "offset": offset,
-        }
+            results_documents_active = self.paginate_queryset(
+                queryset_documents_active.distinct(), self.request, view=self
+            )
+            documents_active = DocumentSerializer(results_documents_active, many=True).data
+            offset = self.get_next_offset(results_documents_active)
+            context["documents_active"] = {
+                "documents_active_count": self.count,
+                "count_mode": self.count_mode,
+                "documents_active": documents_active,
+                "offset": offset,
+            }
+
+            results_documents_inactive = self.paginate_queryset(
+                queryset_documents_inactive.distinct(), self.request, view=self
+            )
+            documents_inactive = DocumentSerializer(
+                results_documents_inactive, many=True
+            ).data
+            offset = self.get_next_offset(results_documents_inactive)
+            context["documents_inactive"] = {
+                "documents_inactive_count": self.count,
+                "count_mode": self.count_mode,
+                "documents_inactive": documents_inactive,
+                "offset": offset,
+            }
 
         context["users"] = ProfileSerializer(profiles, many=True).data
         context["status_choices"] = Document.DOCUMENT_STATUS_CHOICE
@@ -0,0 +1,233 @@
+import uuid
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+
+from common.dashboard import invalidate_org_dashboard
+from common.imports import (
+    FINISHED,
+    RUNNING,
+    chunked,
+    report_row,
+    save_import_result,
+)
+from common.lookups import lookups
+from common.metadata import invalidate_org_metadata
+from common.models import Address, Profile
+from common.search import index_objects
+from common.staging import create_stage
+from contacts.models import Contact
+from contacts.serializer import ContactImportSerializer
+from teams.models import Teams
+
+IMPORT_CHUNK_SIZE = 500
+PREVIEW_ROWS = 10
+
+TEXT_FIELDS = (
+    "salutation",
+    "first_name",
+    "last_name",
+    "date_of_birth",
+    "organization",
+    "title",
+    "primary_email",
+    "secondary_email",
+    "mobile_number",
+    "secondary_number",
+    "department",
+    "language",
+    "description",
+    "linked_in_url",
+    "facebook_url",
+    "twitter_username",
+    "country",
+)
+PREVIEW_COLUMNS = TEXT_FIELDS + (
+    "do_not_call",
+    "is_active",
+    "address",
+    "assigned_to",
+    "teams",
+)
+# an empty cell is a missing value for these, not an empty string
+NULLABLE_FIELDS = {field.name for field in Contact._meta.fields if field.null}
+
+
+def parse_ids(raw):
+    """Valid UUIDs of a comma separated cell, as strings"""
+    ids = []
+    for pk in (raw or "").split(","):
+        try:
+            ids.append(str(uuid.UUID(pk.strip())))
+        except ValueError:
+            continue
+    return ids
+
+
+def build_preview_row(row, profile):
+    preview = {}
+    for field in TEXT_FIELDS:
+        value = (row.get(field) or "").strip()
+        preview[field] = (value or None) if field in NULLABLE_FIELDS else value
+    preview.update(
+        {
+            "do_not_call": (row.get("do_not_call") or "False").lower() == "true",
+            "is_active": (row.get("is_active") or "False").lower() == "true",
+            "address": (parse_ids(row.get("address")) or [None])[0],
+            "assigned_to": parse_ids(row.get("assigned_to")) or [str(profile.id)],
+            "teams": parse_ids(row.get("teams")),
+        }
+    )
+    return preview
+
+
+def preview_contacts(rows, profile, duplicate_emails, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Yield the preview rows of csv rows, with one query per chunk for the
+    emails already taken; duplicates are appended to ``duplicate_emails``.
+    """
+    seen_emails = set()
+    for chunk in chunked(rows, chunk_size):
+        emails = {row.get("primary_email") for row in chunk} - {None, ""}
+        seen_emails.update(
+            Contact.objects.filter(primary_email__in=emails)
+            .order_by()
+            .values_list("primary_email", flat=True)
+        )
+        for row in chunk:
+            email = row.get("primary_email")
+            if not email:
+                continue
+            if email in seen_emails:
+                duplicate_emails.append(email)
+                continue
+            seen_emails.add(email)
+            yield build_preview_row(row, profile)
+
+
+def stage_preview(rows, profile):
+    """Stage the preview of csv rows; returns (stage id, duplicate emails)"""
+    duplicate_emails = []
+    stage_id = create_stage(
+        preview_contacts(rows, profile, duplicate_emails),
+        PREVIEW_COLUMNS,
+        org_id=profile.org_id,
+    )
+    return stage_id, duplicate_emails
+
+
+def _existing_ids(queryset, ids):
+    return {str(pk) for pk in queryset.filter(id__in=ids).values_list("id", flat=True)}
+
+
+def _insert_contacts(contacts, result):
+    """
+    Insert (contact, row, assigned ids, team ids) in one transaction with
+    their through-table rows; on error, one contact at a time.
+    """
+    AssignedTo = Contact.assigned_to.through
+    ContactTeams = Contact.teams.through
+
+    def insert(batch):
+        with transaction.atomic():
+            Contact.objects.bulk_create([contact for contact, _, _, _ in batch])
+            # bulk_create sends no post_save
+            index_objects([contact for contact, _, _, _ in batch])
+            AssignedTo.objects.bulk_create(
+                AssignedTo(contact_id=contact.id, profile_id=profile_id)
+                for contact, _, assigned_ids, _ in batch
+                for profile_id in assigned_ids
+            )
+            ContactTeams.objects.bulk_create(
+                ContactTeams(contact_id=contact.id, teams_id=team_id)
+                for contact, _, _, team_ids in batch
+                for team_id in team_ids
+            )
+        result["created"] += len(batch)
+
+    try:
+        insert(contacts)
+        return
+    except (DatabaseError, ValueError, TypeError):
+        pass
+    for item in contacts:
+        try:
+            insert([item])
+        except (DatabaseError, ValueError, TypeError) as e:
+            report_row(result, "failed", str(e), email=item[1]["primary_email"])
+
+
+def import_contact_chunk(rows, profile, result):
+    """
+    Create the contacts of one chunk of preview rows: emails and mobile
+    numbers already taken, assignees, teams and addresses are each looked
+    up with one query for the whole chunk.
+    """
+    valid = []
+    for row in rows:
+        serializer = ContactImportSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((row, serializer.validated_data))
+        else:
+            report_row(
+                result, "failed", serializer.errors, email=row.get("primary_email")
+            )
+    emails = {data["primary_email"] for _, data in valid}
+    mobiles = {data.get("mobile_number") for _, data in valid} - {None}
+    taken = set()
+    for email, mobile in Contact.objects.filter(
+        Q(primary_email__in=emails) | Q(mobile_number__in=mobiles)
+    ).values_list("primary_email", "mobile_number"):
+        taken.update([email, str(mobile)] if mobile else [email])
+
+    assigned_ids = {pk for row, _ in valid for pk in row["assigned_to"]}
+    team_ids = {pk for row, _ in valid for pk in row["teams"]}
+    address_ids = {row["address"] for row, _ in valid} - {None}
+    profiles = _existing_ids(Profile.objects.filter(org=profile.org), assigned_ids)
+    teams = _existing_ids(Teams.objects.filter(org=profile.org), team_ids)
+    addresses = _existing_ids(Address.objects.all(), address_ids)
+
+    contacts = []
+    for row, data in valid:
+        keys = [data["primary_email"]]
+        if data.get("mobile_number"):
+            keys.append(str(data["mobile_number"]))
+        if taken.intersection(keys):
+            report_row(result, "skipped", "Duplicate contact", email=keys[0])
+            continue
+        taken.update(keys)
+        contact = Contact(**data, org=profile.org, created_by=profile.user)
+        if row["address"] in addresses:
+            contact.address_id = row["address"]
+        contacts.append(
+            (
+                contact,
+                row,
+                [pk for pk in row["assigned_to"] if pk in profiles],
+                [pk for pk in row["teams"] if pk in teams],
+            )
+        )
+    if contacts:
+        _insert_contacts(contacts, result)
+
+
+def import_contacts(rows, profile, result, total, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Import previewed rows as contacts of the profile's org. ``total`` is
+    known upfront and the result is saved after every chunk, so clients can
+    follow the progress through created + skipped + failed.
+    """
+    result["status"] = RUNNING
+    result["total"] = total
+    save_import_result(result)
+    for chunk in chunked(rows, chunk_size):
+        import_contact_chunk(chunk, profile, result)
+        save_import_result(result)
+    result["status"] = FINISHED
+    if result["created"]:
+        # bulk_create sends no post_save: invalidate once for the import
+        invalidate_org_dashboard(profile.org_id)
+        invalidate_org_metadata(profile.org_id)
+        lookups.invalidate(profile.org_id)
+    save_import_result(result)
+    return result
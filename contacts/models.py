@@ -5,6 +5,11 @@ from phonenumber_field.modelfields import PhoneNumberField
 
 from common.models import Address, Org, Profile
 from common.base import BaseModel
+from common.prefetch import (
+    get_assigned_users_not_in_teams,
+    get_team_and_assigned_users,
+    get_team_users,
+)
 from common.utils import COUNTRIES
 from teams.models import Teams
 
@@ -50,6 +55,11 @@ class Contact(BaseModel):
         verbose_name_plural = "Contacts"
         db_table = "contacts"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "-created_at", "-id"], name="contacts_org_created_id_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.first_name
@@ -65,19 +75,12 @@ class Contact(BaseModel):
 
     @property
     def get_team_users(self):
-        team_user_ids = list(self.teams.values_list("users__id", flat=True))
-        return Profile.objects.filter(id__in=team_user_ids)
+        return get_team_users(self)
 
     @property
     def get_team_and_assigned_users(self):
-        team_user_ids = list(self.teams.values_list("users__id", flat=True))
-        assigned_user_ids = list(self.assigned_to.values_list("id", flat=True))
-        user_ids = team_user_ids + assigned_user_ids
-        return Profile.objects.filter(id__in=user_ids)
+        return get_team_and_assigned_users(self)
 
     @property
     def get_assigned_users_not_in_teams(self):
-        team_user_ids = list(self.teams.values_list("users__id", flat=True))
-        assigned_user_ids = list(self.assigned_to.values_list("id", flat=True))
-        user_ids = set(assigned_user_ids) - set(team_user_ids)
-        return Profile.objects.filter(id__in=list(user_ids))
+        return get_assigned_users_not_in_teams(self)
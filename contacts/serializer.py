@@ -5,6 +5,7 @@ from common.serializer import (
     BillingAddressSerializer,
     OrganizationSerializer,
     ProfileSerializer,
+    ProjectedListSerializer,
 )
 from contacts.models import Contact
 from teams.serializer import TeamsSerializer
@@ -137,7 +138,60 @@ class ContactCSVConfirmSerializer(serializers.Serializer):
 class ContactCSVUploadSerializer(serializers.Serializer):
     file = serializers.FileField()
 
+
+class ContactImportSerializer(serializers.ModelSerializer):
+    """
+    Validates a previewed csv row. Unique emails/mobile numbers and the
+    related rows are checked per chunk by contacts.imports.
+    """
+
+    class Meta:
+        model = Contact
+        fields = (
+            "salutation",
+            "first_name",
+            "last_name",
+            "date_of_birth",
+            "organization",
+            "title",
+            "primary_email",
+            "secondary_email",
+            "mobile_number",
+            "secondary_number",
+            "department",
+            "language",
+            "do_not_call",
+            "description",
+            "linked_in_url",
+            "facebook_url",
+            "twitter_username",
+            "is_active",
+            "country",
+        )
+        extra_kwargs = {
+            "primary_email": {"validators": []},
+            "mobile_number": {"validators": []},
+        }
+
 class ContactSerializer(serializers.ModelSerializer):
     class Meta:
         model = Contact
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class ContactListSerializer(ProjectedListSerializer):
+    class Meta:
+        model = Contact
+        fields = (
+            "id",
+            "first_name",
+            "last_name",
+            "primary_email",
+            "mobile_number",
+            "organization",
+            "title",
+            "department",
+            "country",
+            "created_at",
+        )
+        read_only_fields = fields
@@ -14,6 +14,18 @@ contact_list_get_params = [
     OpenApiParameter("name", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("city", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("assigned_to", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "pagination", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["cursor"]
+    ),
+    OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=["exact", "cached", "approximate"],
+    ),
+    OpenApiParameter("lookups", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+    OpenApiParameter("fields", OpenApiTypes.STR, OpenApiParameter.QUERY),
 ]
 
 contact_create_post_params = [
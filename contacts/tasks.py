@@ -3,7 +3,15 @@ from django.conf import settings
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 
+from common.imports import (
+    FAILED,
+    get_import_result,
+    new_import_result,
+    save_import_result,
+)
 from common.models import Profile
+from common.staging import delete_stage, get_stage, iter_stage_rows
+from contacts.imports import import_contacts
 from contacts.models import Contact
 
 app = Celery("redis://")
@@ -32,3 +40,18 @@ def send_email_to_assigned_user(recipients, contact_id):
             msg = EmailMessage(subject, html_content, to=recipients_list)
             msg.content_subtype = "html"
             msg.send()
+
+
+@app.task
+def import_contacts_from_preview(import_id, profile_id, job_id):
+    """Create the contacts of a confirmed csv preview"""
+    profile = Profile.objects.select_related("user", "org").get(id=profile_id)
+    result = get_import_result(job_id) or new_import_result(job_id, profile.org_id)
+    stage = get_stage(import_id, profile.org_id)
+    if stage is not None:
+        import_contacts(iter_stage_rows(import_id), profile, result, stage["count"])
+        delete_stage(import_id)
+    else:
+        result.update(status=FAILED, error="Preview data expired or not found.")
+        save_import_result(result)
+    return result
@@ -0,0 +1,123 @@
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.dashboard import get_dashboard
+from common.imports import new_import_result, save_import_result
+from common.lookups import get_org_contact_choices
+from common.metadata import get_metadata
+from common.models import Org, Profile, User
+from common.staging import create_stage, get_stage, get_staging_cache, iter_stage_rows
+from contacts.imports import PREVIEW_COLUMNS, import_contacts, preview_contacts
+from contacts.models import Contact
+from contacts.tasks import import_contacts_from_preview
+from teams.models import Teams
+from role_permission_control.models import Role
+
+
+class ContactImportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_staging_cache().clear()
+        self.user = User.objects.create(username="cimport", email="cimport@ex.com")
+        self.org = Org.objects.create(name="cimportorg")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        self.team = Teams.objects.create(name="importers", description="", org=self.org)
+        other_org = Org.objects.create(name="cimportother")
+        self.other_team = Teams.objects.create(
+            name="other", description="", org=other_org
+        )
+        Contact.objects.create(
+            first_name="taken",
+            last_name="x",
+            primary_email="taken@ex.com",
+            org=other_org,
+        )
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+
+    def csv_rows(self, count):
+        return [
+            {
+                "first_name": f"row{i}",
+                "last_name": "import",
+                "primary_email": f"row{i}@ex.com",
+                "teams": f"{self.team.id},{self.other_team.id}",
+            }
+            for i in range(count)
+        ]
+
+    def test_preview_batches_duplicate_lookups(self):
+        rows = self.csv_rows(3) + [{"primary_email": "taken@ex.com"}]
+        rows += [{"primary_email": "row0@ex.com"}, {"first_name": "no email"}]
+        duplicates = []
+        with self.assertNumQueries(2):
+            preview = list(
+                preview_contacts(rows, self.profile, duplicates, chunk_size=3)
+            )
+        self.assertEqual(len(preview), 3)
+        self.assertEqual(duplicates, ["taken@ex.com", "row0@ex.com"])
+        self.assertEqual(preview[0]["assigned_to"], [str(self.profile.id)])
+        self.assertEqual(preview[0]["department"], None)
+
+    def test_import_queries_do_not_grow_with_rows(self):
+        preview = list(preview_contacts(self.csv_rows(2), self.profile, []))
+        with CaptureQueriesContext(connection) as two_rows:
+            import_contacts(preview, self.profile, new_import_result(None), 2)
+        preview = list(preview_contacts(self.csv_rows(8)[2:], self.profile, []))
+        with self.assertNumQueries(len(two_rows.captured_queries)):
+            result = import_contacts(preview, self.profile, new_import_result(None), 6)
+        self.assertEqual((result["total"], result["created"]), (6, 6))
+        contact = Contact.objects.get(primary_email="row5@ex.com")
+        self.assertEqual((contact.org, contact.created_by), (self.org, self.user))
+        self.assertEqual(list(contact.assigned_to.all()), [self.profile])
+        # teams of other orgs are dropped
+        self.assertEqual(list(contact.teams.all()), [self.team])
+
+    def test_import_invalidates_org_caches(self):
+        dashboard, _ = get_dashboard(self.profile, self.user)
+        _, etag = get_metadata(self.profile)
+        self.assertEqual(get_org_contact_choices(self.org.id), [])
+        preview = list(preview_contacts(self.csv_rows(2), self.profile, []))
+        import_contacts(preview, self.profile, new_import_result(None), 2)
+        refreshed, cached = get_dashboard(self.profile, self.user)
+        self.assertFalse(cached)
+        self.assertEqual(refreshed["contacts_count"], dashboard["contacts_count"] + 2)
+        self.assertNotEqual(get_metadata(self.profile)[1], etag)
+        self.assertEqual(len(get_org_contact_choices(self.org.id)), 2)
+
+    def test_confirm_runs_as_job(self):
+        upload = SimpleUploadedFile(
+            "contacts.csv",
+            b"first_name,last_name,primary_email\r\nJob,Contact,job@ex.com\r\n"
+            b"Bad,Date,bad@ex.com\r\n",
+        )
+        response = self.client.post("/api/contacts/import/preview/", {"file": upload})
+        self.assertEqual(response.data["total_preview"], 2)
+        import_id = response.data["import_id"]
+        # the preview is staged for the org of the uploader only
+        self.assertIsNone(get_stage(import_id, org_id=self.other_team.org_id))
+        # a row that became invalid since the preview
+        rows = list(iter_stage_rows(import_id))
+        rows[1]["date_of_birth"] = "not a date"
+        import_id = create_stage(rows, PREVIEW_COLUMNS, org_id=self.org.id)
+        job_id = "contactjob"
+        save_import_result(new_import_result(job_id, self.org.id))
+        import_contacts_from_preview.apply((import_id, self.profile.id, job_id))
+        response = self.client.get(f"/api/contacts/import/{job_id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "finished")
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 1))
+        self.assertIn("date_of_birth", response.data["failed_rows"][0]["reason"])
+        self.assertTrue(Contact.objects.filter(primary_email="job@ex.com").exists())
+        self.assertIsNone(get_stage(import_id))
@@ -7,6 +7,7 @@ app_name = "api_contacts"
 urlpatterns = [
     path("import/preview/", views.ContactCSVPreviewView.as_view()),
     path("import/confirm/", views.ContactCSVConfirmView.as_view()),
+    path("import/<str:job_id>/", views.ContactImportStatusView.as_view()),
     path("", views.ContactsListView.as_view()),
     path("<str:pk>/", views.ContactDetailView.as_view()),
     path("comment/<str:pk>/", views.ContactCommentView.as_view()),
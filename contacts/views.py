@@ -1,34 +1,48 @@
 import json,csv,io,uuid
-from django.core.cache import cache
 
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import permissions
 from rest_framework.parsers import MultiPartParser, FormParser
 
+from common.imports import (
+    PENDING,
+    get_import_result,
+    new_import_result,
+    save_import_result,
+)
+from common.lookups import get_org_users
+from common.metadata import include_lookups
 from common.models import Attachments, Comment, Profile
+from common.pagination import (
+    CountedLimitOffsetPagination,
+    KeysetPagination,
+    use_cursor_pagination,
+)
 from common.serializer import (
     AttachmentsSerializer,
     BillingAddressSerializer,
     CommentSerializer,
+    get_list_serialization,
 )
+from common.staging import get_stage, iter_stage_rows
 from common.utils import COUNTRIES
 
 #from common.external_auth import CustomDualAuthentication
 from contacts import swagger_params1
 from contacts.models import Contact, Profile
 from contacts.serializer import *
-from contacts.tasks import send_email_to_assigned_user
+from contacts.imports import PREVIEW_ROWS, stage_preview
+from contacts.tasks import import_contacts_from_preview, send_email_to_assigned_user
 from tasks.serializer import TaskSerializer
 from teams.models import Teams
 
-class ContactsListView(APIView, LimitOffsetPagination):
+class ContactsListView(APIView, CountedLimitOffsetPagination):
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
     model = Contact
@@ -62,27 +76,37 @@ class ContactsListView(APIView, LimitOffsetPagination):
                     assigned_to__id__in=params.get("assigned_to")
                 ).distinct()
 
-        context = {}
-        results_contact = self.paginate_queryset(
-            queryset.distinct(), self.request, view=self
+        queryset, serializer_class = get_list_serialization(
+            self.request, queryset, ContactSerializer, ContactListSerializer
         )
-        contacts = ContactSerializer(results_contact, many=True).data
-        if results_contact:
-            offset = queryset.filter(id__gte=results_contact[-1].id).count()
-            if offset == queryset.count():
-                offset = None
+        context = {}
+        if use_cursor_pagination(self.request):
+            paginator = KeysetPagination()
+            results_contact = paginator.paginate_queryset(
+                queryset.distinct(), self.request
+            )
+            context["next_cursor"] = paginator.next_cursor
         else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
-        context.update({"contacts_count": self.count, "offset": offset})
+            results_contact = self.paginate_queryset(
+                queryset.distinct(), self.request, view=self
+            )
+            offset = self.get_next_offset(results_contact)
+            context["per_page"] = 10
+            page_number = (int(self.offset / 10) + 1,)
+            context["page_number"] = page_number
+            context.update(
+                {
+                    "contacts_count": self.count,
+                    "count_mode": self.count_mode,
+                    "offset": offset,
+                }
+            )
+        contacts = serializer_class(results_contact, many=True).data
         context["contact_obj_list"] = contacts
+        if not include_lookups(self.request):
+            return context
         context["countries"] = COUNTRIES
-        users = Profile.objects.filter(is_active=True, org=self.request.profile.org).values(
-            "id", "user__email"
-        )
-        context["users"] = users
+        context["users"] = get_org_users(self.request.profile.org_id)
 
         return context
 
@@ -510,8 +534,6 @@ class ContactAttachmentView(APIView):
 
 # import contact from CSV file
 
-IMPORT_CACHE_TIMEOUT = 600  # seconds (10 minutes)
-
 class ContactCSVPreviewView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
@@ -524,119 +546,47 @@ class ContactCSVPreviewView(APIView):
         if not file.name.endswith('.csv'):
             return Response({'error': 'File is not a CSV.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        decoded = file.read().decode('utf-8')
-        io_string = io.StringIO(decoded)
-        reader = csv.DictReader(io_string)
-        preview_data = []
-        duplicate_emails = []
-        seen_emails = set()
-        import_id = str(uuid.uuid4())
-
-        for row in reader:
-            email = row.get('primary_email')
-            if not email:
-                continue
-
-            # Detect duplicates in DB or current import
-            if Contact.objects.filter(primary_email=email).exists() or email in seen_emails:
-                duplicate_emails.append(email)
-                continue
-
-            seen_emails.add(email)
-            # Handle many-to-many fields safely
-            profile = Profile.objects.get(user=request.user)
-            assigned_to_raw = row.get('assigned_to', '')
-            teams_raw = row.get('teams', '')
-
-            assigned_to = [
-                pk.strip() for pk in assigned_to_raw.split(',') if pk.strip()
-            ] if assigned_to_raw else [str(profile.id)]
-
-            # Ensure teams is a list of IDs, even if empty
-            teams = [
-                pk.strip() for pk in teams_raw.split(',') if pk.strip()
-            ] if teams_raw else []
-
-            preview_data.append({
-            "salutation": row.get("salutation", "").strip(),
-            "first_name": row.get("first_name", "").strip(),
-            "last_name": row.get("last_name", "").strip(),
-            "date_of_birth": row.get("date_of_birth", "").strip(),
-            "organization": row.get("organization", "").strip(),
-            "title": row.get("title", "").strip(),
-            "primary_email": row.get("primary_email", "").strip(),
-            "secondary_email": row.get("secondary_email", "").strip(),
-            "mobile_number": row.get("mobile_number", "").strip(),
-            "secondary_number": row.get("secondary_number", "").strip(),
-            "department": row.get("department", "").strip(),
-            "language": row.get("language", "").strip(),
-            "do_not_call": row.get("do_not_call", "False").lower() == "true",
-            "address": row.get("address", None),  # Handle if FK id is provided
-            "description": row.get("description", "").strip(),
-            "linked_in_url": row.get("linked_in_url", "").strip(),
-            "facebook_url": row.get("facebook_url", "").strip(),
-            "twitter_username": row.get("twitter_username", "").strip(),
-            "is_active": row.get("is_active", "False").lower() == "true",
-            "assigned_to": assigned_to,
-            "teams": teams,
-            "org": row.get("org", None),
-            "country": row.get("country", "").strip(),
-        
-        })
-
-
-        # Store in cache for confirmation
-        cache.set(f'import_contacts_{import_id}', preview_data, IMPORT_CACHE_TIMEOUT)
+        reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8", newline=""))
+        # Staged in the shared store for confirmation
+        import_id, duplicate_emails = stage_preview(reader, request.profile)
 
         return Response({
             'import_id': import_id,
-            'preview': preview_data[:10],  # Show only first 10 for UI
-            'total_preview': len(preview_data),
+            # Show only first rows for UI
+            'preview': list(iter_stage_rows(import_id, limit=PREVIEW_ROWS)),
+            'total_preview': get_stage(import_id)['count'],
             'duplicates': duplicate_emails
         })
-    
+
+
 class ContactCSVConfirmView(APIView):
-    
+
     permission_classes = [permissions.IsAuthenticated]
     @extend_schema(tags=["contacts"], request=ContactCSVConfirmSerializer)
     def post(self, request):
         import_id = request.data.get('import_id')
-        
+
         if not import_id:
             return Response({'error': 'Missing import_id.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        cached_data = cache.get(f'import_contacts_{import_id}')
-        if not cached_data:
+        if get_stage(import_id, request.profile.org.id) is None:
             return Response({'error': 'Preview data expired or not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        imported = 0
-        failed = []
-
-        for row in cached_data:
-            serializer = ContactSerializer(data=row)
-            if serializer.is_valid():
-                contact = serializer.save()
-                profile = Profile.objects.get(user=request.user)
-                contact.org = profile.org
-                contact.save()
-
-                # Validate and add assigned users
-                assigned_profiles = Profile.objects.filter(id__in=row['assigned_to'])
-                contact.assigned_to.set(assigned_profiles)
-
-                # Validate and add teams
-                teams = Teams.objects.filter(id__in=row['teams'])
-                contact.teams.set(teams)
-                imported += 1
-            else:
-                failed.append({'email': row['primary_email'], 'errors': serializer.errors})
+        # the contacts are created by a worker, the client polls the job
+        job_id = uuid.uuid4().hex
+        save_import_result(new_import_result(job_id, request.profile.org.id))
+        import_contacts_from_preview.delay(import_id, request.profile.id, job_id)
+        return Response(
+            {'job_id': job_id, 'status': PENDING}, status=status.HTTP_202_ACCEPTED
+        )
 
-        # Remove from cache after import
-        cache.delete(f'import_contacts_{import_id}')
 
-        return Response({
-            'imported': imported,
-            'failed': failed,
-            'failed_count': len(failed),
-        })
+class ContactImportStatusView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
 
+    @extend_schema(tags=["contacts"], parameters=swagger_params1.organization_params)
+    def get(self, request, job_id):
+        result = get_import_result(job_id, request.profile.org.id)
+        if result is None:
+            return Response({'error': 'Import not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(result)
@@ -194,6 +194,29 @@ ADMIN_EMAIL = os.environ["ADMIN_EMAIL"]
 CELERY_BROKER_URL = os.environ["CELERY_BROKER_URL"]
 CELERY_RESULT_BACKEND = os.environ["CELERY_RESULT_BACKEND"]
 
+# Invoice numbers: a strftime prefix and a counter per org and prefix, see
+# invoices.numbering (the default gives DDMMYYYY0001, DDMMYYYY0002, ...).
+INVOICE_NUMBER_PREFIX = "%d%m%Y"
+INVOICE_NUMBER_DIGITS = 4
+INVOICE_HISTORY_SNAPSHOT_INTERVAL = 20
+
+# Notifications wait in the outbox this long (seconds) for others to the same
+# user to be merged with, see common.outbox.
+NOTIFICATION_DIGEST_WINDOW = 60
+# Occurrences of recurring events are written this many days ahead, see
+# events.recurrence.
+EVENT_MATERIALIZE_DAYS = 90
+CELERY_BEAT_SCHEDULE = {
+    "drain-notification-outbox": {
+        "task": "common.tasks.drain_notification_outbox",
+        "schedule": NOTIFICATION_DIGEST_WINDOW,
+    },
+    "materialize-event-series": {
+        "task": "events.tasks.materialize_event_series",
+        "schedule": 60 * 60 * 24,
+    },
+}
+
 
 LOGGING = {
     "version": 1,
@@ -265,9 +288,11 @@ SETTINGS_EXPORT = ["APPLICATION_NAME"]
 
 REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "rest_framework.views.exception_handler",
+    # CustomDualAuthentication reuses the token and profile already resolved
+    # by GetProfileAndOrg; JWTAuthentication reports invalid tokens.
     "DEFAULT_AUTHENTICATION_CLASSES": (
+        "common.external_auth.CustomDualAuthentication",
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-        "common.external_auth.CustomDualAuthentication"
         # "rest_framework.authentication.SessionAuthentication",
         # "rest_framework.authentication.BasicAuthentication",
     ),
@@ -344,10 +369,48 @@ DOMAIN_NAME = os.environ["DOMAIN_NAME"]
 SWAGGER_ROOT_URL = os.environ["SWAGGER_ROOT_URL"]
 
 # Cache settings
-# This is used to cache the import preview data
-CACHES = {
-    'default': {
+# This is used to cache the role -> permissions mapping (see
+# role_permission_control.permission_cache) and the lookups shared by the
+# workers (see common.caching). Set CACHE_URL to a Redis url so that every
+# worker sees the same entries and invalidations. Without it an in-process
+# cache stands in, which other processes are never told about: entries are
+# then only kept for seconds.
+CACHE_URL = os.environ.get("CACHE_URL", "")
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'import-cache',
+        }
+    }
+
+# Import previews and job results (see common.staging) are written and read
+# by different processes: set IMPORT_STAGING_URL to a Redis url. Without it
+# an in-process cache stands in, which only works with a single process.
+IMPORT_STAGING_URL = os.environ.get("IMPORT_STAGING_URL", "")
+IMPORT_STAGING_CACHE = "imports"
+IMPORT_STAGING_TIMEOUT = 600  # seconds (10 minutes)
+if IMPORT_STAGING_URL:
+    CACHES[IMPORT_STAGING_CACHE] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': IMPORT_STAGING_URL,
+        'KEY_PREFIX': 'imports',
+    }
+else:
+    CACHES[IMPORT_STAGING_CACHE] = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'import-cache',
+        'LOCATION': 'import-staging',
     }
-}
+
+# Row counts of list views (see common.counts). Clients can override the
+# mode per request with ?count=exact|cached|approximate.
+COUNT_MODE = os.environ.get("COUNT_MODE", "exact")
+COUNT_CACHE_TIMEOUT = 60
+APPROXIMATE_COUNT_THRESHOLD = 100000
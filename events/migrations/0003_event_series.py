@@ -0,0 +1,83 @@
+# Generated by Django 4.2.1 on 2026-10-18 19:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0018_comment_mentions'),
+        ('teams', '0003_alter_teams_created_by'),
+        ('contacts', '0007_keyset_pagination_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('events', '0002_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSeries',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Last Modified At')),
+                ('id', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('name', models.CharField(max_length=64, verbose_name='Event')),
+                ('description', models.TextField(blank=True, null=True)),
+                ('frequency', models.CharField(choices=[('DAILY', 'Daily'), ('WEEKLY', 'Weekly')], default='WEEKLY', max_length=10)),
+                ('interval', models.PositiveSmallIntegerField(default=1)),
+                ('weekdays', models.JSONField(blank=True, default=list)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField(blank=True, null=True)),
+                ('materialized_until', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Event Series',
+                'verbose_name_plural': 'Event Series',
+                'db_table': 'event_series',
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.AddField(
+            model_name='eventseries',
+            name='assigned_to',
+            field=models.ManyToManyField(blank=True, related_name='event_series_assigned', to='common.profile'),
+        ),
+        migrations.AddField(
+            model_name='eventseries',
+            name='contacts',
+            field=models.ManyToManyField(blank=True, related_name='event_series_contact', to='contacts.contact'),
+        ),
+        migrations.AddField(
+            model_name='eventseries',
+            name='created_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='event_series_created_by', to='common.profile'),
+        ),
+        migrations.AddField(
+            model_name='eventseries',
+            name='org',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='common.org'),
+        ),
+        migrations.AddField(
+            model_name='eventseries',
+            name='teams',
+            field=models.ManyToManyField(blank=True, related_name='event_series_teams', to='teams.teams'),
+        ),
+        migrations.AddField(
+            model_name='eventseries',
+            name='updated_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to=settings.AUTH_USER_MODEL, verbose_name='Last Modified By'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='events.eventseries'),
+        ),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(condition=models.Q(('series__isnull', False)), fields=('series', 'date_of_meeting'), name='event_series_occurrence'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.1 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_series'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['org', 'start_date', 'end_date'], name='event_org_start_end_idx'),
+        ),
+    ]
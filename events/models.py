@@ -9,6 +9,64 @@ from teams.models import Teams
 
 # Create your models here.
 
+RRULE_WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+class EventSeries(BaseModel):
+    """
+    A recurring event: the rule is stored once and its occurrences are
+    expanded on demand (see events.recurrence); Event rows are only written
+    for the occurrences up to ``materialized_until``.
+    """
+
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    FREQUENCIES = ((DAILY, "Daily"), (WEEKLY, "Weekly"))
+
+    name = models.CharField(_("Event"), max_length=64)
+    description = models.TextField(blank=True, null=True)
+    frequency = models.CharField(max_length=10, choices=FREQUENCIES, default=WEEKLY)
+    interval = models.PositiveSmallIntegerField(default=1)
+    # 0 (Monday) to 6 (Sunday), for weekly series
+    weekdays = models.JSONField(default=list, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField(blank=True, null=True)
+    materialized_until = models.DateField(blank=True, null=True)
+    contacts = models.ManyToManyField(
+        Contact, blank=True, related_name="event_series_contact"
+    )
+    assigned_to = models.ManyToManyField(
+        Profile, blank=True, related_name="event_series_assigned"
+    )
+    teams = models.ManyToManyField(Teams, blank=True, related_name="event_series_teams")
+    created_by = models.ForeignKey(
+        Profile,
+        related_name="event_series_created_by",
+        null=True,
+        on_delete=models.SET_NULL,
+    )
+    org = models.ForeignKey(Org, on_delete=models.SET_NULL, null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Event Series"
+        verbose_name_plural = "Event Series"
+        db_table = "event_series"
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.name}"
+
+    @property
+    def rrule(self):
+        """The rule in iCalendar (RFC 5545) RRULE syntax"""
+        rule = f"FREQ={self.frequency};INTERVAL={self.interval}"
+        if self.frequency == self.WEEKLY:
+            days = ",".join(RRULE_WEEKDAYS[day] for day in self.weekdays)
+            rule += f";BYDAY={days}"
+        return rule + f";UNTIL={self.end_date:%Y%m%d}"
+
 
 class Event(BaseModel):
     EVENT_TYPE = (
@@ -54,6 +112,14 @@ class Event(BaseModel):
     date_of_meeting = models.DateField(blank=True, null=True)
     teams = models.ManyToManyField(Teams, related_name="event_teams")
     org = models.ForeignKey(Org, on_delete=models.SET_NULL, null=True, blank=True)
+    # the recurring series this is an occurrence of
+    series = models.ForeignKey(
+        EventSeries,
+        related_name="occurrences",
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+    )
 
     # tags = models.ManyToManyField(Tag)
 
@@ -62,6 +128,22 @@ class Event(BaseModel):
         verbose_name_plural = "Events"
         db_table = "event"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "-created_at", "-id"], name="event_org_created_id_idx"
+            ),
+            # calendar ranges (common.agenda)
+            models.Index(
+                fields=["org", "start_date", "end_date"], name="event_org_start_end_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["series", "date_of_meeting"],
+                condition=models.Q(series__isnull=False),
+                name="event_series_occurrence",
+            )
+        ]
 
     def __str__(self):
         return f"{self.name}"
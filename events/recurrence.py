@@ -0,0 +1,194 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from events.models import Event, EventSeries
+from events.utils import WEEKDAYS
+
+# A recurring event is stored once, as an EventSeries. Its occurrences are
+# expanded in memory for the window asked for (get_occurrences), and written
+# as Event rows (one INSERT per table and batch) only up to
+# EVENT_MATERIALIZE_DAYS ahead; materialize_due_series moves that horizon
+# forward every day.
+DEFAULT_EVENT_MATERIALIZE_DAYS = 90
+MATERIALIZE_BATCH_SIZE = 1000
+SERIES_M2M_FIELDS = ("contacts", "assigned_to", "teams")
+WEEKDAY_NAMES = [name for name, _ in WEEKDAYS]
+
+
+def get_materialize_days():
+    return getattr(settings, "EVENT_MATERIALIZE_DAYS", DEFAULT_EVENT_MATERIALIZE_DAYS)
+
+
+def parse_weekdays(names):
+    """Weekday numbers (0 is Monday) of names of WEEKDAYS, ignoring the others"""
+    return sorted(
+        {WEEKDAY_NAMES.index(name) for name in names if name in WEEKDAY_NAMES}
+    )
+
+
+def iter_occurrence_dates(series, start=None, end=None):
+    """Dates of the occurrences of a series between start and end (included)"""
+    start = max(start or series.start_date, series.start_date)
+    end = min(end or series.end_date, series.end_date)
+    interval = max(series.interval, 1)
+    if series.frequency == EventSeries.DAILY:
+        # the first multiple of the interval from the start of the series
+        steps = -(-(start - series.start_date).days // interval)
+        day = series.start_date + timedelta(days=steps * interval)
+        while day <= end:
+            yield day
+            day += timedelta(days=interval)
+        return
+    first_monday = series.start_date - timedelta(days=series.start_date.weekday())
+    week = (start - first_monday).days // 7
+    week += -week % interval
+    while True:
+        monday = first_monday + timedelta(weeks=week)
+        for weekday in series.weekdays:
+            day = monday + timedelta(days=weekday)
+            if day > end:
+                return
+            if day >= start:
+                yield day
+        if monday > end:
+            return
+        week += interval
+
+
+def build_occurrence(series, day):
+    """An (unsaved) occurrence of a series"""
+    return Event(
+        series=series,
+        name=series.name,
+        event_type="Recurring",
+        description=series.description,
+        start_date=day,
+        end_date=day,
+        start_time=series.start_time,
+        end_time=series.end_time,
+        date_of_meeting=day,
+        created_by_id=series.created_by_id,
+        org_id=series.org_id,
+        is_active=True,
+        disabled=False,
+    )
+
+
+def get_occurrences(series, start, end):
+    """
+    The occurrences of a series in a window, without any query: the rows
+    already written are not read, so the events are not saved and have no
+    comments, attachments or through rows of their own.
+    """
+    dates = iter_occurrence_dates(series, start, end)
+    return [build_occurrence(series, day) for day in dates]
+
+
+def _bulk_add(rows, name, ids):
+    """Relate every row (of one model) to every id through its ``name`` field"""
+    field = rows[0]._meta.get_field(name)
+    through = field.remote_field.through
+    row, member = field.m2m_field_name(), field.m2m_reverse_field_name()
+    through.objects.bulk_create(
+        [
+            through(**{f"{row}_id": instance.id, f"{member}_id": pk})
+            for instance in rows
+            for pk in ids
+        ],
+        batch_size=MATERIALIZE_BATCH_SIZE,
+    )
+
+
+@transaction.atomic
+def create_series(
+    data, weekdays, created_by, contact_ids=(), team_ids=(), profile_ids=()
+):
+    """
+    Store a weekly series (from the validated fields of EventCreateSerializer)
+    with its contacts, teams and assignees, in one INSERT per table.
+    """
+    series = EventSeries(
+        name=data["name"],
+        description=data.get("description"),
+        frequency=EventSeries.WEEKLY,
+        weekdays=weekdays,
+        start_date=data["start_date"],
+        end_date=data["end_date"],
+        start_time=data["start_time"],
+        end_time=data.get("end_time"),
+        created_by=created_by,
+        org_id=created_by.org_id,
+    )
+    # BaseModel.save would set created_by to the user of the request while
+    # a series (like an event) is created by a profile
+    EventSeries.objects.bulk_create([series])
+    related = (contact_ids, profile_ids, team_ids)
+    for name, ids in zip(SERIES_M2M_FIELDS, related):
+        _bulk_add([series], name, ids)
+    return series
+
+
+@transaction.atomic
+def materialize_occurrences(series, until=None):
+    """
+    Write the occurrences of a series up to ``until`` (the end of the series
+    by default) that are not written yet: one INSERT for the events and one
+    per through table, whatever the number of occurrences. Returns the
+    events written.
+    """
+    until = min(until or series.end_date, series.end_date)
+    start = series.start_date
+    if series.materialized_until:
+        start = max(start, series.materialized_until + timedelta(days=1))
+    written = set(
+        series.occurrences.filter(date_of_meeting__gte=start).values_list(
+            "date_of_meeting", flat=True
+        )
+    )
+    events = [
+        build_occurrence(series, day)
+        for day in iter_occurrence_dates(series, start, until)
+        if day not in written
+    ]
+    Event.objects.bulk_create(events, batch_size=MATERIALIZE_BATCH_SIZE)
+    if events:
+        for name in SERIES_M2M_FIELDS:
+            ids = list(getattr(series, name).values_list("id", flat=True))
+            _bulk_add(events, name, ids)
+    if not series.materialized_until or until > series.materialized_until:
+        series.materialized_until = until
+        EventSeries.objects.filter(id=series.id).update(materialized_until=until)
+    return events
+
+
+@transaction.atomic
+def end_series(series, day):
+    """
+    End a series the day before ``day``: its occurrences from that day on
+    are deleted, and so is the series (with all of them) if it has none
+    before. Returns the series, or None once deleted.
+    """
+    end_date = day - timedelta(days=1)
+    if next(iter_occurrence_dates(series, None, end_date), None) is None:
+        series.delete()
+        return None
+    series.occurrences.filter(date_of_meeting__gte=day).delete()
+    series.end_date = end_date
+    EventSeries.objects.filter(id=series.id).update(end_date=series.end_date)
+    return series
+
+
+def materialize_due_series(today=None):
+    """
+    Write the occurrences of the coming EVENT_MATERIALIZE_DAYS of every
+    series that has some left. Returns the number of events written.
+    """
+    horizon = (today or timezone.localdate()) + timedelta(days=get_materialize_days())
+    due = EventSeries.objects.exclude(materialized_until__gte=horizon).exclude(
+        materialized_until__gte=F("end_date")
+    )
+    return sum(len(materialize_occurrences(series, horizon)) for series in due)
@@ -38,6 +38,7 @@ class EventSerializer(serializers.ModelSerializer):
             "end_time",
             "description",
             "date_of_meeting",
+            "series",
             "created_by",
             "created_at",
             "contacts",
@@ -19,6 +19,17 @@ event_list_get_params = [
         OpenApiParameter.QUERY,
         OpenApiTypes.DATE
     ),
+    OpenApiParameter(
+        "pagination", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["cursor"]
+    ),
+    OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=["exact", "cached", "approximate"],
+    ),
+    OpenApiParameter("lookups", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
 ]
 
 event_detail_post_params = [
@@ -31,6 +42,11 @@ event_detail_post_params = [
     OpenApiParameter("comment", OpenApiTypes.STR,OpenApiParameter.QUERY),
 ]
 
+event_delete_params = [
+    organization_params_in_header,
+    OpenApiParameter("following", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+]
+
 event_comment_edit_params = [
     organization_params_in_header,
     OpenApiParameter("comment", OpenApiTypes.STR,OpenApiParameter.QUERY),
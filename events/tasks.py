@@ -1,48 +1,41 @@
 from celery import Celery
 from django.conf import settings
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
 
-from common.models import Profile
+from common.notifications import NOTIFICATION_TASK_RETRIES, notify_profiles
+from common.outbox import queue_notifications
 from events.models import Event
+from events.recurrence import materialize_due_series
 
 app = Celery("redis://")
 
 
-@app.task
-def send_email(event_id, recipients):
-    event = Event.objects.filter(id=event_id).first()
-    subject = " Invitation for an event."
-    context = {}
-    context["event"] = event.name
-    context["event_id"] = event_id
-    context["event_created_by"] = event.created_by
-    context["event_date_of_meeting"] = event.date_of_meeting
-    context["url"] = settings.DOMAIN_NAME
-    # recipients = event.assigned_to.filter(is_active=True)
-    for profile_id in recipients:
-        recipients_list = []
-        profile = Profile.objects.filter(id=profile_id, is_active=True).first()
-        if profile:
-            recipients_list.append(profile.user.email)
-            event_members = event.assigned_to.filter(is_active=True)
+@app.task(bind=True, max_retries=NOTIFICATION_TASK_RETRIES)
+def send_email(self, event_id, recipients, deferred_to=None):
+    event = Event.objects.select_related("created_by").filter(id=event_id).first()
+    context = {
+        "event": event.name,
+        "event_id": event_id,
+        "event_created_by": event.created_by,
+        "event_date_of_meeting": event.date_of_meeting,
+        "url": settings.DOMAIN_NAME,
+    }
+    members = list(
+        event.assigned_to.filter(is_active=True).values_list("id", "user__email")
+    )
 
-            context["other_members"] = list(
-                event_members.exclude(id=profile.id).values_list(
-                    "user__email", flat=True
-                )
-            )
-            if len(context["other_members"]) > 0:
-                context["other_members"] = ", ".join(context["other_members"])
-            else:
-                context["other_members"] = ""
-            context["user"] = profile.user.email
-            html_content = render_to_string(
-                "assigned_to_email_template_event.html", context=context
-            )
-            msg = EmailMessage(subject=subject, body=html_content, to=recipients_list)
-            msg.content_subtype = "html"
-            msg.send()
+    def recipient_context(profile):
+        other_members = [email for pk, email in members if pk != profile.id]
+        return {"user": profile.user.email, "other_members": ", ".join(other_members)}
+
+    return notify_profiles(
+        recipients,
+        " Invitation for an event.",
+        "assigned_to_email_template_event.html",
+        context,
+        recipient_context,
+        task=self,
+        deferred_to=deferred_to,
+    )
 
     # if recipients.count() > 0:
     #     for recipient in recipients:
@@ -87,3 +80,45 @@ def send_email(event_id, recipients):
     #             subject=subject, body=html_content, to=[recipient.email, ])
     #         msg.content_subtype = "html"
     #         msg.send
+
+
+@app.task
+def materialize_event_series():
+    """Write the occurrences of the recurring events of the coming days"""
+    return materialize_due_series()
+
+
+def queue_event_invitations(event, profile_ids):
+    """Write the invitations of send_email to the notification outbox"""
+    profile_ids = {str(pk) for pk in profile_ids}
+    members = list(
+        event.assigned_to.filter(is_active=True).values_list(
+            "id", "user_id", "user__email"
+        )
+    )
+    recipient_context = {
+        user_id: {
+            "other_members": ", ".join(
+                other for _, other_id, other in members if other_id != user_id
+            )
+        }
+        for pk, user_id, _ in members
+        if str(pk) in profile_ids
+    }
+    return queue_notifications(
+        recipient_context,
+        "event_invitation",
+        " Invitation for an event.",
+        "assigned_to_email_template_event.html",
+        {
+            "event_name": event.name,
+            "event_created_by": str(event.created_by or ""),
+            "event_date_of_meeting": str(event.date_of_meeting),
+            "url": settings.DOMAIN_NAME,
+        },
+        org=event.org,
+        object_id=event.id,
+        summary="Invitation to the event %s" % event.name,
+        url=settings.DOMAIN_NAME,
+        recipient_context=recipient_context,
+    )
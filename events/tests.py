@@ -0,0 +1,164 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.agenda import get_event_items
+from common.models import Notification, Org, Profile, User
+from contacts.models import Contact
+from events.models import Event, EventSeries
+from events.recurrence import (
+    get_occurrences,
+    iter_occurrence_dates,
+    materialize_due_series,
+)
+from events.tasks import materialize_event_series
+from role_permission_control.models import Role
+
+
+class EventSeriesTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="eventorg")
+        self.user = User.objects.create(username="eventuser", email="event@ex.com")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+
+    def series(self, **fields):
+        return EventSeries(
+            **{
+                "name": "standup",
+                "start_date": datetime.date(2026, 1, 1),
+                "end_date": datetime.date(2026, 12, 31),
+                "start_time": datetime.time(9),
+                "weekdays": [0, 2],
+                "org": self.org,
+                **fields,
+            }
+        )
+
+    def dates(self, series, start, end):
+        return [event.date_of_meeting for event in get_occurrences(series, start, end)]
+
+    def test_expansion(self):
+        series = self.series(interval=2)
+        self.assertEqual(
+            series.rrule, "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;UNTIL=20261231"
+        )
+        # every other week from the week of the first day (a Thursday)
+        self.assertEqual(
+            self.dates(series, datetime.date(2026, 1, 1), datetime.date(2026, 1, 31)),
+            [datetime.date(2026, 1, day) for day in (12, 14, 26, 28)],
+        )
+        self.assertEqual(
+            self.dates(series, datetime.date(2026, 1, 13), datetime.date(2026, 1, 26)),
+            [datetime.date(2026, 1, 14), datetime.date(2026, 1, 26)],
+        )
+        daily = self.series(
+            frequency=EventSeries.DAILY, interval=3, end_date=datetime.date(2026, 1, 9)
+        )
+        self.assertEqual(
+            self.dates(daily, datetime.date(2026, 1, 2), None),
+            [datetime.date(2026, 1, day) for day in (4, 7)],
+        )
+
+    def post_series(self, name, days):
+        today = timezone.localdate()
+        contact = Contact.objects.create(
+            first_name=name, last_name="x", primary_email=f"{name}@ex.com", org=self.org
+        )
+        payload = {
+            "name": name,
+            "event_type": "Recurring",
+            "start_date": str(today),
+            "end_date": str(today + datetime.timedelta(days=days)),
+            "start_time": "09:00:00",
+            "end_time": "09:15:00",
+            "recurring_days": ["Monday", "Wednesday", "Friday"],
+            "assigned_to": [str(self.profile.id)],
+            "contacts": [str(contact.id)],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/events/", payload, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        return EventSeries.objects.get(name=name), len(queries)
+
+    def test_post_writes_occurrences_in_bulk(self):
+        today = timezone.localdate()
+        # the first request also caches the profile of the user
+        self.post_series("first", 7)
+        week, week_queries = self.post_series("weekly", 7)
+        year, year_queries = self.post_series("yearly", 365)
+        # the number of queries does not depend on the number of occurrences
+        self.assertEqual(week_queries, year_queries)
+        horizon = today + datetime.timedelta(days=90)
+        events = Event.objects.filter(series=year)
+        expected = list(iter_occurrence_dates(year, None, horizon))
+        self.assertEqual(
+            sorted(events.values_list("date_of_meeting", flat=True)), expected
+        )
+        self.assertEqual(
+            Event.assigned_to.through.objects.filter(event__series=year).count(),
+            len(expected),
+        )
+        self.assertEqual(
+            Event.contacts.through.objects.filter(event__series=year).count(),
+            len(expected),
+        )
+        # one invitation per series
+        invitations = Notification.objects.filter(kind="event_invitation")
+        self.assertEqual(invitations.count(), 3)
+        # the periodic run writes the days coming into the horizon, once
+        later = today + datetime.timedelta(days=30)
+        written = materialize_due_series(later)
+        self.assertEqual(
+            written,
+            len(
+                list(
+                    iter_occurrence_dates(
+                        year,
+                        horizon + datetime.timedelta(days=1),
+                        later + datetime.timedelta(days=90),
+                    )
+                )
+            ),
+        )
+        self.assertEqual(materialize_due_series(later), 0)
+
+    def test_delete_following_ends_the_series(self):
+        today = timezone.localdate()
+        series, _ = self.post_series("ended", 365)
+        occurrences = Event.objects.filter(series=series).order_by("date_of_meeting")
+        cut = occurrences[3]
+        response = self.client.delete(f"/api/events/{cut.id}/?following=true")
+        self.assertEqual(response.status_code, 200)
+        series.refresh_from_db()
+        self.assertEqual(
+            series.end_date, cut.date_of_meeting - datetime.timedelta(days=1)
+        )
+        self.assertEqual(occurrences.count(), 3)
+        # nothing is written or expanded past the end of the series any more
+        self.assertEqual(materialize_event_series(), 0)
+        later = today + datetime.timedelta(days=60)
+        self.assertEqual(materialize_due_series(later), 0)
+        self.assertEqual(occurrences.count(), 3)
+        items = get_event_items(
+            self.profile, today, today + datetime.timedelta(days=365)
+        )
+        self.assertEqual(len(items), 3)
+        # from the first occurrence on, the whole series goes
+        first = occurrences[0]
+        response = self.client.delete(f"/api/events/{first.id}/?following=1")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(EventSeries.objects.filter(id=series.id).exists())
+        self.assertFalse(Event.objects.filter(name="ended").exists())
@@ -1,16 +1,23 @@
-import json
-from datetime import datetime, timedelta
+from datetime import timedelta
 
+from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from common.metadata import include_lookups
 from common.models import Attachments, Comment, Profile, User
+from common.pagination import (
+    CountedLimitOffsetPagination,
+    KeysetPagination,
+    use_cursor_pagination,
+)
+from common.prefetch import eager_load
 
 #from common.external_auth import CustomDualAuthentication
 from common.serializer import (
@@ -23,29 +30,29 @@ from contacts.serializer import ContactSerializer
 from events import swagger_params1
 from events.models import Event
 from events.serializer import EventCreateSerializer, EventSerializer, EventCreateSwaggerSerializer, EventDetailEditSwaggerSerializer, EventCommentEditSwaggerSerializer
-from events.tasks import send_email
+from events.tasks import queue_event_invitations
+from events.recurrence import (
+    create_series,
+    end_series,
+    get_materialize_days,
+    materialize_occurrences,
+    parse_weekdays,
+)
+from events.utils import WEEKDAYS
 from teams.models import Teams
 from teams.serializer import TeamsSerializer
 
-WEEKDAYS = (
-    ("Monday", "Monday"),
-    ("Tuesday", "Tuesday"),
-    ("Wednesday", "Wednesday"),
-    ("Thursday", "Thursday"),
-    ("Friday", "Friday"),
-    ("Saturday", "Saturday"),
-    ("Sunday", "Sunday"),
-)
 
-
-class EventListView(APIView, LimitOffsetPagination):
+class EventListView(APIView, CountedLimitOffsetPagination):
     model = Event
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = eager_load(
+            self.model.objects.filter(org=self.request.profile.org), EventSerializer
+        ).order_by("-id")
         contacts = Contact.objects.filter(org=self.request.profile.org)
         if self.request.profile.role.name != "ADMIN" and not self.request.profile.is_admin:
             queryset = queryset.filter(
@@ -70,16 +77,24 @@ class EventListView(APIView, LimitOffsetPagination):
                     date_of_meeting=params.get("date_of_meeting")
                 )
         context = {}
-        results_events = self.paginate_queryset(queryset, self.request, view=self)
-        events = EventSerializer(results_events, many=True).data
-        if results_events:
-            offset = queryset.filter(id__gte=results_events[-1].id).count()
-            if offset == queryset.count():
-                offset = None
+        if use_cursor_pagination(self.request):
+            paginator = KeysetPagination()
+            results_events = paginator.paginate_queryset(queryset, self.request)
+            context["next_cursor"] = paginator.next_cursor
         else:
-            offset = 0
-        context.update({"events_count": self.count, "offset": offset})
+            results_events = self.paginate_queryset(queryset, self.request, view=self)
+            offset = self.get_next_offset(results_events)
+            context.update(
+                {
+                    "events_count": self.count,
+                    "count_mode": self.count_mode,
+                    "offset": offset,
+                }
+            )
+        events = EventSerializer(results_events, many=True).data
         context["events"] = events
+        if not include_lookups(self.request):
+            return context
         context["recurring_days"] = WEEKDAYS
         context["contacts_list"] = ContactSerializer(contacts, many=True).data
         return context
@@ -99,9 +114,6 @@ class EventListView(APIView, LimitOffsetPagination):
         data = {}
         serializer = EventCreateSerializer(data=params, request_obj=request)
         if serializer.is_valid():
-            start_date = params.get("start_date")
-            end_date = params.get("end_date")
-            recurring_days = json.dumps(params.get("recurring_days"))
             if params.get("event_type") == "Non-Recurring":
                 event_obj = serializer.save(
                     created_by=request.profile.user,
@@ -132,70 +144,44 @@ class EventListView(APIView, LimitOffsetPagination):
                 assigned_to_list = list(
                     event_obj.assigned_to.all().values_list("id", flat=True)
                 )
-                send_email.delay(
-                    event_obj.id,
-                    assigned_to_list,
-                )
+                queue_event_invitations(event_obj, assigned_to_list)
             if params.get("event_type") == "Recurring":
-                recurring_days = params.get("recurring_days")
-                if not recurring_days:
+                weekdays = parse_weekdays(params.get("recurring_days") or [])
+                if not weekdays:
                     return Response(
                         {"error": True, "errors": "Choose atleast one recurring day"},
                         status=status.HTTP_400_BAD_REQUEST,
                     )
-                end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-                start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-
-                delta = end_date - start_date
-                required_dates = []
-
-                for day in range(delta.days + 1):
-                    each_date = start_date + timedelta(days=day)
-                    if each_date.strftime("%A") in recurring_days:
-                        required_dates.append(each_date)
-
-                for each in required_dates:
-                    each = datetime.strptime(str(each), "%Y-%m-%d").date()
-                    data = serializer.validated_data
-
-                    event = Event.objects.create(
-                        created_by=request.profile.user,
-                        start_date=start_date,
-                        end_date=end_date,
-                        name=data["name"],
-                        event_type=data["event_type"],
-                        description=data["description"],
-                        start_time=data["start_time"],
-                        end_time=data["end_time"],
-                        date_of_meeting=each,
-                        org=request.profile.org,
-                    )
-
-                    if params.get("contacts"):
-                        obj_contact = Contact.objects.filter(
-                            id=params.get("contacts"), org=request.profile.org
-                        )
-                        event.contacts.add(obj_contact)
-
-                    if params.get("teams"):
-                        teams_list = params.get("teams")
-                        teams = Teams.objects.filter(id__in=teams_list, org=request.profile.org)
-                        event.teams.add(*teams)
-
-                    if params.get("assigned_to"):
-                        assinged_to_list = params.get("assigned_to")
-                        profiles = Profile.objects.filter(
-                            id__in=assinged_to_list, org=request.profile.org
-                        )
-                        event.assigned_to.add(*profiles)
-
-                    assigned_to_list = list(
-                        event.assigned_to.all().values_list("id", flat=True)
+                org = request.profile.org
+                contact_ids = params.get("contacts") or []
+                if not isinstance(contact_ids, list):
+                    contact_ids = [contact_ids]
+                # the series is stored once and its occurrences of the
+                # coming days written in bulk (see events.recurrence)
+                with transaction.atomic():
+                    series = create_series(
+                        serializer.validated_data,
+                        weekdays,
+                        request.profile,
+                        Contact.objects.filter(id__in=contact_ids, org=org).values_list(
+                            "id", flat=True
+                        ),
+                        Teams.objects.filter(
+                            id__in=params.get("teams") or [], org=org
+                        ).values_list("id", flat=True),
+                        Profile.objects.filter(
+                            id__in=params.get("assigned_to") or [], org=org
+                        ).values_list("id", flat=True),
                     )
-                    send_email.delay(
-                        event.id,
-                        assigned_to_list,
+                    first_day = max(timezone.localdate(), series.start_date)
+                    events = materialize_occurrences(
+                        series, first_day + timedelta(days=get_materialize_days())
                     )
+                    if events:
+                        # one invitation for the series
+                        queue_event_invitations(
+                            events[0], series.assigned_to.values_list("id", flat=True)
+                        )
             return Response(
                 {"error": False, "message": "Event Created Successfully"},
                 status=status.HTTP_200_OK,
@@ -412,10 +398,7 @@ class EventDetailView(APIView):
                 event_obj.assigned_to.all().values_list("id", flat=True)
             )
             recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
-            send_email.delay(
-                event_obj.id,
-                recipients,
-            )
+            queue_event_invitations(event_obj, recipients)
             return Response(
                 {"error": False, "message": "Event updated Successfully"},
                 status=status.HTTP_200_OK,
@@ -426,7 +409,7 @@ class EventDetailView(APIView):
         )
 
     @extend_schema(
-        tags=["Events"], parameters=swagger_params1.organization_params
+        tags=["Events"], parameters=swagger_params1.event_delete_params
     )
     def delete(self, request, pk, **kwargs):
         self.object = self.get_object(pk)
@@ -435,7 +418,13 @@ class EventDetailView(APIView):
             or request.profile.is_admin
             or request.profile == self.object.created_by
         ) and self.object.org == request.profile.org:
-            self.object.delete()
+            following = request.query_params.get("following", "false")
+            if self.object.series_id and following.lower() in ("true", "1", "yes"):
+                # this occurrence and the following ones: the series ends
+                # the day before, and is no longer written or expanded
+                end_series(self.object.series, self.object.date_of_meeting)
+            else:
+                self.object.delete()
             return Response(
                 {"error": False, "message": "Event deleted Successfully"},
                 status=status.HTTP_200_OK,
@@ -24,6 +24,7 @@ from common.serializer import (
 )
 from common.utils import COUNTRIES, CURRENCY_CODES
 from invoices import swagger_params1
+from invoices.history import get_history_states
 from invoices.models import Invoice
 from invoices.serializer import (
     InvoiceCreateSerializer,
@@ -32,6 +33,8 @@ from invoices.serializer import (
 )
 from invoices.tasks import (
     create_invoice_history,
+    queue_invoice_assigned_notifications,
+    render_invoice_pdf,
     send_email,
     send_invoice_email,
     send_invoice_email_cancel,
@@ -220,15 +223,17 @@ class InvoiceListView(APIView, LimitOffsetPagination):
                             invoice_obj.delete()
                             data["assigned_to"] = "Please enter valid user"
                             return Response({"error": True}, data)
-            create_invoice_history(invoice_obj.id, request.user.id, [])
+            create_invoice_history.delay(invoice_obj.id, request.user.id, [])
+            render_invoice_pdf.delay(invoice_obj.id)
             assigned_to_list = list(
                 invoice_obj.assigned_to.all().values_list("id", flat=True)
             )
 
-            recipients = assigned_to_list
+            queue_invoice_assigned_notifications(invoice_obj, assigned_to_list)
+            # the accounts it is billed to are not users: emailed right away
             send_email.delay(
-                recipients,
                 invoice_obj.id,
+                [],
                 domain=settings.DOMAIN_NAME,
                 protocol=self.request.scheme,
             )
@@ -365,9 +370,13 @@ class InvoiceDetailView(APIView):
                 invoice_obj.assigned_to.all().values_list("id", flat=True)
             )
             recipients = list(set(assigned_to_list) - set(previous_assigned_to_users))
+            # the fields that changed are found by diffing with the last version
+            create_invoice_history.delay(invoice_obj.id, request.user.id, [])
+            render_invoice_pdf.delay(invoice_obj.id)
+            queue_invoice_assigned_notifications(invoice_obj, recipients)
             send_email.delay(
-                recipients,
                 invoice_obj.id,
+                [],
                 domain=settings.DOMAIN_NAME,
                 protocol=self.request.scheme,
             )
@@ -458,12 +467,16 @@ class InvoiceDetailView(APIView):
 
         attachments = Attachments.objects.filter(invoice=self.invoice).order_by("-id")
         comments = Comment.objects.filter(invoice=self.invoice).order_by("-id")
+        # with the snapshots, to rebuild the invoice at every version
+        history = list(self.invoice.invoice_history.select_related("updated_by"))
         context.update(
             {
                 "attachments": AttachmentsSerializer(attachments, many=True).data,
                 "comments": CommentSerializer(comments, many=True).data,
                 "invoice_history": InvoiceHistorySerializer(
-                    self.invoice.invoice_history.all(), many=True
+                    history,
+                    many=True,
+                    context={"states": get_history_states(history)},
                 ).data,
                 "accounts": AccountSerializer(
                     self.invoice.accounts.all(), many=True
@@ -628,3 +641,4 @@ class InvoiceAttachmentView(APIView):
                     "errors": "You don't have permission to perform this action.",
                 }
             )
+
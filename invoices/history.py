@@ -0,0 +1,192 @@
+import datetime
+import decimal
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+
+from invoices.models import Invoice, InvoiceHistory
+
+# Every change of an invoice gets a version. A version row stores only the
+# fields that changed (``changes``), and every INVOICE_HISTORY_SNAPSHOT_INTERVAL
+# versions (and the first) also the whole invoice (``snapshot``), so that
+# the state at any version is rebuilt from at most that many rows.
+DEFAULT_INVOICE_HISTORY_SNAPSHOT_INTERVAL = 20
+TRACKED_FIELDS = (
+    "invoice_title",
+    "invoice_number",
+    "from_address",
+    "to_address",
+    "name",
+    "email",
+    "phone",
+    "quantity",
+    "rate",
+    "total_amount",
+    "tax",
+    "currency",
+    "amount_due",
+    "amount_paid",
+    "is_email_sent",
+    "status",
+    "details",
+    "due_date",
+    "assigned_to",
+)
+
+
+def get_snapshot_interval():
+    return getattr(
+        settings,
+        "INVOICE_HISTORY_SNAPSHOT_INTERVAL",
+        DEFAULT_INVOICE_HISTORY_SNAPSHOT_INTERVAL,
+    )
+
+
+def _json_value(value):
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    # phone numbers and the like
+    return str(value)
+
+
+def get_invoice_state(invoice):
+    """The tracked fields of an invoice, as JSON values (foreign keys as ids)"""
+    state = {}
+    for name in TRACKED_FIELDS:
+        field = Invoice._meta.get_field(name)
+        if field.many_to_many:
+            ids = invoice.assigned_to.order_by().values_list("id", flat=True)
+            state[name] = sorted(str(pk) for pk in ids)
+        else:
+            value = getattr(invoice, field.attname)
+            if value is not None and field.get_internal_type() == "DecimalField":
+                # as read back from the database: 0 and 0.00 are the same
+                value = decimal.Decimal(value).quantize(
+                    decimal.Decimal(1).scaleb(-field.decimal_places)
+                )
+            state[name] = _json_value(value)
+    return state
+
+
+def diff_states(old, new):
+    return {name: value for name, value in new.items() if old.get(name) != value}
+
+
+def _latest_state(invoice_id):
+    """(version, state) of the last version, from one query"""
+    rows = (
+        InvoiceHistory.objects.filter(invoice_id=invoice_id, version__gt=0)
+        .order_by("-version")
+        .values_list("version", "changes", "snapshot")[: get_snapshot_interval()]
+    )
+    rows = list(rows)
+    if not rows:
+        return 0, None
+    changes = []
+    for version, change, snapshot in rows:
+        if snapshot is not None:
+            state = dict(snapshot)
+            break
+        changes.append(change)
+    else:
+        # the snapshot interval was lowered: read from the last snapshot
+        return rows[0][0], get_invoice_state_at(invoice_id, rows[0][0])
+    for change in reversed(changes):
+        state.update(change)
+    return rows[0][0], state
+
+
+def get_invoice_state_at(invoice_id, version=None):
+    """
+    The tracked fields of an invoice as they were at ``version`` (the last
+    one by default), or None if there is no such version. Costs two queries
+    whatever the number of versions.
+    """
+    versions = InvoiceHistory.objects.filter(invoice_id=invoice_id, version__gt=0)
+    if version is not None:
+        versions = versions.filter(version__lte=version)
+    snapshot = (
+        versions.filter(snapshot__isnull=False)
+        .order_by("-version")
+        .values_list("version", "snapshot")
+        .first()
+    )
+    if snapshot is None:
+        return None
+    snapshot_version, state = snapshot
+    state = dict(state)
+    changes = (
+        versions.filter(version__gt=snapshot_version)
+        .order_by("version")
+        .values_list("changes", flat=True)
+    )
+    for change in changes:
+        state.update(change)
+    return state
+
+
+def get_history_states(rows):
+    """
+    The tracked fields of an invoice at each of the given history rows (all
+    the versioned rows of the invoice, with their snapshot), by row id.
+    Rebuilt in one pass in version order, without any query.
+    """
+    states, state = {}, None
+    for row in sorted(rows, key=lambda row: row.version):
+        if row.version == 0:
+            continue
+        if row.snapshot is not None:
+            state = dict(row.snapshot)
+        elif state is not None:
+            state = {**state, **row.changes}
+        states[row.id] = state
+    return states
+
+
+def describe_changes(changed_fields):
+    changed = [" ".join(field.split("_")).title() for field in changed_fields]
+    if len(changed) > 1:
+        return ", ".join(changed[:-1]) + " and " + changed[-1] + " have changed."
+    if len(changed) == 1:
+        return changed[0] + " has changed."
+    return None
+
+
+def record_invoice_history(invoice, updated_by_id=None, changed_fields=None):
+    """
+    Add a version to the history of an invoice with the fields that changed
+    since the previous one. Returns the new row, or None when nothing
+    changed. The invoice row is locked meanwhile, so that concurrent
+    updates get successive versions.
+    """
+    with transaction.atomic():
+        Invoice.objects.select_for_update().filter(id=invoice.id).values("id").first()
+        last_version, last_state = _latest_state(invoice.id)
+        state = get_invoice_state(invoice)
+        if last_state is None:
+            changes, details = state, "Invoice Created."
+        else:
+            changes = diff_states(last_state, state)
+            if not changes:
+                return None
+            details = describe_changes(changed_fields or changes)
+        version = last_version + 1
+        is_snapshot = last_state is None or version % get_snapshot_interval() == 0
+        history = InvoiceHistory(
+            invoice=invoice,
+            version=version,
+            changes=changes,
+            snapshot=state if is_snapshot else None,
+            details=details,
+            updated_by_id=updated_by_id,
+            created_by_id=invoice.created_by_id,
+        )
+        # BaseModel.save would replace updated_by with the user of the
+        # current request, which a worker does not have
+        InvoiceHistory.objects.bulk_create([history])
+    return history
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.1 on 2026-10-18 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0002_invoice_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoicehistory',
+            name='changes',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='invoicehistory',
+            name='snapshot',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='invoicehistory',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='invoicehistory',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True, verbose_name='Email'),
+        ),
+        migrations.AlterField(
+            model_name='invoicehistory',
+            name='invoice_number',
+            field=models.CharField(blank=True, max_length=50, null=True, verbose_name='Invoice Number'),
+        ),
+        migrations.AlterField(
+            model_name='invoicehistory',
+            name='invoice_title',
+            field=models.CharField(blank=True, max_length=50, null=True, verbose_name='Invoice Title'),
+        ),
+        migrations.AlterField(
+            model_name='invoicehistory',
+            name='is_email_sent',
+            field=models.BooleanField(blank=True, default=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='invoicehistory',
+            name='name',
+            field=models.CharField(blank=True, max_length=100, null=True, verbose_name='Name'),
+        ),
+        migrations.AlterField(
+            model_name='invoicehistory',
+            name='quantity',
+            field=models.PositiveIntegerField(blank=True, default=0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='invoicehistory',
+            name='rate',
+            field=models.DecimalField(blank=True, decimal_places=2, default=0, max_digits=12, null=True),
+        ),
+        migrations.AlterField(
+            model_name='invoicehistory',
+            name='status',
+            field=models.CharField(blank=True, choices=[('Draft', 'Draft'), ('Sent', 'Sent'), ('Paid', 'Paid'), ('Pending', 'Pending'), ('Cancelled', 'Cancel')], default='Draft', max_length=15, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='invoicehistory',
+            constraint=models.UniqueConstraint(condition=models.Q(('version__gt', 0)), fields=('invoice', 'version'), name='invoice_history_version'),
+        ),
+    ]
@@ -1,5 +1,3 @@
-import datetime
-
 import arrow
 from django.db import models
 from django.utils.translation import gettext_lazy as _
@@ -82,19 +80,10 @@ class Invoice(BaseModel):
 
     def save(self, *args, **kwargs):
         if not self.invoice_number:
-            self.invoice_number = self.invoice_id_generator()
-            while Invoice.objects.filter(invoice_number=self.invoice_number).exists():
-                self.invoice_number = self.invoice_id_generator(
-                    prev_invoice_number=self.invoice_number
-                )
-        super(Invoice, self).save(*args, **kwargs)
+            from invoices.numbering import allocate_invoice_number
 
-    def invoice_id_generator(self, prev_invoice_number=None):
-        if prev_invoice_number:
-            prev_invoice_number += 1
-            return prev_invoice_number
-        date = datetime.datetime.now().strftime("%d%m%Y")
-        return int(date + "0001")
+            self.invoice_number = allocate_invoice_number(self.org_id)
+        super(Invoice, self).save(*args, **kwargs)
 
     def formatted_total_amount(self):
         return self.currency + " " + str(self.total_amount)
@@ -153,9 +142,35 @@ class Invoice(BaseModel):
         return User.objects.filter(id__in=list(user_ids))
 
 
+class InvoiceSequence(models.Model):
+    """Last invoice number allocated for an org and number prefix"""
+
+    org = models.ForeignKey(Org, on_delete=models.CASCADE, null=True, blank=True)
+    prefix = models.CharField(max_length=40, blank=True)
+    last_number = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Invoice Sequence"
+        verbose_name_plural = "Invoice Sequences"
+        db_table = "invoice_sequence"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["org", "prefix"], name="invoice_sequence_org_prefix"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.prefix}{self.last_number}"
+
+
 class InvoiceHistory(BaseModel):
     """Model definition for InvoiceHistory.
-    This model is used to track/keep a record of the updates made to original invoice object."""
+    This model is used to track/keep a record of the updates made to original invoice object.
+
+    Versioned rows (version > 0) only store the fields that changed, with a
+    full snapshot every few versions (see invoices.history); the copied
+    columns below are only filled on the rows written before that.
+    """
 
     INVOICE_STATUS = (
         ("Draft", "Draft"),
@@ -167,8 +182,15 @@ class InvoiceHistory(BaseModel):
     invoice = models.ForeignKey(
         Invoice, on_delete=models.CASCADE, related_name="invoice_history"
     )
-    invoice_title = models.CharField(_("Invoice Title"), max_length=50)
-    invoice_number = models.CharField(_("Invoice Number"), max_length=50)
+    version = models.PositiveIntegerField(default=0)
+    changes = models.JSONField(default=dict, blank=True)
+    snapshot = models.JSONField(null=True, blank=True)
+    invoice_title = models.CharField(
+        _("Invoice Title"), max_length=50, null=True, blank=True
+    )
+    invoice_number = models.CharField(
+        _("Invoice Number"), max_length=50, null=True, blank=True
+    )
     from_address = models.ForeignKey(
         Address,
         related_name="invoice_history_from_address",
@@ -181,15 +203,17 @@ class InvoiceHistory(BaseModel):
         on_delete=models.SET_NULL,
         null=True,
     )
-    name = models.CharField(_("Name"), max_length=100)
-    email = models.EmailField(_("Email"))
+    name = models.CharField(_("Name"), max_length=100, null=True, blank=True)
+    email = models.EmailField(_("Email"), null=True, blank=True)
     assigned_to = models.ManyToManyField(
         User, related_name="invoice_history_assigned_to"
     )
     # quantity is the number of hours worked
-    quantity = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0, null=True, blank=True)
     # rate is the rate charged
-    rate = models.DecimalField(default=0, max_digits=12, decimal_places=2)
+    rate = models.DecimalField(
+        default=0, max_digits=12, decimal_places=2, null=True, blank=True
+    )
     # total amount is product of rate and quantity
     total_amount = models.DecimalField(
         blank=True, null=True, max_digits=12, decimal_places=2
@@ -214,8 +238,10 @@ class InvoiceHistory(BaseModel):
     amount_paid = models.DecimalField(
         blank=True, null=True, max_digits=12, decimal_places=2
     )
-    is_email_sent = models.BooleanField(default=False)
-    status = models.CharField(choices=INVOICE_STATUS, max_length=15, default="Draft")
+    is_email_sent = models.BooleanField(default=False, null=True, blank=True)
+    status = models.CharField(
+        choices=INVOICE_STATUS, max_length=15, default="Draft", null=True, blank=True
+    )
     # details or description here stores the fields changed in the original invoice object
     details = models.TextField(_("Details"), null=True, blank=True)
     due_date = models.DateField(blank=True, null=True)
@@ -225,10 +251,17 @@ class InvoiceHistory(BaseModel):
         verbose_name_plural = "InvoiceHistories"
         db_table = "invoice_history"
         ordering = ("-created_at",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["invoice", "version"],
+                condition=models.Q(version__gt=0),
+                name="invoice_history_version",
+            )
+        ]
 
     def __str__(self):
         """Unicode representation of Invoice."""
-        return self.invoice_number
+        return self.invoice_number or f"{self.invoice_id} v{self.version}"
 
     def formatted_total_amount(self):
         return self.currency + " " + str(self.total_amount)
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from invoices.models import Invoice, InvoiceSequence
+
+# An invoice number is a prefix (a strftime format, the date of the day by
+# default) followed by a zero-padded counter. Every org has one counter per
+# prefix, so with the default format the numbers restart at 0001 each day:
+# 180120260001, 180120260002, ...
+DEFAULT_INVOICE_NUMBER_PREFIX = "%d%m%Y"
+DEFAULT_INVOICE_NUMBER_DIGITS = 4
+
+
+def get_invoice_number_prefix(now=None):
+    prefix = getattr(settings, "INVOICE_NUMBER_PREFIX", DEFAULT_INVOICE_NUMBER_PREFIX)
+    return (now or timezone.localtime()).strftime(prefix)
+
+
+def format_invoice_number(prefix, number):
+    digits = getattr(settings, "INVOICE_NUMBER_DIGITS", DEFAULT_INVOICE_NUMBER_DIGITS)
+    return f"{prefix}{number:0{digits}d}"
+
+
+def _last_allocated(org_id, prefix):
+    """Highest counter already used with a prefix, before sequences existed"""
+    numbers = Invoice.objects.filter(org_id=org_id, invoice_number__startswith=prefix)
+    last = numbers.aggregate(last=Max("invoice_number"))["last"] or ""
+    suffix = last[len(prefix) :]
+    return int(suffix) if suffix.isdigit() else 0
+
+
+def _get_sequence(org_id, prefix):
+    sequences = InvoiceSequence.objects.select_for_update()
+    sequence = sequences.filter(org_id=org_id, prefix=prefix).first()
+    if sequence is None:
+        try:
+            with transaction.atomic():
+                sequence = InvoiceSequence.objects.create(
+                    org_id=org_id,
+                    prefix=prefix,
+                    last_number=_last_allocated(org_id, prefix),
+                )
+        except IntegrityError:
+            # created by a concurrent allocation in the meantime
+            sequence = sequences.get(org_id=org_id, prefix=prefix)
+    return sequence
+
+
+def allocate_invoice_number(org_id, now=None):
+    """
+    Next invoice number of an org. The counter row is locked until the
+    surrounding transaction ends, so concurrent allocations wait for each
+    other instead of handing out the same number; it costs two queries
+    (three for the first number of a prefix).
+    """
+    prefix = get_invoice_number_prefix(now)
+    with transaction.atomic():
+        sequence = _get_sequence(org_id, prefix)
+        sequence.last_number += 1
+        sequence.save(update_fields=["last_number"])
+    return format_invoice_number(prefix, sequence.last_number)
@@ -0,0 +1,140 @@
+import hashlib
+import textwrap
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# Invoice PDFs are written by a small pure-Python renderer (text in the
+# standard Helvetica font, A4 pages) and stored under the hash of what they
+# show plus INVOICE_PDF_TEMPLATE_VERSION, so an unchanged invoice is
+# rendered once and every later download streams the stored file. Bump
+# the version whenever the layout below changes.
+INVOICE_PDF_TEMPLATE_VERSION = 1
+INVOICE_PDF_PATH = "invoices/pdf/{digest}.pdf"
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 50
+FONT_SIZE = 10
+LEADING = 14
+LINE_WIDTH = 90
+LINES_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+
+
+def _amount(value, currency):
+    return f"{currency or ''} {value if value is not None else ''}".strip()
+
+
+def _address(address):
+    if address is None:
+        return ""
+    return address.get_complete_address() or ""
+
+
+def get_invoice_lines(invoice):
+    """The text of the PDF of an invoice, line by line"""
+    currency = invoice.currency
+    lines = [
+        f"Invoice {invoice.invoice_number}",
+        invoice.invoice_title,
+        "",
+        f"Status: {invoice.status}",
+        f"Date: {invoice.created_at:%Y-%m-%d}" if invoice.created_at else "",
+        f"Due date: {invoice.due_date or ''}",
+        "",
+        f"From: {_address(invoice.from_address)}",
+        f"To: {invoice.name} <{invoice.email}>",
+        f"Phone: {invoice.phone or ''}",
+        f"Address: {_address(invoice.to_address)}",
+        "",
+        f"Quantity (hours): {invoice.quantity}",
+        f"Rate: {_amount(invoice.rate, currency)}",
+        f"Tax: {_amount(invoice.tax, currency)}",
+        f"Total: {_amount(invoice.total_amount, currency)}",
+        f"Amount paid: {_amount(invoice.amount_paid, currency)}",
+        f"Amount due: {_amount(invoice.amount_due, currency)}",
+    ]
+    if invoice.details:
+        lines += ["", "Details:"] + invoice.details.splitlines()
+    wrapped = []
+    for line in lines:
+        wrapped += textwrap.wrap(str(line), LINE_WIDTH) or [""]
+    return wrapped
+
+
+def get_invoice_pdf_digest(lines):
+    content = "\n".join([f"v{INVOICE_PDF_TEMPLATE_VERSION}", *lines])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _escape(text):
+    # the standard fonts only have the Latin-1 (WinAnsi) characters
+    text = text.encode("latin-1", "replace")
+    return text.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def render_pdf(lines, title=""):
+    """A PDF document (bytes) showing ``lines`` of text, paginated"""
+    pages = [
+        lines[start : start + LINES_PER_PAGE]
+        for start in range(0, len(lines), LINES_PER_PAGE)
+    ] or [[]]
+    # objects: 1 catalog, 2 page tree, 3 font, 4 info, then page/content pairs
+    page_ids = [5 + 2 * index for index in range(len(pages))]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(pages)),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica"
+        b" /Encoding /WinAnsiEncoding >>",
+        b"<< /Title (%s) /Producer (django-crm) >>" % _escape(title),
+    ]
+    for page_id, page in zip(page_ids, pages):
+        stream = b"BT /F1 %d Tf %d TL %d %d Td\n" % (
+            FONT_SIZE,
+            LEADING,
+            MARGIN,
+            PAGE_HEIGHT - MARGIN,
+        )
+        stream += b"".join(b"(%s) '\n" % _escape(line) for line in page) + b"ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d]"
+            b" /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, page_id + 1)
+        )
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+
+    document = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(document))
+        document += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(document)
+    document += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    document += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    document += b"trailer\n<< /Size %d /Root 1 0 R /Info 4 0 R >>\n" % (
+        len(objects) + 1
+    )
+    document += b"startxref\n%d\n%%%%EOF\n" % xref
+    return bytes(document)
+
+
+def get_invoice_pdf(invoice):
+    """
+    Storage path of the PDF of an invoice, rendered and stored first when
+    its content (or the template version) changed since the last one.
+    """
+    lines = get_invoice_lines(invoice)
+    path = INVOICE_PDF_PATH.format(digest=get_invoice_pdf_digest(lines))
+    if not default_storage.exists(path):
+        pdf = render_pdf(lines, title=f"Invoice {invoice.invoice_number}")
+        saved = default_storage.save(path, ContentFile(pdf))
+        if saved != path:
+            # stored by a concurrent render meanwhile: the same bytes
+            default_storage.delete(saved)
+    return path
+
+
+def open_invoice_pdf(invoice):
+    return default_storage.open(get_invoice_pdf(invoice), "rb")
@@ -48,12 +48,47 @@ class InvoiceSerailizer(serializers.ModelSerializer):
 
 
 class InvoiceHistorySerializer(serializers.ModelSerializer):
+    """
+    Versioned rows only store their ``changes`` (the fields that changed,
+    foreign keys as ids): the invoice fields of such a row are read from
+    the state of the invoice at its version, passed as
+    ``context["states"]`` (see invoices.history.get_history_states). Rows
+    written before versioning keep their copied columns.
+    """
+
+    STATE_FIELDS = (
+        "invoice_title",
+        "invoice_number",
+        "status",
+        "due_date",
+        "name",
+        "email",
+        "phone",
+        "currency",
+        "quantity",
+        "rate",
+        "total_amount",
+        "amount_due",
+        "amount_paid",
+        "is_email_sent",
+    )
+
     updated_by = UserSerializer()
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        state = self.context.get("states", {}).get(instance.id)
+        if state is not None:
+            for name in self.STATE_FIELDS:
+                data[name] = state.get(name)
+        return data
+
     class Meta:
         model = InvoiceHistory
         fields = (
             "id",
+            "version",
+            "changes",
             "invoice_title",
             "invoice_number",
             "status",
@@ -0,0 +1,86 @@
+from django.test import TestCase, override_settings
+
+from common.models import Org, User
+from invoices.history import (
+    get_history_states,
+    get_invoice_state_at,
+    record_invoice_history,
+)
+from invoices.models import Invoice, InvoiceHistory
+from invoices.serializer import InvoiceHistorySerializer
+
+
+@override_settings(INVOICE_HISTORY_SNAPSHOT_INTERVAL=3)
+class InvoiceHistoryTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="historyuser", email="hist@ex.com")
+        self.invoice = Invoice.objects.create(
+            invoice_title="invoice",
+            name="client",
+            email="client@ex.com",
+            org=Org.objects.create(name="historyorg"),
+        )
+
+    def update(self, **fields):
+        Invoice.objects.filter(id=self.invoice.id).update(**fields)
+        self.invoice.refresh_from_db()
+        return record_invoice_history(self.invoice, self.user.id)
+
+    def test_versions_store_changed_fields(self):
+        first = record_invoice_history(self.invoice, self.user.id)
+        self.assertEqual((first.version, first.details), (1, "Invoice Created."))
+        self.assertEqual(first.snapshot["name"], "client")
+        self.invoice.assigned_to.add(self.user)
+        second = record_invoice_history(self.invoice, self.user.id)
+        self.assertEqual(second.changes, {"assigned_to": [str(self.user.id)]})
+        self.assertIsNone(second.snapshot)
+        self.assertIsNone(record_invoice_history(self.invoice, self.user.id))
+        third = self.update(status="Sent", amount_due=10)
+        self.assertEqual(third.changes, {"status": "Sent", "amount_due": "10.00"})
+        self.assertEqual(third.details, "Amount Due and Status have changed.")
+        # every third version is a full snapshot
+        self.assertEqual(third.snapshot["assigned_to"], [str(self.user.id)])
+        history = InvoiceHistory.objects.get(id=third.id)
+        self.assertEqual(history.updated_by, self.user)
+
+    def test_reconstruct_at_version(self):
+        record_invoice_history(self.invoice, self.user.id)
+        for number in range(1, 8):
+            self.update(name=f"client {number}")
+        self.assertEqual(get_invoice_state_at(self.invoice.id, 1)["name"], "client")
+        # a snapshot and the versions after it, whatever the number of versions
+        with self.assertNumQueries(2):
+            state = get_invoice_state_at(self.invoice.id, 5)
+        self.assertEqual(state["name"], "client 4")
+        self.assertEqual(get_invoice_state_at(self.invoice.id)["name"], "client 7")
+        self.assertIsNone(get_invoice_state_at(self.invoice.id, 0))
+
+    def test_serialized_rows_show_the_invoice_at_their_version(self):
+        InvoiceHistory.objects.create(
+            invoice=self.invoice, invoice_title="legacy", status="Draft"
+        )
+        record_invoice_history(self.invoice, self.user.id)
+        for number, status in enumerate(["Sent", "Paid", "Paid", "Paid"], start=1):
+            self.update(name=f"client {number}", status=status, amount_due=number)
+        # loaded as by the invoice detail view
+        with self.assertNumQueries(1):
+            history = list(self.invoice.invoice_history.select_related("updated_by"))
+            data = InvoiceHistorySerializer(
+                history, many=True, context={"states": get_history_states(history)}
+            ).data
+        rows = {row["version"]: row for row in data}
+        self.assertEqual(rows[0]["invoice_title"], "legacy")
+        self.assertEqual(
+            (rows[1]["invoice_title"], rows[1]["name"], rows[1]["status"]),
+            ("invoice", "client", "Draft"),
+        )
+        self.assertEqual(
+            (rows[3]["name"], rows[3]["status"], rows[3]["amount_due"]),
+            ("client 2", "Paid", "2.00"),
+        )
+        self.assertEqual(
+            rows[3]["changes"],
+            {"name": "client 2", "status": "Paid", "amount_due": "2.00"},
+        )
+        self.assertEqual(rows[5]["name"], "client 4")
+        self.assertEqual(rows[5]["updated_by"]["email"], "hist@ex.com")
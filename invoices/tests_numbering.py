@@ -0,0 +1,41 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from common.models import Org
+from invoices.models import Invoice
+from invoices.numbering import allocate_invoice_number
+
+
+class InvoiceNumberTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="invoiceorg")
+
+    def create_invoice(self, org):
+        return Invoice.objects.create(
+            invoice_title="invoice", name="client", email="client@ex.com", org=org
+        )
+
+    def test_numbers_are_sequential_per_org(self):
+        prefix = timezone.localtime().strftime("%d%m%Y")
+        first = self.create_invoice(self.org)
+        # the locked select and the update, in a savepoint
+        with self.assertNumQueries(4):
+            number = allocate_invoice_number(self.org.id)
+        self.assertEqual(first.invoice_number, f"{prefix}0001")
+        self.assertEqual(number, f"{prefix}0002")
+        other = self.create_invoice(Org.objects.create(name="other"))
+        self.assertEqual(other.invoice_number, f"{prefix}0001")
+        self.assertEqual(self.create_invoice(self.org).invoice_number, f"{prefix}0003")
+
+    @override_settings(INVOICE_NUMBER_PREFIX="INV-%Y-", INVOICE_NUMBER_DIGITS=6)
+    def test_formats_and_existing_numbers(self):
+        now = timezone.now()
+        prefix = now.strftime("INV-%Y-")
+        Invoice.objects.create(
+            invoice_title="imported",
+            name="client",
+            email="client@ex.com",
+            org=self.org,
+            invoice_number=f"{prefix}000041",
+        )
+        self.assertEqual(allocate_invoice_number(self.org.id, now), f"{prefix}000042")
@@ -0,0 +1,47 @@
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+
+from common.models import Org
+from invoices.models import Invoice
+from invoices.pdf import get_invoice_pdf, open_invoice_pdf, render_pdf
+
+
+class InvoicePdfTest(TestCase):
+    def setUp(self):
+        self.invoice = Invoice.objects.create(
+            invoice_title="invoice (draft)",
+            name="client",
+            email="client@ex.com",
+            currency="EUR",
+            total_amount=120,
+            details="line\\one\n" + "long " * 40,
+            org=Org.objects.create(name="pdforg"),
+        )
+
+    def test_render(self):
+        pdf = render_pdf([f"line {number}" for number in range(120)], "title")
+        self.assertTrue(pdf.startswith(b"%PDF-1.4\n"))
+        self.assertTrue(pdf.endswith(b"%%EOF\n"))
+        self.assertEqual(pdf.count(b"/Type /Page "), 3)
+        offset = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+        self.assertTrue(pdf[offset:].startswith(b"xref\n"))
+
+    def test_unchanged_invoice_is_rendered_once(self):
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                path = get_invoice_pdf(self.invoice)
+                with open_invoice_pdf(self.invoice) as pdf:
+                    content = pdf.read()
+                self.assertIn(b"(invoice \\(draft\\)) '", content)
+                self.assertIn(b"(line\\\\one) '", content)
+                # served from the stored file, not rendered again
+                default_storage.delete(path)
+                default_storage.save(path, ContentFile(b"stored"))
+                with open_invoice_pdf(self.invoice) as pdf:
+                    self.assertEqual(pdf.read(), b"stored")
+                self.invoice.amount_paid = 120
+                self.invoice.save()
+                self.assertNotEqual(get_invoice_pdf(self.invoice), path)
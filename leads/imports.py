@@ -0,0 +1,173 @@
+import csv
+import io
+import re
+
+from django.db import DatabaseError, transaction
+
+from common.dashboard import invalidate_org_dashboard
+from common.imports import (
+    FAILED,
+    FINISHED,
+    RUNNING,
+    chunked,
+    report_row,
+    save_import_result,
+)
+from common.metadata import invalidate_org_metadata
+from common.search import index_objects
+from leads.models import Lead
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_UPLOAD_PATH = "lead_imports/{job_id}.csv"
+CSV_ENCODING = "iso-8859-1"
+REQUIRED_HEADERS = ("title",)
+
+EMAIL_RE = re.compile(
+    r"^[_a-zA-Z0-9-]+(\.[_a-zA-Z0-9-]+)*@[a-zA-Z0-9-]+(\.[a-zA-Z0-9-]+)*(\.[a-zA-Z]{2,4})$"
+)
+
+# csv header -> (Lead field, max length)
+LEAD_IMPORT_FIELDS = {
+    "title": ("title", 64),
+    "first name": ("first_name", 255),
+    "last name": ("last_name", 255),
+    "website": ("website", 255),
+    "email": ("email", None),
+    "phone": ("phone", None),
+    "address": ("address_line", 255),
+    "city": ("city", 255),
+    "state": ("state", 255),
+    "postcode": ("postcode", 64),
+    "country": ("country", 3),
+    "description": ("description", None),
+    "status": ("status", None),
+    "account_name": ("account_name", 255),
+}
+
+
+def parse_headers(cells):
+    headers = [cell.strip().lower() for cell in cells]
+    missing = [header for header in REQUIRED_HEADERS if header not in headers]
+    if missing:
+        raise ValueError("Missing headers: %s" % ", ".join(missing))
+    return headers
+
+
+def read_csv_headers(document):
+    """Check the header line of an uploaded csv without reading the rest"""
+    document.seek(0)
+    line = document.readline().decode(CSV_ENCODING)
+    document.seek(0)
+    return parse_headers(next(csv.reader([line]), []))
+
+
+def iter_csv_rows(file):
+    """
+    Yield (line number, row) for every non-blank row of a binary csv file,
+    rows being dicts keyed by lowercase header. The file is read lazily, so
+    memory does not grow with its size.
+    """
+    reader = csv.reader(io.TextIOWrapper(file, encoding=CSV_ENCODING, newline=""))
+    headers = parse_headers(next(reader, []))
+    for cells in reader:
+        if not "".join(cells):
+            continue
+        row = {header: cell for header, cell in zip(headers, cells) if header}
+        yield reader.line_num, row
+
+
+def build_lead(row, profile, org):
+    lead = Lead(created_from_site=False, org=org, created_by=profile.user)
+    for header, (field, max_length) in LEAD_IMPORT_FIELDS.items():
+        value = row.get(header, "")
+        setattr(lead, field, value[:max_length] if max_length else value)
+    lead.email = lead.email or None
+    lead.phone = lead.phone or None
+    return lead
+
+
+def get_invalid_reason(row):
+    if not row.get("title"):
+        return "Missing title"
+    email = row.get("email")
+    if email and EMAIL_RE.match(email) is None:
+        return "Invalid email"
+    return None
+
+
+def _insert_chunk(leads, rows, result):
+    """Insert a chunk in one transaction; on error, row by row to find culprits"""
+    try:
+        with transaction.atomic():
+            Lead.objects.bulk_create(leads)
+            # bulk_create sends no post_save
+            index_objects(leads)
+        result["created"] += len(leads)
+        return
+    except (DatabaseError, ValueError, TypeError):
+        pass
+    for lead, (line, row) in zip(leads, rows):
+        try:
+            with transaction.atomic():
+                Lead.objects.bulk_create([lead])
+                index_objects([lead])
+            result["created"] += 1
+        except (DatabaseError, ValueError, TypeError) as e:
+            report_row(result, "failed", str(e), line=line, title=row.get("title"))
+
+
+def import_lead_chunk(rows, profile, org, result):
+    """
+    Create the leads of one chunk of (line, row) pairs, skipping titles the
+    org already has (one query) and titles repeated within the chunk.
+    """
+    result["total"] += len(rows)
+    candidates = []
+    for line, row in rows:
+        reason = get_invalid_reason(row)
+        if reason:
+            report_row(result, "failed", reason, line=line, title=row.get("title"))
+        else:
+            candidates.append((line, row))
+    titles = {row["title"][:64] for line, row in candidates}
+    existing = set(
+        Lead.objects.filter(org=org, title__in=titles)
+        .order_by()
+        .values_list("title", flat=True)
+    )
+    leads, lead_rows = [], []
+    for line, row in candidates:
+        title = row["title"][:64]
+        if title in existing:
+            report_row(result, "skipped", "Duplicate title", line=line, title=title)
+            continue
+        existing.add(title)
+        leads.append(build_lead(row, profile, org))
+        lead_rows.append((line, row))
+    if leads:
+        _insert_chunk(leads, lead_rows, result)
+
+
+def import_leads(rows, profile, org, result, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Import (line, row) pairs, rows being dicts keyed by lowercase header, as
+    leads of an org. ``rows`` is consumed chunk by chunk and the running
+    result is saved after each chunk so that clients can poll it.
+    """
+    result["status"] = RUNNING
+    try:
+        for chunk in chunked(rows, chunk_size):
+            import_lead_chunk(chunk, profile, org, result)
+            save_import_result(result)
+    except (ValueError, csv.Error) as e:
+        # unreadable file: the rows imported so far are kept
+        result["status"] = FAILED
+        result["error"] = str(e)
+    else:
+        result["status"] = FINISHED
+    if result["created"]:
+        # bulk_create sends no post_save: invalidate once for the import
+        invalidate_org_dashboard(org.id)
+        invalidate_org_metadata(org.id)
+    save_import_result(result)
+    return result
@@ -7,6 +7,11 @@ from phonenumber_field.modelfields import PhoneNumberField
 from accounts.models import Tags
 from common.models import Org, Profile
 from common.base import BaseModel
+from common.prefetch import (
+    get_assigned_users_not_in_teams,
+    get_team_and_assigned_users,
+    get_team_users,
+)
 from common.utils import (
     COUNTRIES,
     INDCHOICES,
@@ -89,6 +94,11 @@ class Lead(BaseModel):
         verbose_name_plural = "Leads"
         db_table = "lead"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "-created_at", "-id"], name="lead_org_created_id_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title}"
@@ -108,28 +118,12 @@ class Lead(BaseModel):
 
     @property
     def get_team_users(self):
-        team_user_ids = list(self.teams.values_list("users__id", flat=True))
-        return Profile.objects.filter(id__in=team_user_ids)
+        return get_team_users(self)
 
     @property
     def get_team_and_assigned_users(self):
-        team_user_ids = list(self.teams.values_list("users__id", flat=True))
-        assigned_user_ids = list(self.assigned_to.values_list("id", flat=True))
-        user_ids = team_user_ids + assigned_user_ids
-        return Profile.objects.filter(id__in=user_ids)
+        return get_team_and_assigned_users(self)
 
     @property
     def get_assigned_users_not_in_teams(self):
-        team_user_ids = list(self.teams.values_list("users__id", flat=True))
-        assigned_user_ids = list(self.assigned_to.values_list("id", flat=True))
-        user_ids = set(assigned_user_ids) - set(team_user_ids)
-        return Profile.objects.filter(id__in=list(user_ids))
-
-    # def save(self, *args, **kwargs):
-    #     super(Lead, self).save(*args, **kwargs)
-    #     queryset = Lead.objects.all().exclude(status='converted').select_related('created_by'
-    #         ).prefetch_related('tags', 'assigned_to',)
-    #     open_leads = queryset.exclude(status='closed')
-    #     close_leads = queryset.filter(status='closed')
-    #     cache.set('admin_leads_open_queryset', open_leads, 60*60)
-    #     cache.set('admin_leads_close_queryset', close_leads, 60*60)
+        return get_assigned_users_not_in_teams(self)
@@ -6,6 +6,7 @@ from common.serializer import (
     LeadCommentSerializer,
     OrganizationSerializer,
     ProfileSerializer,
+    ProjectedListSerializer,
     UserSerializer,
 )
 from contacts.serializer import ContactSerializer
@@ -85,6 +86,32 @@ class LeadSerializer(serializers.ModelSerializer):
         )
 
 
+class LeadListSerializer(ProjectedListSerializer):
+    company_name = serializers.CharField(
+        source="company.name", read_only=True, default=None
+    )
+
+    class Meta:
+        model = Lead
+        fields = (
+            "id",
+            "title",
+            "first_name",
+            "last_name",
+            "email",
+            "phone",
+            "status",
+            "source",
+            "city",
+            "country",
+            "account_name",
+            "opportunity_amount",
+            "company_name",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
 class LeadCreateSerializer(serializers.ModelSerializer):
     probability = serializers.IntegerField(max_value=100)
 
@@ -21,4 +21,17 @@ lead_list_get_params = [
         enum=["assigned", "in process", "converted", "recycled", "closed"],
     ),
     OpenApiParameter("tags", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "pagination", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["cursor"]
+    ),
+    OpenApiParameter("open_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter("close_cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=["exact", "cached", "approximate"],
+    ),
+    OpenApiParameter("lookups", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+    OpenApiParameter("fields", OpenApiTypes.STR, OpenApiParameter.QUERY),
 ]
@@ -1,13 +1,15 @@
-import re
-
 from celery import Celery
 from django.conf import settings
-from django.core.cache import cache
-from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives
 from django.db.models import Q
 from django.template.loader import render_to_string
 
+from common.imports import get_import_result, new_import_result, report_row
 from common.models import Org, Profile
+from common.notifications import NOTIFICATION_TASK_RETRIES, notify_profiles
+from common.outbox import profile_user_ids, queue_notifications
+from leads.imports import import_leads, iter_csv_rows
 from leads.models import Lead
 
 app = Celery("redis://")
@@ -74,78 +76,79 @@ def send_lead_assigned_emails(lead_id, new_assigned_to_list, site_address):
             send_email.delay(**mail_kwargs)
 
 
-@app.task
-def send_email_to_assigned_user(recipients, lead_id, source=""):
+@app.task(bind=True, max_retries=NOTIFICATION_TASK_RETRIES)
+def send_email_to_assigned_user(self, recipients, lead_id, source="", deferred_to=None):
     """Send Mail To Users When they are assigned to a lead"""
-    lead = Lead.objects.get(id=lead_id)
-    created_by = lead.created_by
-    for user in recipients:
-        recipients_list = []
-        profile = Profile.objects.filter(id=user, is_active=True).first()
-        if profile:
-            recipients_list.append(profile.user.email)
-            context = {}
-            context["url"] = settings.DOMAIN_NAME
-            context["user"] = profile.user
-            context["lead"] = lead
-            context["created_by"] = created_by
-            context["source"] = source
-            subject = "Assigned a lead for you. "
-            html_content = render_to_string(
-                "assigned_to/leads_assigned.html", context=context
-            )
-            msg = EmailMessage(subject, html_content, to=recipients_list)
-            msg.content_subtype = "html"
-            msg.send()
+    lead = Lead.objects.select_related("created_by").get(id=lead_id)
+    context = {
+        "url": settings.DOMAIN_NAME,
+        "lead": lead,
+        "created_by": lead.created_by,
+        "source": source,
+    }
+    return notify_profiles(
+        recipients,
+        "Assigned a lead for you. ",
+        "assigned_to/leads_assigned.html",
+        context,
+        task=self,
+        deferred_to=deferred_to,
+    )
+
+
+def queue_lead_assigned_notifications(lead, profile_ids, source=""):
+    """Write the emails of send_email_to_assigned_user to the outbox"""
+    return queue_notifications(
+        profile_user_ids(profile_ids),
+        "lead_assigned",
+        "Assigned a lead for you. ",
+        "assigned_to/leads_assigned.html",
+        {
+            "url": settings.DOMAIN_NAME,
+            "lead": {"title": lead.title},
+            "created_by": str(lead.created_by or ""),
+            "source": source,
+        },
+        org=lead.org,
+        object_id=lead.id,
+        summary="Lead '%s' has been assigned to you" % lead.title,
+        url=settings.DOMAIN_NAME,
+    )
 
 
 @app.task
-def create_lead_from_file(validated_rows, invalid_rows, user_id, source, company_id):
+def create_lead_from_file(
+    validated_rows, invalid_rows, user_id, source, company_id=None, job_id=None
+):
     """Parameters : validated_rows, invalid_rows, user_id.
-    This function is used to create leads from a given file.
+    This function is used to create leads from rows already parsed from a
+    file; uploads go through import_leads_from_file.
     """
-    email_regex = "^[_a-zA-Z0-9-]+(\.[_a-zA-Z0-9-]+)*@[a-zA-Z0-9-]+(\.[a-zA-Z0-9-]+)*(\.[a-zA-Z]{2,4})$"
-    profile = Profile.objects.get(id=user_id)
+    profile = Profile.objects.select_related("user").get(id=user_id)
     org = Org.objects.filter(id=company_id).first()
-    for row in validated_rows:
-        if not Lead.objects.filter(title=row.get("title")).exists():
-            if re.match(email_regex, row.get("email")) is not None:
-                try:
-                    lead = Lead()
-                    lead.title = row.get("title", "")[:64]
-                    lead.first_name = row.get("first name", "")[:255]
-                    lead.last_name = row.get("last name", "")[:255]
-                    lead.website = row.get("website", "")[:255]
-                    lead.email = row.get("email", "")
-                    lead.phone = row.get("phone", "")
-                    lead.address_line = row.get("address", "")[:255]
-                    lead.city = row.get("city", "")[:255]
-                    lead.state = row.get("state", "")[:255]
-                    lead.postcode = row.get("postcode", "")[:64]
-                    lead.country = row.get("country", "")[:3]
-                    lead.description = row.get("description", "")
-                    lead.status = row.get("status", "")
-                    lead.account_name = row.get("account_name", "")[:255]
-                    lead.created_from_site = False
-                    lead.created_by = profile
-                    lead.org = org
-                    lead.save()
-                except Exception as e:
-                    print(e)
+    result = get_import_result(job_id) if job_id else None
+    if result is None:
+        result = new_import_result(job_id, company_id)
+    for row in invalid_rows:
+        result["total"] += 1
+        report_row(result, "failed", "Missing required value", title=row.get("title"))
+    rows = ((None, row) for row in validated_rows)
+    return import_leads(rows, profile, org, result)
 
 
 @app.task
-def update_leads_cache():
-    queryset = (
-        Lead.objects.all()
-        .exclude(status="converted")
-        .select_related("created_by")
-        .prefetch_related(
-            "tags",
-            "assigned_to",
-        )
-    )
-    open_leads = queryset.exclude(status="closed")
-    close_leads = queryset.filter(status="closed")
-    cache.set("admin_leads_open_queryset", open_leads, 60 * 60)
-    cache.set("admin_leads_close_queryset", close_leads, 60 * 60)
+def import_leads_from_file(path, user_id, company_id, job_id):
+    """
+    Create leads from a csv file saved in the default storage, reading it
+    row by row, and delete the file once done.
+    """
+    profile = Profile.objects.select_related("user").get(id=user_id)
+    org = Org.objects.filter(id=company_id).first()
+    result = get_import_result(job_id) or new_import_result(job_id, company_id)
+    try:
+        with default_storage.open(path, "rb") as file:
+            import_leads(iter_csv_rows(file), profile, org, result)
+    finally:
+        default_storage.delete(path)
+    return result
+
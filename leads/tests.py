@@ -0,0 +1,167 @@
+import io
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.dashboard import get_dashboard
+from common.imports import get_import_result, new_import_result, save_import_result
+from common.metadata import get_metadata
+from common.models import Org, Profile, User
+from common.staging import get_staging_cache
+from leads.imports import import_leads, iter_csv_rows
+from leads.models import Lead
+from leads.tasks import create_lead_from_file, import_leads_from_file
+from role_permission_control.models import Role
+
+
+class LeadImportTest(TestCase):
+    def setUp(self):
+        get_staging_cache().clear()
+        self.user = User.objects.create(username="importuser", email="imp@ex.com")
+        self.org = Org.objects.create(name="importorg")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        Lead.objects.create(title="existing", org=self.org)
+        # same title in another org does not make a row a duplicate
+        Lead.objects.create(title="other org", org=Org.objects.create(name="other"))
+
+    def test_chunked_import(self):
+        rows = [{"title": f"imported {i}", "email": f"i{i}@ex.com"} for i in range(5)]
+        rows += [
+            {"title": "existing"},
+            {"title": "imported 0"},
+            {"title": "other org"},
+            {"title": "bad email", "email": "not-an-email"},
+            {"title": ""},
+        ]
+        rows = list(enumerate(rows, start=2))
+        result = new_import_result("job")
+        # per chunk: the dedupe query and one INSERT of leads and one of
+        # search entries (between SAVEPOINT and RELEASE here); the last chunk
+        # has no valid row and no query
+        with self.assertNumQueries(3 * 5):
+            import_leads(rows, self.profile, self.org, result, chunk_size=3)
+        self.assertEqual(result["status"], "finished")
+        self.assertEqual(
+            (result["total"], result["created"], result["skipped"], result["failed"]),
+            (10, 6, 2, 2),
+        )
+        self.assertEqual(
+            [(row["line"], row["reason"]) for row in result["failed_rows"]],
+            [(10, "Invalid email"), (11, "Missing title")],
+        )
+        lead = Lead.objects.get(title="imported 1")
+        self.assertEqual((lead.org, lead.created_by), (self.org, self.user))
+        self.assertEqual(Lead.objects.filter(org=self.org).count(), 7)
+
+    def test_import_invalidates_org_caches(self):
+        dashboard, _ = get_dashboard(self.profile, self.user)
+        _, etag = get_metadata(self.profile)
+        rows = [(2, {"title": "fresh 0"}), (3, {"title": "fresh 1"})]
+        import_leads(rows, self.profile, self.org, new_import_result("job"))
+        refreshed, cached = get_dashboard(self.profile, self.user)
+        self.assertFalse(cached)
+        self.assertEqual(refreshed["leads_count"], dashboard["leads_count"] + 2)
+        self.assertNotEqual(get_metadata(self.profile)[1], etag)
+
+    def test_task_result_is_polled(self):
+        save_import_result(new_import_result("job", self.org.id))
+        task = create_lead_from_file.apply(
+            (
+                [{"title": "from task"}],
+                [{"title": "", "email": "x@ex.com"}],
+                self.profile.id,
+                "example.com",
+                self.org.id,
+                "job",
+            )
+        )
+        self.assertEqual(task.result["created"], 1)
+        client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+        response = client.get("/api/leads/upload/job/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "finished")
+        self.assertEqual((response.data["created"], response.data["failed"]), (1, 1))
+        self.assertEqual(client.get("/api/leads/upload/other/").status_code, 404)
+
+    def test_csv_rows_are_streamed(self):
+        csv_file = io.BytesIO(
+            b"Title,Email\r\nfirst,a@ex.com\r\n,,\r\n\"multi\nline\",\r\n"
+        )
+        rows = iter_csv_rows(csv_file)
+        self.assertEqual(next(rows), (2, {"title": "first", "email": "a@ex.com"}))
+        self.assertEqual(next(rows), (5, {"title": "multi\nline", "email": ""}))
+        self.assertIsNone(next(rows, None))
+
+    def test_upload_checks_headers_only(self):
+        client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+        upload = SimpleUploadedFile("leads.csv", b"name,email\r\nx,x@ex.com\r\n")
+        response = client.post("/api/leads/upload/", {"leads_file": upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Missing headers: title", str(response.data["errors"]))
+
+    def test_import_from_stored_file(self):
+        with tempfile.TemporaryDirectory() as media_root:
+            with override_settings(MEDIA_ROOT=media_root):
+                path = default_storage.save(
+                    "lead_imports/job.csv",
+                    ContentFile(b"title,email\r\nstored,s@ex.com\r\nexisting,\r\n"),
+                )
+                save_import_result(new_import_result("job", self.org.id))
+                import_leads_from_file.apply(
+                    (path, self.profile.id, self.org.id, "job")
+                )
+                self.assertFalse(default_storage.exists(path))
+        result = get_import_result("job")
+        self.assertEqual(result["status"], "finished")
+        self.assertEqual((result["created"], result["skipped"]), (1, 1))
+        self.assertEqual(result["skipped_rows"][0]["line"], 3)
+
+
+class LeadListFilterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="filteruser", email="flt@ex.com")
+        self.org = Org.objects.create(name="filterorg")
+        Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        for first_name, last_name in [("John", "Smith"), ("John", "Doe")]:
+            Lead.objects.create(
+                title=f"{first_name} {last_name}",
+                first_name=first_name,
+                last_name=last_name,
+                org=self.org,
+            )
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+
+    def found(self, name):
+        response = self.client.get("/api/leads/", {"name": name})
+        self.assertEqual(response.status_code, 200)
+        leads = response.data["open_leads"]["open_leads"]
+        return sorted(lead["title"] for lead in leads)
+
+    def test_name_matches_every_word_in_either_name(self):
+        self.assertEqual(self.found("john smith"), ["John Smith"])
+        self.assertEqual(self.found("john"), ["John Doe", "John Smith"])
+        self.assertEqual(self.found("smith doe"), [])
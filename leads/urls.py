@@ -12,8 +12,9 @@ urlpatterns = [
         name="create_lead_from_site",
     ),
     path("", views.LeadListView.as_view()),
-    path("<str:pk>/", views.LeadDetailView.as_view()),
     path("upload/", views.LeadUploadView.as_view()),
+    path("upload/<str:job_id>/", views.LeadUploadStatusView.as_view()),
+    path("<str:pk>/", views.LeadDetailView.as_view()),
     path("comment/<str:pk>/", views.LeadCommentView.as_view()),
     path("attachment/<str:pk>/", views.LeadAttachmentView.as_view()),
     path("companies",views.CompaniesView.as_view()),
@@ -1,24 +1,44 @@
+import uuid
+
+from django.core.files.storage import default_storage
+from django.db import transaction
 from django.db.models import Q
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.exceptions import PermissionDenied
 
 from accounts.models import Account, Tags
-from common.models import APISettings, Attachments, Comment, Profile
+from common.api_keys import resolve_site_api_key
+from common.imports import get_import_result, new_import_result, save_import_result
+from common.lookups import (
+    get_org_companies,
+    get_org_contact_choices,
+    get_org_users,
+    get_tags,
+    lookups,
+)
+from common.metadata import include_lookups
+from common.models import Attachments, Comment, Profile
+from common.pagination import (
+    CountedLimitOffsetPagination,
+    KeysetPagination,
+    use_cursor_pagination,
+)
 
 from common.serializer import (
     AttachmentsSerializer,
     CommentSerializer,
     LeadCommentSerializer,
     ProfileSerializer,
+    get_list_serialization,
 )
 from .forms import LeadListForm
+from .imports import IMPORT_UPLOAD_PATH
 from .models import Company,Lead
 from common.utils import COUNTRIES, INDCHOICES, LEAD_SOURCE, LEAD_STATUS
 from contacts.models import Contact
@@ -27,8 +47,8 @@ from leads.serializer import (
     CompanySerializer,
     CompanySwaggerSerializer,
     LeadCreateSerializer,
+    LeadListSerializer,
     LeadSerializer,
-    TagsSerializer,
     LeadCreateSwaggerSerializer,
     LeadDetailEditSwaggerSerializer,
     LeadCommentEditSwaggerSerializer,
@@ -37,15 +57,14 @@ from leads.serializer import (
 )
 from common.models import User
 from leads.tasks import (
-    create_lead_from_file,
-    send_email_to_assigned_user,
-    send_lead_assigned_emails,
+    import_leads_from_file,
+    queue_lead_assigned_notifications,
 )
 from teams.models import Teams
 from teams.serializer import TeamsSerializer
 
 
-class LeadListView(APIView, LimitOffsetPagination):
+class LeadListView(APIView, CountedLimitOffsetPagination):
     model = Lead
     permission_classes = (IsAuthenticated,)
 
@@ -54,12 +73,8 @@ class LeadListView(APIView, LimitOffsetPagination):
         queryset = (
             self.model.objects.filter(org=self.request.profile.org)
             .exclude(status="converted")
-            .select_related("created_by")
-            .prefetch_related( 
-                "tags",
-                "assigned_to",
-            )
-        ).order_by("-id")
+            .order_by("-id")
+        )
 
         if self.request.profile.role.has_permission("View own leads"):
             queryset = queryset.filter(
@@ -71,10 +86,11 @@ class LeadListView(APIView, LimitOffsetPagination):
 
         if params:
             if params.get("name"):
-                queryset = queryset.filter(
-                    Q(first_name__icontains=params.get("name"))
-                    & Q(last_name__icontains=params.get("name"))
-                )
+                # every word in the first or the last name ("John Smith")
+                for word in params.get("name").split():
+                    queryset = queryset.filter(
+                        Q(first_name__icontains=word) | Q(last_name__icontains=word)
+                    )
             if params.get("title"):
                 queryset = queryset.filter(title__icontains=params.get("title"))
             if params.get("source"):
@@ -91,60 +107,66 @@ class LeadListView(APIView, LimitOffsetPagination):
                 queryset = queryset.filter(city__icontains=params.get("city"))
             if params.get("email"):
                 queryset = queryset.filter(email__icontains=params.get("email"))
+        queryset, serializer_class = get_list_serialization(
+            self.request, queryset, LeadSerializer, LeadListSerializer
+        )
         context = {}
         queryset_open = queryset.exclude(status="closed")
-        results_leads_open = self.paginate_queryset(
-            queryset_open.distinct(), self.request, view=self
-        )
-        open_leads = LeadSerializer(results_leads_open, many=True).data
-        if results_leads_open:
-            offset = queryset_open.filter(id__gte=results_leads_open[-1].id).count()
-            if offset == queryset_open.count():
-                offset = None
-        else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
-        context["open_leads"] = {
-            "leads_count": self.count,
-            "open_leads": open_leads,
-            "offset": offset,
-        }
-
         queryset_close = queryset.filter(status="closed")
-        results_leads_close = self.paginate_queryset(
-            queryset_close.distinct(), self.request, view=self
-        )
-        close_leads = LeadSerializer(results_leads_close, many=True).data
-        if results_leads_close:
-            offset = queryset_close.filter(id__gte=results_leads_close[-1].id).count()
-            if offset == queryset_close.count():
-                offset = None
+        if use_cursor_pagination(self.request):
+            paginator = KeysetPagination("open_cursor")
+            results_leads_open = paginator.paginate_queryset(
+                queryset_open.distinct(), self.request
+            )
+            context["open_leads"] = {
+                "open_leads": serializer_class(results_leads_open, many=True).data,
+                "next_cursor": paginator.next_cursor,
+            }
+            paginator = KeysetPagination("close_cursor")
+            results_leads_close = paginator.paginate_queryset(
+                queryset_close.distinct(), self.request
+            )
+            context["close_leads"] = {
+                "close_leads": serializer_class(results_leads_close, many=True).data,
+                "next_cursor": paginator.next_cursor,
+            }
         else:
-            offset = 0
-
-        context["close_leads"] = {
-            "leads_count": self.count,
-            "close_leads": close_leads,
-            "offset": offset,
-        }
-        contacts = Contact.objects.filter(org=self.request.profile.org).values(
-            "id", "first_name"
-        )
+            results_leads_open = self.paginate_queryset(
+                queryset_open.distinct(), self.request, view=self
+            )
+            open_leads = serializer_class(results_leads_open, many=True).data
+            offset = self.get_next_offset(results_leads_open)
+            context["per_page"] = 10
+            page_number = (int(self.offset / 10) + 1,)
+            context["page_number"] = page_number
+            context["open_leads"] = {
+                "leads_count": self.count,
+                "count_mode": self.count_mode,
+                "open_leads": open_leads,
+                "offset": offset,
+            }
 
-        context["contacts"] = contacts
+            results_leads_close = self.paginate_queryset(
+                queryset_close.distinct(), self.request, view=self
+            )
+            close_leads = serializer_class(results_leads_close, many=True).data
+            offset = self.get_next_offset(results_leads_close)
+
+            context["close_leads"] = {
+                "leads_count": self.count,
+                "count_mode": self.count_mode,
+                "close_leads": close_leads,
+                "offset": offset,
+            }
+        if not include_lookups(self.request):
+            return context
+        org_id = self.request.profile.org_id
+        context["contacts"] = get_org_contact_choices(org_id)
         context["status"] = LEAD_STATUS
         context["source"] = LEAD_SOURCE
-        context["companies"] = CompanySerializer(
-            Company.objects.filter(org=self.request.profile.org), many=True
-        ).data
-        context["tags"] = TagsSerializer(Tags.objects.all(), many=True).data
-
-        users = Profile.objects.filter(is_active=True, org=self.request.profile.org).values(
-            "id", "user__email"
-        )
-        context["users"] = users
+        context["companies"] = get_org_companies(org_id)
+        context["tags"] = get_tags()
+        context["users"] = get_org_users(org_id)
         context["countries"] = COUNTRIES
         context["industries"] = INDCHOICES
         return context
@@ -243,11 +265,7 @@ class LeadListView(APIView, LimitOffsetPagination):
 
                 if data.get("assigned_to",None):
                     assigned_to_list = data.getlist("assigned_to")
-                    recipients = assigned_to_list
-                    send_email_to_assigned_user.delay(
-                        recipients,
-                        lead_obj.id,
-                    )
+                    queue_lead_assigned_notifications(lead_obj, assigned_to_list)
                 return Response(
                     {
                         "error": False,
@@ -542,11 +560,7 @@ class LeadDetailView(APIView):
                 if params.get("assigned_to"):
                     # account_object.assigned_to.add(*params.getlist('assigned_to'))
                     assigned_to_list = params.get("assigned_to")
-                    recipients = assigned_to_list
-                    send_email_to_assigned_user.delay(
-                        recipients,
-                        lead_obj.id,
-                    )
+                    queue_lead_assigned_notifications(lead_obj, assigned_to_list)
 
                 for comment in lead_obj.leads_comments.all():
                     comment.account = account_object
@@ -595,15 +609,17 @@ class LeadUploadView(APIView):
     def post(self, request, *args, **kwargs):
         lead_form = LeadListForm(request.POST, request.FILES)
         if lead_form.is_valid():
-            create_lead_from_file.delay(
-                lead_form.validated_rows,
-                lead_form.invalid_rows,
-                request.profile.id,
-                request.get_host(),
-                request.profile.org.id,
+            job_id = uuid.uuid4().hex
+            path = default_storage.save(
+                IMPORT_UPLOAD_PATH.format(job_id=job_id),
+                lead_form.cleaned_data["leads_file"],
+            )
+            save_import_result(new_import_result(job_id, request.profile.org.id))
+            import_leads_from_file.delay(
+                path, request.profile.id, request.profile.org.id, job_id
             )
             return Response(
-                {"error": False, "message": "Leads created Successfully"},
+                {"error": False, "message": "Leads import started", "job_id": job_id},
                 status=status.HTTP_200_OK,
             )
         return Response(
@@ -612,6 +628,20 @@ class LeadUploadView(APIView):
         )
 
 
+class LeadUploadStatusView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(tags=["Leads"], parameters=swagger_params1.organization_params)
+    def get(self, request, job_id, **kwargs):
+        result = get_import_result(job_id, request.profile.org.id)
+        if result is None:
+            return Response(
+                {"error": True, "errors": "Import not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return Response({"error": False, **result}, status=status.HTTP_200_OK)
+
+
 class LeadCommentView(APIView):
     model = Comment
     #authentication_classes = (CustomDualAuthentication,)
@@ -708,7 +738,7 @@ class CreateLeadFromSite(APIView):
         api_key = params.get("apikey")
         # api_setting = APISettings.objects.filter(
         #     website=website_address, apikey=api_key).first()
-        api_setting = APISettings.objects.filter(apikey=api_key).first()
+        api_setting = resolve_site_api_key(api_key) if api_key else None
         if not api_setting:
             return Response(
                 {
@@ -721,23 +751,23 @@ class CreateLeadFromSite(APIView):
         if api_setting and params.get("email") and params.get("title"):
             # user = User.objects.filter(is_admin=True, is_active=True).first()
             user = api_setting.created_by
-            lead = Lead.objects.create(
-                title=params.get("title"),
-                first_name=params.get("first_name"),
-                last_name=params.get("last_name"),
-                status="assigned",
-                source=api_setting.website,
-                description=params.get("message"),
-                email=params.get("email"),
-                phone=params.get("phone"),
-                is_active=True,
-                created_by=user,
-                org=api_setting.org,
-            )
-            lead.assigned_to.add(user)
-            # Send Email to Assigned Users
-            site_address = request.scheme + "://" + request.META["HTTP_HOST"]
-            send_lead_assigned_emails.delay(lead.id, [user.id], site_address)
+            with transaction.atomic():
+                lead = Lead.objects.create(
+                    title=params.get("title"),
+                    first_name=params.get("first_name"),
+                    last_name=params.get("last_name"),
+                    status="assigned",
+                    source=api_setting.website,
+                    description=params.get("message"),
+                    email=params.get("email"),
+                    phone=params.get("phone"),
+                    is_active=True,
+                    created_by=user,
+                    org=api_setting.org,
+                )
+                lead.assigned_to.add(user)
+                # Send Email to Assigned Users
+                queue_lead_assigned_notifications(lead, [user.id], source=lead.source)
             # Create Contact
             try:
                 contact = Contact.objects.create(
@@ -770,6 +800,7 @@ class CompaniesView(APIView):
     permission_classes = (IsAuthenticated,)
 
     @extend_schema(tags=["Company"],parameters=swagger_params1.organization_params)
+    @lookups.cache_response()
     def get(self, request, *args, **kwargs):
         try:
             queryset = Company.objects.filter(org=request.profile.org)
@@ -63,6 +63,11 @@ class Opportunity(BaseModel):
         verbose_name_plural = "Opportunities"
         db_table = "opportunity"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(
+                fields=["org", "-created_at", "-id"], name="opportunity_org_created_id_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -2,7 +2,12 @@ from rest_framework import serializers
 
 from accounts.models import Tags
 from accounts.serializer import AccountSerializer
-from common.serializer import AttachmentsSerializer, ProfileSerializer,UserSerializer
+from common.serializer import (
+    AttachmentsSerializer,
+    ProfileSerializer,
+    ProjectedListSerializer,
+    UserSerializer,
+)
 from contacts.serializer import ContactSerializer
 from opportunity.models import Opportunity
 from teams.serializer import TeamsSerializer
@@ -54,6 +59,29 @@ class OpportunitySerializer(serializers.ModelSerializer):
         )
 
 
+class OpportunityListSerializer(ProjectedListSerializer):
+    account_name = serializers.CharField(
+        source="account.name", read_only=True, default=None
+    )
+
+    class Meta:
+        model = Opportunity
+        fields = (
+            "id",
+            "name",
+            "account",
+            "account_name",
+            "stage",
+            "currency",
+            "amount",
+            "lead_source",
+            "probability",
+            "closed_on",
+            "created_at",
+        )
+        read_only_fields = fields
+
+
 class OpportunityCreateSerializer(serializers.ModelSerializer):
     probability = serializers.IntegerField(max_value=100)
     closed_on = serializers.DateField
@@ -17,6 +17,18 @@ opportunity_list_get_params = [
     OpenApiParameter("stage", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("lead_source", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("tags", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "pagination", OpenApiTypes.STR, OpenApiParameter.QUERY, enum=["cursor"]
+    ),
+    OpenApiParameter("cursor", OpenApiTypes.STR, OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=["exact", "cached", "approximate"],
+    ),
+    OpenApiParameter("lookups", OpenApiTypes.BOOL, OpenApiParameter.QUERY),
+    OpenApiParameter("fields", OpenApiTypes.STR, OpenApiParameter.QUERY),
 ]
 
 opportunity_detail_get_params = [
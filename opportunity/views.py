@@ -3,21 +3,28 @@ import json
 from django.db.models import Q
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.exceptions import PermissionDenied
 
 from accounts.models import Account, Tags
-from accounts.serializer import AccountSerializer, TagsSerailizer
+from accounts.serializer import AccountSerializer
+from common.lookups import get_tags
+from common.metadata import include_lookups
 from common.models import Attachments, Comment, Profile
+from common.pagination import (
+    CountedLimitOffsetPagination,
+    KeysetPagination,
+    use_cursor_pagination,
+)
 
 #from common.external_auth import CustomDualAuthentication
 from common.serializer import (
     AttachmentsSerializer,
     CommentSerializer,
     ProfileSerializer,
+    get_list_serialization,
 )
 from common.utils import CURRENCY_CODES, SOURCES, STAGES
 from contacts.models import Contact
@@ -29,7 +36,7 @@ from opportunity.tasks import send_email_to_assigned_user
 from teams.models import Teams
 
 
-class OpportunityListView(APIView, LimitOffsetPagination):
+class OpportunityListView(APIView, CountedLimitOffsetPagination):
 
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
@@ -70,30 +77,38 @@ class OpportunityListView(APIView, LimitOffsetPagination):
                     tags__in=params.get("tags")
                 ).distinct()
 
-        context = {}
-        results_opportunities = self.paginate_queryset(
-            queryset.distinct(), self.request, view=self
+        queryset, serializer_class = get_list_serialization(
+            self.request, queryset, OpportunitySerializer, OpportunityListSerializer
         )
-        opportunities = OpportunitySerializer(results_opportunities, many=True).data
-        if results_opportunities:
-            offset = queryset.filter(id__gte=results_opportunities[-1].id).count()
-            if offset == queryset.count():
-                offset = None
+        context = {}
+        if use_cursor_pagination(self.request):
+            paginator = KeysetPagination()
+            results_opportunities = paginator.paginate_queryset(
+                queryset.distinct(), self.request
+            )
+            context["next_cursor"] = paginator.next_cursor
         else:
-            offset = 0
-        context["per_page"] = 10
-        page_number = (int(self.offset / 10) + 1,)
-        context["page_number"] = page_number
-        context.update(
-            {
-                "opportunities_count": self.count,
-                "offset": offset,
-            }
-        )
+            results_opportunities = self.paginate_queryset(
+                queryset.distinct(), self.request, view=self
+            )
+            offset = self.get_next_offset(results_opportunities)
+            context["per_page"] = 10
+            page_number = (int(self.offset / 10) + 1,)
+            context["page_number"] = page_number
+            context.update(
+                {
+                    "opportunities_count": self.count,
+                    "count_mode": self.count_mode,
+                    "offset": offset,
+                }
+            )
+        opportunities = serializer_class(results_opportunities, many=True).data
         context["opportunities"] = opportunities
+        if not include_lookups(self.request):
+            return context
         context["accounts_list"] = AccountSerializer(accounts, many=True).data
         context["contacts_list"] = ContactSerializer(contacts, many=True).data
-        context["tags"] = TagsSerailizer(Tags.objects.filter(), many=True).data
+        context["tags"] = get_tags()
         context["stage"] = STAGES
         context["lead_source"] = SOURCES
         context["currency"] = CURRENCY_CODES
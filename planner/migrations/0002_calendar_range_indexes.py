@@ -0,0 +1,21 @@
+# Generated by Django 4.2.1 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='plannerevent',
+            index=models.Index(fields=['start_date', 'close_date'], name='planner_event_range_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plannerevent',
+            index=models.Index(fields=['created_by', 'start_date'], name='planner_event_owner_idx'),
+        ),
+    ]
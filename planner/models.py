@@ -101,6 +101,15 @@ class PlannerEvent(BaseModel):
         verbose_name_plural = "PlannerEvents"
         db_table = "planner_event"
         ordering = ("-created_at",)
+        indexes = [
+            # calendar ranges (common.agenda)
+            models.Index(
+                fields=["start_date", "close_date"], name="planner_event_range_idx"
+            ),
+            models.Index(
+                fields=["created_by", "start_date"], name="planner_event_owner_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name}"
@@ -1,3 +1,18 @@
+import datetime
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.agenda import get_calendar, get_event_items
+from common.models import Org, Profile, User
+from events.models import Event
+from events.recurrence import create_series, materialize_occurrences
+from planner.models import PlannerEvent
+from tasks.models import Task
+from role_permission_control.models import Role
+
+
 # import datetime
 # from django.utils import timezone
 # from django.test import TestCase
@@ -280,3 +295,85 @@
 #         })
 #         self.assertEqual(response.status_code, 200)
 #         self.assertEqual({'Event': 'DoesNotExist'}, response.json())
+
+
+class CalendarTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="calendarorg")
+        self.user = User.objects.create(username="calendar", email="cal@ex.com")
+        self.profile = Profile.objects.create(
+            user=self.user, org=self.org, role=Role.objects.get(name="ADMIN")
+        )
+        day = datetime.date
+        event = {"event_type": "Non-Recurring", "start_time": datetime.time(10)}
+        self.meeting = Event.objects.create(
+            name="offsite",
+            start_date=day(2026, 3, 30),
+            end_date=day(2026, 4, 2),
+            org=self.org,
+            **event,
+        )
+        Event.objects.create(
+            name="may",
+            start_date=day(2026, 5, 1),
+            end_date=day(2026, 5, 1),
+            org=self.org,
+            **event,
+        )
+        self.series = create_series(
+            {
+                "name": "standup",
+                "start_date": day(2026, 4, 1),
+                "end_date": day(2026, 6, 30),
+                "start_time": datetime.time(9),
+            },
+            [0],
+            self.profile,
+        )
+        materialize_occurrences(self.series, day(2026, 4, 10))
+        Task.objects.create(title="due", due_date=day(2026, 4, 15), org=self.org)
+        Task.objects.create(title="later", due_date=day(2026, 5, 1), org=self.org)
+        planned = PlannerEvent.objects.create(
+            name="call", event_type="Call", start_date=day(2026, 4, 20)
+        )
+        planned.assigned_to.add(self.user)
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.user)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {token.access_token}",
+            HTTP_ORG=str(self.org.id),
+        )
+
+    def test_range_lists_overlapping_items(self):
+        start, end = datetime.date(2026, 4, 1), datetime.date(2026, 5, 1)
+        # events, series, tasks and planner items: one query each
+        with self.assertNumQueries(4):
+            items = get_calendar(self.profile, self.user, start, end)
+        self.assertEqual(
+            [(item["type"], item["title"], item["start"].day) for item in items],
+            [
+                ("event", "offsite", 30),
+                ("event", "standup", 6),
+                ("event", "standup", 13),
+                ("task", "due", 15),
+                # items without a time first
+                ("planner", "call", 20),
+                ("event", "standup", 20),
+                ("event", "standup", 27),
+            ],
+        )
+        # the occurrence of the 6th is a row, the next ones are expanded
+        self.assertIsNotNone(items[1]["id"])
+        self.assertIsNone(items[2]["id"])
+        self.assertEqual(items[2]["series"], self.series.id)
+        # others only see what they created or are assigned to
+        own = get_event_items(self.profile, start, end, sees_all=False)
+        self.assertEqual({item["title"] for item in own}, {"standup"})
+
+    def test_endpoint(self):
+        response = self.client.get("/api/calendar/?from=2026-04-01&to=2026-04-08")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["items"]), 2)
+        for query in ("from=2026-04-01", "from=2026-04-08&to=2026-04-01"):
+            response = self.client.get(f"/api/calendar/?{query}")
+            self.assertEqual(response.status_code, 400)
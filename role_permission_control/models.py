@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser, Group, Permission as DjangoPermission 
 from django.conf import settings
 
+from role_permission_control.permission_cache import get_role_permission_names
+
 class Role(models.Model):
     name = models.CharField(max_length=80, unique=True, null=False)
     description = models.TextField(blank=True, null=True)
@@ -16,8 +18,30 @@ class Role(models.Model):
     def __str__(self):
         return self.name
     
+    def get_permission_names(self) -> frozenset:
+        """
+        Return the names of every permission granted to this role.
+
+        The set comes from the shared, generation-versioned cache (one query
+        per role per generation on a miss) and is memoized on the instance,
+        so repeated checks during one request are answered from memory.
+        """
+        names = self.__dict__.get("_permission_names")
+        if names is None:
+            names = get_role_permission_names(
+                self.pk,
+                lambda: RolePermission.objects.filter(role_id=self.pk).values_list(
+                    "permission__name", flat=True
+                ),
+            )
+            self._permission_names = names
+        return names
+
+    def clear_permission_cache(self):
+        self.__dict__.pop("_permission_names", None)
+
     def has_permission(self, permission_name: str) -> bool:
-        return self.permissions.filter(name=permission_name).exists()
+        return permission_name in self.get_permission_names()
 
     @property
     def permissions(self):
@@ -0,0 +1,38 @@
+from django.core.cache import cache
+
+from common.caching import bump_cache_version, get_cache_version, versioned_timeout
+
+GENERATION_KEY = "rbac:generation"
+ROLE_PERMISSIONS_KEY = "rbac:{generation}:role:{role_id}"
+ROLE_PERMISSIONS_TIMEOUT = 60 * 60 * 24
+# kept that short when the cache is in-process (see versioned_timeout)
+LOCAL_ROLE_PERMISSIONS_TIMEOUT = 30
+
+
+def get_timeout():
+    return versioned_timeout(ROLE_PERMISSIONS_TIMEOUT, LOCAL_ROLE_PERMISSIONS_TIMEOUT)
+
+
+def get_generation():
+    """Return the current generation of the role -> permissions mapping"""
+    return get_cache_version(GENERATION_KEY)
+
+
+def bump_generation():
+    """Invalidate every cached role -> permissions entry in all processes"""
+    bump_cache_version(GENERATION_KEY)
+
+
+def get_role_permission_names(role_id, loader):
+    """
+    Return the permission names of a role from the shared cache.
+
+    ``loader`` is called on a miss, so a worker pays at most one query per
+    role per generation; the result is stored for the other workers.
+    """
+    key = ROLE_PERMISSIONS_KEY.format(generation=get_generation(), role_id=role_id)
+    names = cache.get(key)
+    if names is None:
+        names = list(loader())
+        cache.set(key, names, get_timeout())
+    return frozenset(names)
@@ -1,4 +1,7 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
+
+from common.prefetch import is_prefetched
 from .models import Role, Permission, RolePermission
 
 class PermissionSerializer(serializers.ModelSerializer):
@@ -13,6 +16,17 @@ class RoleWithPermissionsSerializer(serializers.ModelSerializer):
         model = Role
         fields = ['id', 'name', 'description', 'permissions']
 
+    # served from role__role_permissions when the caller prefetched it
+    prefetch_related_fields = (
+        Prefetch(
+            "role_permissions",
+            queryset=RolePermission.objects.select_related("permission"),
+        ),
+    )
+
     def get_permissions(self, role):
-        role_permissions = RolePermission.objects.filter(role=role).select_related('permission')
-        return PermissionSerializer([rp.permission for rp in role_permissions], many=True).data
\ No newline at end of file
+        if is_prefetched(role, "role_permissions"):
+            role_permissions = role.role_permissions.all()
+        else:
+            role_permissions = RolePermission.objects.filter(role=role).select_related('permission')
+        return PermissionSerializer([rp.permission for rp in role_permissions], many=True).data
@@ -1,8 +1,10 @@
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 from django.apps import apps
 from django.db import transaction
 
+from role_permission_control.permission_cache import bump_generation
+
 
 @receiver(post_migrate)
 def seed_rbac_data(sender, app_config, verbosity, interactive, **kwargs):
@@ -201,4 +203,26 @@ def seed_rbac_data(sender, app_config, verbosity, interactive, **kwargs):
             else:
                 print(f"  Warning: Role '{role_name}' not found for mapping permissions.")
 
-        print("RBAC data seeding completed.")
\ No newline at end of file
+        print("RBAC data seeding completed.")
+
+
+@receiver(post_save, sender="role_permission_control.RolePermission")
+@receiver(post_delete, sender="role_permission_control.RolePermission")
+def clear_role_permission_cache(sender, instance, **kwargs):
+    """
+    Drop the memoized permission set of the role whose mapping changed and
+    bump the shared cache generation once the transaction commits, so every
+    gunicorn worker reloads the mapping on its next check.
+    """
+    role = instance._state.fields_cache.get("role")
+    if role is not None:
+        role.clear_permission_cache()
+    transaction.on_commit(bump_generation)
+
+
+@receiver(post_save, sender="role_permission_control.Permission")
+@receiver(post_delete, sender="role_permission_control.Permission")
+@receiver(post_delete, sender="role_permission_control.Role")
+def invalidate_permission_cache(sender, instance, **kwargs):
+    """Renamed or removed permissions/roles change the cached name sets"""
+    transaction.on_commit(bump_generation)
@@ -1,3 +1,68 @@
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from role_permission_control.models import Permission, Role, RolePermission
+from role_permission_control.permission_cache import (
+    LOCAL_ROLE_PERMISSIONS_TIMEOUT,
+    get_generation,
+    get_timeout,
+)
+
+
+class RolePermissionCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.role = Role.objects.create(name="Auditor")
+        self.view_leads = Permission.objects.create(name="Audit leads")
+        self.view_cases = Permission.objects.create(name="Audit cases")
+        RolePermission.objects.create(role=self.role, permission=self.view_leads)
+
+    def test_has_permission_uses_single_query(self):
+        role = Role.objects.get(pk=self.role.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(role.has_permission("Audit leads"))
+            self.assertFalse(role.has_permission("Audit cases"))
+            self.assertTrue(role.has_permission("Audit leads"))
+
+    def test_permission_names_is_frozenset(self):
+        self.assertEqual(
+            self.role.get_permission_names(), frozenset({"Audit leads"})
+        )
+
+    def test_shared_cache_serves_fresh_instances(self):
+        Role.objects.get(pk=self.role.pk).get_permission_names()
+        role = Role.objects.get(pk=self.role.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(role.has_permission("Audit leads"))
+
+    def test_cache_cleared_when_mapping_changes(self):
+        self.assertFalse(self.role.has_permission("Audit cases"))
+        generation = get_generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            RolePermission.objects.create(role=self.role, permission=self.view_cases)
+        self.assertNotEqual(get_generation(), generation)
+        self.assertTrue(self.role.has_permission("Audit cases"))
+        self.assertTrue(
+            Role.objects.get(pk=self.role.pk).has_permission("Audit cases")
+        )
+
+        mapping = RolePermission.objects.get(
+            role=self.role, permission=self.view_leads
+        )
+        mapping.role = self.role
+        with self.captureOnCommitCallbacks(execute=True):
+            mapping.delete()
+        self.assertFalse(self.role.has_permission("Audit leads"))
+
+    def test_permission_rename_invalidates_cache(self):
+        self.assertTrue(self.role.has_permission("Audit leads"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.view_leads.name = "Audit all leads"
+            self.view_leads.save()
+        role = Role.objects.get(pk=self.role.pk)
+        self.assertTrue(role.has_permission("Audit all leads"))
+        self.assertFalse(role.has_permission("Audit leads"))
+
+    def test_in_process_cache_keeps_entries_for_seconds(self):
+        # the other workers are not told of a bump through a LocMemCache
+        self.assertEqual(get_timeout(), LOCAL_ROLE_PERMISSIONS_TIMEOUT)
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.1 on 2026-10-18 19:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['org', 'due_date'], name='task_org_due_date_idx'),
+        ),
+    ]
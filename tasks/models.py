@@ -52,6 +52,13 @@ class Task(BaseModel):
         verbose_name_plural = "Tasks"
         db_table = "task"
         ordering = ("-due_date",)
+        indexes = [
+            models.Index(
+                fields=["org", "-created_at", "-id"], name="task_org_created_id_idx"
+            ),
+            # calendar ranges (common.agenda)
+            models.Index(fields=["org", "due_date"], name="task_org_due_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title}"
@@ -3,14 +3,20 @@ import json
 from django.db.models import Q
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from accounts.models import Account
 from accounts.serializer import AccountSerializer
+from common.metadata import include_lookups
 from common.models import Attachments, Comment, Profile
+from common.pagination import (
+    CountedLimitOffsetPagination,
+    KeysetPagination,
+    use_cursor_pagination,
+)
+from common.prefetch import eager_load
 
 #from common.external_auth import CustomDualAuthentication
 from common.serializer import (
@@ -28,14 +34,16 @@ from teams.models import Teams
 from teams.serializer import TeamsSerializer
 
 
-class TaskListView(APIView, LimitOffsetPagination):
+class TaskListView(APIView, CountedLimitOffsetPagination):
     model = Task
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = eager_load(
+            self.model.objects.filter(org=self.request.profile.org), TaskSerializer
+        ).order_by("-id")
         accounts = Account.objects.filter(org=self.request.profile.org)
         contacts = Contact.objects.filter(org=self.request.profile.org)
         if self.request.profile.role.name != "ADMIN" and not self.request.profile.is_admin:
@@ -58,23 +66,28 @@ class TaskListView(APIView, LimitOffsetPagination):
             if params.get("priority"):
                 queryset = queryset.filter(priority=params.get("priority"))
         context = {}
-        results_tasks = self.paginate_queryset(
-            queryset.distinct(), self.request, view=self
-        )
-        tasks = TaskSerializer(results_tasks, many=True).data
-        if results_tasks:
-            offset = queryset.filter(id__gte=results_tasks[-1].id).count()
-            if offset == queryset.count():
-                offset = None
+        if use_cursor_pagination(self.request):
+            paginator = KeysetPagination()
+            results_tasks = paginator.paginate_queryset(
+                queryset.distinct(), self.request
+            )
+            context["next_cursor"] = paginator.next_cursor
         else:
-            offset = 0
-        context.update(
-            {
-                "tasks_count": self.count,
-                "offset": offset,
-            }
-        )
+            results_tasks = self.paginate_queryset(
+                queryset.distinct(), self.request, view=self
+            )
+            offset = self.get_next_offset(results_tasks)
+            context.update(
+                {
+                    "tasks_count": self.count,
+                    "count_mode": self.count_mode,
+                    "offset": offset,
+                }
+            )
+        tasks = TaskSerializer(results_tasks, many=True).data
         context["tasks"] = tasks
+        if not include_lookups(self.request):
+            return context
         context["status"] = STATUS_CHOICES
         context["priority"] = PRIORITY_CHOICES
         context["accounts_list"] = AccountSerializer(accounts, many=True).data
@@ -0,0 +1,114 @@
+from django.apps import apps
+from django.db import transaction
+
+from common.dashboard import invalidate_org_dashboard
+from common.imports import chunked
+from common.metadata import invalidate_org_metadata
+from common.models import Profile
+
+# The members of a team are assigned to (documents: shared with) every row
+# the team is attached to. Membership changes are propagated with one
+# statement per through table and chunk instead of one add/remove per row
+# and member; invoices are assigned to users rather than profiles.
+TEAM_PROPAGATED_FIELDS = (
+    ("accounts.Account", "assigned_to"),
+    ("contacts.Contact", "assigned_to"),
+    ("leads.Lead", "assigned_to"),
+    ("opportunity.Opportunity", "assigned_to"),
+    ("cases.Case", "assigned_to"),
+    ("common.Document", "shared_to"),
+    ("tasks.Task", "assigned_to"),
+    ("invoices.Invoice", "assigned_to"),
+    ("events.Event", "assigned_to"),
+)
+# through rows written per INSERT
+PROPAGATION_BATCH_SIZE = 5000
+
+
+def get_propagated_relations():
+    """
+    (through model, row column, member column, member is a user, teams
+    field) per propagated field
+    """
+    relations = []
+    for label, name in TEAM_PROPAGATED_FIELDS:
+        model = apps.get_model(label)
+        field = model._meta.get_field(name)
+        relations.append(
+            (
+                field.remote_field.through,
+                field.m2m_field_name(),
+                field.m2m_reverse_field_name(),
+                field.related_model is not Profile,
+                model._meta.get_field("teams"),
+            )
+        )
+    return relations
+
+
+def _team_rows(teams_field, team_id):
+    """Ids of the rows of a team (a queryset, usable as a subquery)"""
+    through = teams_field.remote_field.through
+    return through.objects.filter(
+        **{f"{teams_field.m2m_reverse_field_name()}_id": team_id}
+    ).values_list(f"{teams_field.m2m_field_name()}_id", flat=True)
+
+
+def _member_ids(profile_ids):
+    profiles = Profile.objects.filter(id__in=list(profile_ids)).order_by()
+    return dict(profiles.values_list("id", "user_id"))
+
+
+def add_team_members(team, profile_ids, batch_size=PROPAGATION_BATCH_SIZE):
+    """
+    Assign profiles to every row of a team, in one transaction, skipping
+    the assignments already there. Returns the number of (row, member)
+    pairs covered.
+    """
+    members = _member_ids(profile_ids)
+    if not members:
+        return 0
+    written = 0
+    rows_per_batch = max(1, batch_size // len(members))
+    with transaction.atomic():
+        for through, row, member, to_user, teams_field in get_propagated_relations():
+            member_ids = set(members.values()) if to_user else set(members)
+            row_ids = _team_rows(teams_field, team.id).iterator()
+            for chunk in chunked(row_ids, rows_per_batch):
+                links = [
+                    through(**{f"{row}_id": row_id, f"{member}_id": member_id})
+                    for row_id in chunk
+                    for member_id in member_ids
+                ]
+                through.objects.bulk_create(links, ignore_conflicts=True)
+                written += len(links)
+    _invalidate(team)
+    return written
+
+
+def remove_team_members(team, profile_ids):
+    """
+    Unassign profiles from every row of a team, with one DELETE per through
+    table, in one transaction. Returns the number of through rows deleted.
+    """
+    members = _member_ids(profile_ids)
+    if not members:
+        return 0
+    deleted = 0
+    with transaction.atomic():
+        for through, row, member, to_user, teams_field in get_propagated_relations():
+            member_ids = set(members.values()) if to_user else set(members)
+            deleted += through.objects.filter(
+                **{
+                    f"{row}_id__in": _team_rows(teams_field, team.id),
+                    f"{member}_id__in": member_ids,
+                }
+            ).delete()[0]
+    _invalidate(team)
+    return deleted
+
+
+def _invalidate(team):
+    # the bulk statements do not send m2m_changed
+    invalidate_org_dashboard(team.org_id)
+    invalidate_org_metadata(team.org_id)
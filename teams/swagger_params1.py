@@ -14,4 +14,10 @@ teams_list_get_params = [
     OpenApiParameter("team_name", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("created_by", OpenApiTypes.STR,OpenApiParameter.QUERY),
     OpenApiParameter("assigned_users", OpenApiTypes.STR,OpenApiParameter.QUERY),
+    OpenApiParameter(
+        "count",
+        OpenApiTypes.STR,
+        OpenApiParameter.QUERY,
+        enum=["exact", "cached", "approximate"],
+    ),
 ]
@@ -0,0 +1,64 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Account
+from common.models import Org, Profile, User
+from leads.models import Lead
+from teams.models import Teams
+from teams.tasks import remove_users, update_team_users
+from role_permission_control.models import Role
+
+
+class TeamPropagationTest(TestCase):
+    def setUp(self):
+        self.org = Org.objects.create(name="teamorg")
+        role = Role.objects.get(name="ADMIN")
+        self.profiles = [
+            Profile.objects.create(
+                user=User.objects.create(username=f"team{i}", email=f"t{i}@ex.com"),
+                org=self.org,
+                role=role,
+            )
+            for i in range(3)
+        ]
+        self.team = Teams.objects.create(name="team", description="", org=self.org)
+        self.team.users.add(*self.profiles[:2])
+        self.leads = [
+            Lead.objects.create(title=f"team lead {i}", org=self.org) for i in range(5)
+        ]
+        self.account = Account.objects.create(
+            name="team account", email="acc@ex.com", org=self.org
+        )
+        for lead in self.leads:
+            lead.teams.add(self.team)
+        self.account.teams.add(self.team)
+        self.leads[0].assigned_to.add(self.profiles[0])
+
+    def assigned(self, row):
+        return set(row.assigned_to.values_list("id", flat=True))
+
+    def test_members_are_assigned_to_the_team_rows(self):
+        members = {profile.id for profile in self.profiles[:2]}
+        update_team_users(self.team.id)
+        for lead in self.leads:
+            self.assertEqual(self.assigned(lead), members)
+        self.assertEqual(self.assigned(self.account), members)
+        # the number of queries does not depend on the number of rows
+        Lead.objects.create(title="another lead", org=self.org).teams.add(self.team)
+        with CaptureQueriesContext(connection) as one_more:
+            update_team_users(self.team.id)
+        with CaptureQueriesContext(connection) as again:
+            update_team_users(self.team.id)
+        self.assertEqual(len(one_more), len(again))
+
+    def test_removed_members_are_unassigned(self):
+        update_team_users(self.team.id)
+        self.leads[0].assigned_to.add(self.profiles[2])
+        removed = remove_users([str(self.profiles[0].id), "not-an-id"], self.team.id)
+        self.assertEqual(removed, 6)
+        for lead in self.leads[1:]:
+            self.assertEqual(self.assigned(lead), {self.profiles[1].id})
+        self.assertEqual(
+            self.assigned(self.leads[0]), {self.profiles[1].id, self.profiles[2].id}
+        )
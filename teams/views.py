@@ -3,26 +3,29 @@ from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schem
 
 #from common.external_auth import CustomDualAuthentication
 from rest_framework import status
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from common.models import Profile
+from common.pagination import CountedLimitOffsetPagination
+from common.prefetch import eager_load
 from teams import swagger_params1
 from teams.models import Teams
 from teams.serializer import TeamCreateSerializer, TeamsSerializer,TeamswaggerCreateSerializer
 from teams.tasks import remove_users, update_team_users
 
 
-class TeamsListView(APIView, LimitOffsetPagination):
+class TeamsListView(APIView, CountedLimitOffsetPagination):
     model = Teams
     #authentication_classes = (CustomDualAuthentication,)
     permission_classes = (IsAuthenticated,)
 
     def get_context_data(self, **kwargs):
         params = self.request.query_params
-        queryset = self.model.objects.filter(org=self.request.profile.org).order_by("-id")
+        queryset = eager_load(
+            self.model.objects.filter(org=self.request.profile.org), TeamsSerializer
+        ).order_by("-id")
         if params:
             if params.get("team_name"):
                 queryset = queryset.filter(name__icontains=params.get("team_name"))
@@ -38,16 +41,17 @@ class TeamsListView(APIView, LimitOffsetPagination):
             queryset.distinct(), self.request, view=self
         )
         teams = TeamsSerializer(results_teams, many=True).data
-        if results_teams:
-            offset = queryset.filter(id__gte=results_teams[-1].id).count()
-            if offset == queryset.count():
-                offset = None
-        else:
-            offset = 0
+        offset = self.get_next_offset(results_teams)
         context["per_page"] = 10
         page_number = (int(self.offset / 10) + 1,)
         context["page_number"] = page_number
-        context.update({"teams_count": self.count, "offset": offset})
+        context.update(
+            {
+                "teams_count": self.count,
+                "count_mode": self.count_mode,
+                "offset": offset,
+            }
+        )
         context["teams"] = teams
         return context
 
@@ -140,8 +144,7 @@ class TeamsDetailView(APIView):
             )
         params = request.data
         self.team = self.get_object(pk)
-        actual_users = self.team.get_users()
-        removed_users = []
+        previous_users = set(self.team.users.values_list("id", flat=True))
         serializer = TeamCreateSerializer(
             data=params, instance=self.team, request_obj=request
         )
@@ -157,11 +160,10 @@ class TeamsDetailView(APIView):
                 if profiles:
                     team_obj.users.add(*profiles)
             update_team_users.delay(pk)
-            latest_users = team_obj.get_users()
-            for user in actual_users:
-                if user not in latest_users:
-                    removed_users.append(user)
-            remove_users.delay(removed_users, pk)
+            removed_users = previous_users - set(
+                team_obj.users.values_list("id", flat=True)
+            )
+            remove_users.delay([str(user) for user in removed_users], pk)
             return Response(
                 {"error": False, "message": "Team Updated Successfully"},
                 status=status.HTTP_200_OK,